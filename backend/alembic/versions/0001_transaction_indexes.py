@@ -0,0 +1,56 @@
+"""monthly rollups and composite transaction indexes
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Databases created before Alembic was introduced already have the base
+tables (Base.metadata.create_all), so this revision only adds what is
+missing and can also be applied to a freshly created database.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_incomes_user_id_date', 'incomes', [sa.text('user_id'), sa.text('date DESC')]),
+    ('ix_incomes_user_id_income_type_date', 'incomes', ['user_id', 'income_type', 'date']),
+    ('ix_expenses_user_id_date', 'expenses', [sa.text('user_id'), sa.text('date DESC')]),
+    ('ix_expenses_user_id_category_date', 'expenses', ['user_id', 'category', 'date']),
+    ('ix_expenses_user_id_budget_id_date', 'expenses', ['user_id', 'budget_id', 'date']),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('monthly_rollups'):
+        op.create_table(
+            'monthly_rollups',
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+            sa.Column('year', sa.Integer(), primary_key=True),
+            sa.Column('month', sa.Integer(), primary_key=True),
+            sa.Column('kind', sa.String(), primary_key=True),
+            sa.Column('category', sa.String(), primary_key=True),
+            sa.Column('total', sa.Float(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+        )
+
+    for name, table, columns in INDEXES:
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    op.drop_table('monthly_rollups')
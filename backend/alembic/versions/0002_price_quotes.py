@@ -0,0 +1,37 @@
+"""shared price quote store
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('price_quotes'):
+        op.create_table(
+            'price_quotes',
+            sa.Column('symbol', sa.String(), primary_key=True),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('change', sa.Float(), nullable=True),
+            sa.Column('change_percent', sa.String(), nullable=True),
+            sa.Column('volume', sa.Integer(), nullable=True),
+            sa.Column('previous_close', sa.Float(), nullable=True),
+            sa.Column('fetched_at', sa.DateTime(timezone=True), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('price_quotes')
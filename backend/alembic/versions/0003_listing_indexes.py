@@ -0,0 +1,39 @@
+"""goal and investment listing indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+Composite indexes matching the order of GET /goals/ and GET /investments/,
+so keyset pagination can seek straight to the cursor.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_goals_user_id_priority_target_date', 'goals', [sa.text('user_id'), sa.text('priority DESC'), sa.text('target_date')]),
+    ('ix_investments_user_id_purchase_date', 'investments', [sa.text('user_id'), sa.text('purchase_date DESC')]),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    for name, table, columns in INDEXES:
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
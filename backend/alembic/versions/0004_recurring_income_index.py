@@ -0,0 +1,38 @@
+"""recurring income index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+Index on (is_recurring, next_occurrence) so the nightly recurrence job
+reads only the income templates that are due.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_incomes_is_recurring_next_occurrence', 'incomes', ['is_recurring', 'next_occurrence']),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    for name, table, columns in INDEXES:
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,96 @@
+"""expense recurrence schedule
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+Recurring expenses get the same schedule columns as incomes plus an index
+on (is_recurring, next_occurrence), so the nightly job reads only the
+expenses that are due. Existing recurring expenses are scheduled from the
+next period onwards: the old job already created a copy every night, so
+they are not caught up.
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+from dateutil.relativedelta import relativedelta
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = [
+    sa.Column('recurrence_type', sa.String(), nullable=True),
+    sa.Column('recurrence_day_option', sa.String(), nullable=True),
+    sa.Column('recurrence_custom_day', sa.Integer(), nullable=True),
+    sa.Column('recurrence_end_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('next_occurrence', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_processed', sa.DateTime(timezone=True), nullable=True),
+]
+
+INDEX = ('ix_expenses_is_recurring_next_occurrence', 'expenses', ['is_recurring', 'next_occurrence'])
+
+# frequency (stored by member name) -> (recurrence_type, step)
+PERIODS = {
+    'WEEKLY': ('weekly', relativedelta(weeks=1)),
+    'MONTHLY': ('monthly', relativedelta(months=1)),
+    'YEARLY': ('yearly', relativedelta(years=1)),
+}
+DEFAULT_PERIOD = PERIODS['MONTHLY']
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    existing = {column['name'] for column in inspector.get_columns('expenses')}
+    for column in COLUMNS:
+        if column.name not in existing:
+            op.add_column('expenses', column.copy())
+
+    name, table, columns = INDEX
+    if name not in {index['name'] for index in inspector.get_indexes(table)}:
+        op.create_index(name, table, columns)
+
+    expenses = sa.table(
+        'expenses',
+        sa.column('id', sa.Integer),
+        sa.column('frequency', sa.String),
+        sa.column('date', sa.DateTime),
+        sa.column('is_recurring', sa.Boolean),
+        sa.column('recurrence_type', sa.String),
+        sa.column('next_occurrence', sa.DateTime),
+    )
+    rows = bind.execute(
+        sa.select(expenses.c.id, expenses.c.frequency, expenses.c.date)
+        .where(expenses.c.is_recurring == sa.true(), expenses.c.next_occurrence.is_(None))
+    ).all()
+
+    now = datetime.now()
+    schedule = []
+    for row in rows:
+        recurrence_type, step = PERIODS.get(row.frequency, DEFAULT_PERIOD)
+        occurrence = row.date + step
+        while occurrence <= now:
+            occurrence += step
+        schedule.append({'row_id': row.id, 'recurrence_type': recurrence_type, 'next_occurrence': occurrence})
+
+    if schedule:
+        bind.execute(
+            expenses.update()
+            .where(expenses.c.id == sa.bindparam('row_id'))
+            .values(recurrence_type=sa.bindparam('recurrence_type'), next_occurrence=sa.bindparam('next_occurrence')),
+            schedule
+        )
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX[0], table_name=INDEX[1])
+    with op.batch_alter_table('expenses') as batch_op:
+        for column in reversed(COLUMNS):
+            batch_op.drop_column(column.name)
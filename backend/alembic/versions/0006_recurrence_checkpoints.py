@@ -0,0 +1,43 @@
+"""recurrence checkpoints
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+One row per user_id shard and day of the nightly recurrence job, so a
+rerun after a crash only processes the shards that did not finish.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('recurrence_checkpoints'):
+        op.create_table(
+            'recurrence_checkpoints',
+            sa.Column('run_date', sa.Date(), primary_key=True),
+            sa.Column('shard', sa.Integer(), primary_key=True),
+            sa.Column('user_id_from', sa.Integer(), nullable=True),
+            sa.Column('user_id_to', sa.Integer(), nullable=True),
+            sa.Column('status', sa.String(), nullable=False),
+            sa.Column('templates', sa.Integer(), nullable=False),
+            sa.Column('generated', sa.Integer(), nullable=False),
+            sa.Column('failed_templates', sa.Integer(), nullable=False),
+            sa.Column('elapsed_seconds', sa.Float(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('recurrence_checkpoints')
@@ -0,0 +1,47 @@
+"""idempotency keys for generated recurring transactions
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+Rows generated from a recurring template carry (template_id,
+occurrence_date), unique per table, and are inserted with ON CONFLICT DO
+NOTHING. Rows generated before this revision keep NULL keys: NULLs never
+conflict, so they are left as they are.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ['incomes', 'expenses']
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    for table in TABLES:
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        if 'template_id' not in existing:
+            op.add_column(table, sa.Column('template_id', sa.Integer(), nullable=True))
+        if 'occurrence_date' not in existing:
+            op.add_column(table, sa.Column('occurrence_date', sa.Date(), nullable=True))
+
+        name = f'uq_{table}_template_id_occurrence_date'
+        if name not in {index['name'] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, ['template_id', 'occurrence_date'], unique=True)
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_index(f'uq_{table}_template_id_occurrence_date', table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('occurrence_date')
+            batch_op.drop_column('template_id')
@@ -0,0 +1,38 @@
+"""scheduler leases
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+
+Every uvicorn/gunicorn worker builds the APScheduler jobs, but only the
+worker holding the lease row (renewed by heartbeat) runs them.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('scheduler_leases'):
+        op.create_table(
+            'scheduler_leases',
+            sa.Column('name', sa.String(), primary_key=True),
+            sa.Column('holder', sa.String(), nullable=True),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.Column('acquired_at', sa.DateTime(), nullable=True),
+            sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('scheduler_leases')
@@ -0,0 +1,32 @@
+"""user token version
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+
+Access tokens carry the user's token_version; bumping it (password change,
+deactivation) revokes every token issued before.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if 'token_version' not in {column['name'] for column in inspector.get_columns('users')}:
+        op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
@@ -0,0 +1,103 @@
+"""backfill monthly rollups
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+
+Databases with transactions created before monthly_rollups existed get their
+rollups built once here, instead of by every worker at startup. The backfill
+is one INSERT ... SELECT ... GROUP BY per table over the tables as they are
+at this revision, so later model changes don't alter what it does.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+monthly_rollups = sa.table(
+    'monthly_rollups',
+    sa.column('user_id', sa.Integer),
+    sa.column('year', sa.Integer),
+    sa.column('month', sa.Integer),
+    sa.column('kind', sa.String),
+    sa.column('category', sa.String),
+    sa.column('total', sa.Float),
+    sa.column('count', sa.Integer),
+)
+
+incomes = sa.table(
+    'incomes',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('amount', sa.Float),
+    sa.column('income_type', sa.String),
+    sa.column('date', sa.DateTime),
+)
+
+expenses = sa.table(
+    'expenses',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('amount', sa.Float),
+    sa.column('category', sa.String),
+    sa.column('date', sa.DateTime),
+)
+
+# Enum columns hold the member name; rollups store the public value
+INCOME_TYPES = {
+    'SALARY': 'salary', 'FREELANCE': 'freelance', 'INVESTMENT': 'investment', 'RENTAL': 'rental',
+    'BUSINESS': 'business', 'GIFT': 'gift', 'OTHER': 'other',
+}
+EXPENSE_CATEGORIES = {
+    'HOUSING': 'housing', 'UTILITIES': 'utilities', 'TRANSPORTATION': 'transportation',
+    'GROCERIES': 'groceries', 'INSURANCE': 'insurance', 'FOOD': 'food',
+    'ENTERTAINMENT': 'entertainment', 'CLOTHING': 'clothing', 'HEALTH': 'health',
+    'EDUCATION': 'education', 'PERSONAL': 'personal', 'GIFTS': 'gifts', 'TRAVEL': 'travel',
+    'SHOPPING': 'shopping', 'OTHER': 'other',
+}
+
+
+def _grouped(table, kind: str, category_column, values: dict):
+    year = sa.extract('year', table.c.date)
+    month = sa.extract('month', table.c.date)
+    category = sa.case(values, value=category_column, else_=category_column)
+    return (
+        sa.select(
+            table.c.user_id, year, month, sa.literal(kind), category,
+            sa.func.sum(table.c.amount), sa.func.count(table.c.id)
+        )
+        .group_by(table.c.user_id, year, month, category_column)
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    has_rollups = bind.execute(sa.select(monthly_rollups.c.user_id).limit(1)).first() is not None
+    has_transactions = any(
+        bind.execute(sa.select(table.c.id).limit(1)).first() is not None
+        for table in (incomes, expenses)
+    )
+    if has_rollups or not has_transactions:
+        return
+
+    columns = ['user_id', 'year', 'month', 'kind', 'category', 'total', 'count']
+    # Incomes without a type count as salary, like the app's rollups
+    income_type = sa.func.coalesce(incomes.c.income_type, 'SALARY')
+    bind.execute(monthly_rollups.insert().from_select(
+        columns, _grouped(incomes, 'income', income_type, INCOME_TYPES)
+    ))
+    bind.execute(monthly_rollups.insert().from_select(
+        columns, _grouped(expenses, 'expense', expenses.c.category, EXPENSE_CATEGORIES)
+    ))
+
+
+def downgrade() -> None:
+    # Data only: the rollups stay valid with the previous schema
+    pass
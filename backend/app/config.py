@@ -11,11 +11,25 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./finance_tracker.db"
+    DB_POOL_SIZE: int = 10  # Conexiones abiertas por proceso
+    DB_MAX_OVERFLOW: int = 20  # Conexiones extra en picos (se cierran al devolverlas)
+    DB_POOL_TIMEOUT_SECONDS: float = 30  # Espera máxima por una conexión libre
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # PostgreSQL: renovar conexiones antes de que las corte el servidor
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Espera por el bloqueo de escritura antes de "database is locked"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # Con WAL, NORMAL es seguro ante caídas del proceso
+    SQLITE_CACHE_SIZE_KB: int = 64_000  # Caché de páginas por conexión
+    SQLITE_MMAP_SIZE_MB: int = 256  # Lecturas mapeadas en memoria
     
     # Security
     SECRET_KEY: str = "your-super-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30 * 24 * 60  # 30 days
+    USER_CACHE_TTL_SECONDS: int = 60  # Usuario autenticado en memoria; los demás workers ven los cambios como mucho tras este tiempo
+    USER_CACHE_SIZE: int = 10_000  # Usuarios en la caché de cada proceso
+    TOKEN_CACHE_SIZE: int = 50_000  # Tokens ya verificados en memoria (hasta su exp) en cada proceso
+    BCRYPT_ROUNDS: int = 12  # Coste de bcrypt; al cambiarlo, las contraseñas se rehashean en el siguiente login
+    PASSWORD_HASHING_WORKERS: int = 4  # Hilos dedicados a bcrypt (login/registro), separados del threadpool de las rutas
+    PASSWORD_HASHING_QUEUE_SIZE: int = 32  # Peticiones en espera; por encima se responde 429
     
     # CORS
     BACKEND_CORS_ORIGINS: list[str] = [
@@ -32,15 +46,38 @@ class Settings(BaseSettings):
     # Market Data Settings (actualizado de yfinance a Alpha Vantage)
     ALPHA_VANTAGE_API_KEY: str = ""  # Se carga desde .env
     MARKET_DATA_CACHE_MINUTES: int = 15  # Mantener caché de 15 minutos
+    MARKET_DATA_CACHE_SIZE: int = 512  # Máximo de cotizaciones en memoria
+    MARKET_DATA_NEGATIVE_CACHE_SECONDS: int = 60  # Errores y avisos de límite se recuerdan poco tiempo
     MARKET_DATA_RATE_LIMIT_SECONDS: int = 12  # Alpha Vantage: 5 llamadas por minuto
+    MARKET_DATA_BURST: int = 5  # Llamadas que se pueden hacer seguidas antes de esperar
+    MARKET_DATA_MAX_WORKERS: int = 4  # Conexiones simultáneas al proveedor
+    MARKET_DATA_MAX_WAIT_SECONDS: float = 15  # Espera máxima por turno; si no, se mantiene el último precio
+    MARKET_DATA_TIMEOUT_SECONDS: float = 10  # Tiempo máximo por petición HTTP
+    MARKET_DATA_MAX_RETRIES: int = 2  # Reintentos cuando Alpha Vantage responde con aviso de límite
+    MARKET_DATA_RETRY_BACKOFF_SECONDS: float = 2  # Espera base entre reintentos (exponencial con jitter)
+    ALPHA_VANTAGE_BASE_URL: str = "https://www.alphavantage.co/query"
     
     # File paths
     BASE_DIR: Path = Path(__file__).resolve().parent.parent
     UPLOAD_DIR: Path = BASE_DIR / "uploads"
     
+    # Statement import
+    IMPORT_MAX_UPLOAD_MB: int = 50  # Tamaño máximo del fichero subido
+    IMPORT_CHUNK_SIZE: int = 50_000  # Filas por lote (una transacción por lote)
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000  # Errores por fila devueltos en la respuesta
+    
+    # Recurring transactions
+    RECURRENCE_CHUNK_SIZE: int = 5000  # Plantillas por transacción (las de un usuario van siempre juntas)
+    RECURRENCE_SHARDS: int = 8  # Rangos de user_id en los que se reparte el procesamiento nocturno
+    RECURRENCE_WORKERS: int = 4  # Procesos en paralelo (1 = todo en el proceso del scheduler)
+    
     # Optional: Scheduled tasks
     ENABLE_SCHEDULED_TASKS: bool = False  # Activar si quieres tareas programadas
     UPDATE_PRICES_SCHEDULE_HOURS: int = 4  # Actualizar precios cada 4 horas
+    PRICE_REFRESH_MAX_SYMBOLS: int = 25  # Símbolos pedidos al proveedor por ejecución (cuota diaria)
+    PRICE_STALE_HOURS: int = 8  # A partir de aquí el precio guardado se marca como desactualizado
+    SCHEDULER_LEASE_SECONDS: int = 60  # Si el líder deja de renovar la lease, otro worker la toma pasado este tiempo
+    SCHEDULER_HEARTBEAT_SECONDS: int = 15  # Cada cuánto renueva el líder (y lo intentan los demás)
     
     class Config:
         env_file = ".env"
@@ -1,24 +1,115 @@
-from sqlalchemy import create_engine
+from typing import Any, AsyncIterator, Dict
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 from app.config import settings
 
+def _is_memory_sqlite(url) -> bool:
+    return url.database in (None, "", ":memory:") or "mode=memory" in str(url)
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """create_engine() keyword arguments for `database_url` (SQLite or PostgreSQL)"""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        options: Dict[str, Any] = {
+            # Needed for SQLite; the driver's own lock wait matches busy_timeout
+            "connect_args": {"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+        }
+        if _is_memory_sqlite(url):
+            # Every connection to :memory: is a new empty database: share a single one
+            options["poolclass"] = StaticPool
+        else:
+            options.update(
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS
+            )
+        return options
+
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        # Connections dropped by the server or a proxy are replaced before use
+        "pool_pre_ping": True
+    }
+
+def configure_sqlite_connection(dbapi_connection, connection_record=None):
+    """
+    PRAGMAs applied to every new SQLite connection: WAL lets readers run
+    while a writer commits, busy_timeout makes writers wait for the lock
+    instead of failing with "database is locked", and synchronous=NORMAL is
+    durable under WAL except for the last commits on power loss.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        # Negative cache_size is in KiB
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE_MB) * 1024 * 1024}")
+    finally:
+        cursor.close()
+
+def build_engine(database_url: str) -> Engine:
+    """Engine with the pool and, for SQLite, the per-connection PRAGMAs"""
+    db_engine = create_engine(database_url, **engine_options(database_url))
+    if db_engine.dialect.name == "sqlite":
+        event.listen(db_engine, "connect", configure_sqlite_connection)
+    return db_engine
+
+def async_database_url(database_url: str) -> str:
+    """`database_url` with its async driver: aiosqlite for SQLite, asyncpg for PostgreSQL"""
+    url = make_url(database_url)
+    drivers = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+    backend = url.get_backend_name()
+    return url.set(drivername=drivers.get(backend, url.drivername)).render_as_string(hide_password=False)
+
+def build_async_engine(database_url: str) -> AsyncEngine:
+    """Async engine with the same pool sizing and SQLite PRAGMAs as build_engine"""
+    options = engine_options(database_url)
+    if "pool_size" in options:
+        options["poolclass"] = AsyncAdaptedQueuePool
+    db_engine = create_async_engine(async_database_url(database_url), **options)
+    if db_engine.dialect.name == "sqlite":
+        event.listen(db_engine.sync_engine, "connect", configure_sqlite_connection)
+    return db_engine
+
 # Create engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+engine = build_engine(settings.DATABASE_URL)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and sessions for the async routes; loaded rows stay usable after commit
+async_engine = build_async_engine(settings.DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class
 Base = declarative_base()
 
+def dialect_insert(db: Session, table):
+    """INSERT into `table` with the ON CONFLICT support of the session's dialect (PostgreSQL or SQLite)"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async DB session
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,38 +1,33 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.database import engine, Base
-from app.routers import auth, users, incomes, expenses, goals, investments, dashboard, budgets
-from apscheduler.schedulers.background import BackgroundScheduler
-from app.services.recurrence_processor import run_daily_processing
+from app.routers import auth, users, incomes, expenses, goals, investments, dashboard, budgets, export, imports
+from app.services.scheduler import scheduler_coordinator
+from app.services.market_data import quote_cache_stats
+from app.services.market_client import market_client
+from app.utils.cache import user_cache, token_cache
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 
+# Scheduled jobs run only in the worker holding the scheduler lease
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scheduler_coordinator.start()
+    yield
+    scheduler_coordinator.stop()
+    market_client.close()
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
-)
-
-# Configurar scheduler
-scheduler = BackgroundScheduler()
-scheduler.add_job(
-    func=run_daily_processing,
-    trigger="cron",
-    hour=0,
-    minute=1,
-    id="process_recurring_transactions",
-    name="Process recurring transactions",
-    replace_existing=True
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
-scheduler.start()
-
-# En el shutdown
-@app.on_event("shutdown")
-def shutdown_event():
-    scheduler.shutdown()
 
 # Create all tables
 Base.metadata.create_all(bind=engine)
@@ -44,6 +39,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers
@@ -55,6 +51,8 @@ app.include_router(goals.router, prefix=settings.API_V1_STR)
 app.include_router(investments.router, prefix=settings.API_V1_STR)
 app.include_router(dashboard.router, prefix=settings.API_V1_STR)
 app.include_router(budgets.router, prefix=settings.API_V1_STR)
+app.include_router(export.router, prefix=settings.API_V1_STR)
+app.include_router(imports.router, prefix=settings.API_V1_STR)
 
 # Root endpoint
 @app.get("/")
@@ -72,7 +70,11 @@ def read_root():
 def health_check():
     return {
         "status": "healthy",
-        "version": settings.APP_VERSION
+        "version": settings.APP_VERSION,
+        "quote_cache": quote_cache_stats(),
+        "user_cache": user_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "scheduler": scheduler_coordinator.status()
     }
 
 # API info endpoint
@@ -91,7 +93,9 @@ def api_info():
             "expenses": f"{settings.API_V1_STR}/expenses",
             "goals": f"{settings.API_V1_STR}/goals",
             "investments": f"{settings.API_V1_STR}/investments",
-            "dashboard": f"{settings.API_V1_STR}/dashboard"
+            "dashboard": f"{settings.API_V1_STR}/dashboard",
+            "export": f"{settings.API_V1_STR}/export/transactions",
+            "import": f"{settings.API_V1_STR}/import/transactions"
         },
         "features": [
             "JWT Authentication",
@@ -100,6 +104,8 @@ def api_info():
             "Savings goals with progress tracking",
             "Investment portfolio with real-time prices",
             "Comprehensive dashboard with analytics",
-            "Multi-user support"
+            "Multi-user support",
+            "Streaming NDJSON/CSV export",
+            "Bank statement import (CSV/OFX)"
         ]
     }
\ No newline at end of file
@@ -5,6 +5,10 @@ from app.models.expense import Expense, ExpenseCategory, ExpenseFrequency
 from app.models.goal import Goal, GoalStatus, GoalPriority
 from app.models.investment import Investment, InvestmentType, InvestmentStatus
 from app.models.budget import Budget, BudgetCategory, BudgetPeriod
+from app.models.monthly_rollup import MonthlyRollup
+from app.models.price_quote import PriceQuote
+from app.models.recurrence_checkpoint import RecurrenceCheckpoint
+from app.models.scheduler_lease import SchedulerLease
 
 # This ensures all models are imported when the models package is imported
 __all__ = [
@@ -13,5 +17,9 @@ __all__ = [
     "Expense", "ExpenseCategory", "ExpenseFrequency",
     "Goal", "GoalStatus", "GoalPriority",
     "Investment", "InvestmentType", "InvestmentStatus",
-    "Budget", "BudgetCategory", "BudgetPeriod"
+    "Budget", "BudgetCategory", "BudgetPeriod",
+    "MonthlyRollup",
+    "PriceQuote",
+    "RecurrenceCheckpoint",
+    "SchedulerLease"
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Enum, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -43,10 +43,29 @@ class Expense(Base):
     vendor = Column(String, nullable=True)  # Nombre del comercio
     frequency = Column(Enum(ExpenseFrequency), default=ExpenseFrequency.ONE_TIME)
     is_recurring = Column(Boolean, default=False)
+    recurrence_type = Column(String, nullable=True)  # daily, weekly, monthly, yearly
+    recurrence_day_option = Column(String, nullable=True)  # first_day, last_day, salary_day, custom
+    recurrence_custom_day = Column(Integer, nullable=True)  # 1-31
+    recurrence_end_date = Column(DateTime(timezone=True), nullable=True)
+    next_occurrence = Column(DateTime(timezone=True), nullable=True)
+    last_processed = Column(DateTime(timezone=True), nullable=True)
+    template_id = Column(Integer, nullable=True)  # Plantilla recurrente que generó esta fila
+    occurrence_date = Column(Date, nullable=True)  # Ocurrencia de la plantilla que representa
     date = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # Composite indexes for per-user date range filters and listings
+    __table_args__ = (
+        Index("ix_expenses_user_id_date", user_id, date.desc()),
+        Index("ix_expenses_user_id_category_date", user_id, category, date),
+        Index("ix_expenses_user_id_budget_id_date", user_id, budget_id, date),
+        # Due recurring templates for the nightly job
+        Index("ix_expenses_is_recurring_next_occurrence", is_recurring, next_occurrence),
+        # One generated row per template occurrence, however often the job runs
+        Index("uq_expenses_template_id_occurrence_date", template_id, occurrence_date, unique=True),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="expenses")
     budget = relationship("Budget", back_populates="expenses")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -41,5 +41,10 @@ class Goal(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
     
+    # Composite index matching the listing order, for keyset pagination
+    __table_args__ = (
+        Index("ix_goals_user_id_priority_target_date", user_id, priority.desc(), target_date),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="goals")
\ No newline at end of file
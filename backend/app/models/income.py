@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -32,6 +32,18 @@ class Income(Base):
     recurrence_end_date = Column(DateTime(timezone=True), nullable=True)
     next_occurrence = Column(DateTime(timezone=True), nullable=True)
     last_processed = Column(DateTime(timezone=True), nullable=True)
+    template_id = Column(Integer, nullable=True)  # Plantilla recurrente que generó esta fila
+    occurrence_date = Column(Date, nullable=True)  # Ocurrencia de la plantilla que representa
+    
+    # Composite indexes for per-user date range filters and listings
+    __table_args__ = (
+        Index("ix_incomes_user_id_date", user_id, date.desc()),
+        Index("ix_incomes_user_id_income_type_date", user_id, income_type, date),
+        # Due recurring templates for the nightly job
+        Index("ix_incomes_is_recurring_next_occurrence", is_recurring, next_occurrence),
+        # One generated row per template occurrence, however often the job runs
+        Index("uq_incomes_template_id_occurrence_date", template_id, occurrence_date, unique=True),
+    )
     
     # Relationships
     user = relationship("User", back_populates="incomes")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -60,5 +60,10 @@ class Investment(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # Composite index matching the listing order, for keyset pagination
+    __table_args__ = (
+        Index("ix_investments_user_id_purchase_date", user_id, purchase_date.desc()),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="investments")
\ No newline at end of file
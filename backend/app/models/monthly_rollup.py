@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+class MonthlyRollup(Base):
+    """Totales mensuales por usuario, tipo (income/expense) y categoría"""
+    __tablename__ = "monthly_rollups"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    kind = Column(String, primary_key=True)      # "income" o "expense"
+    category = Column(String, primary_key=True)  # IncomeType / ExpenseCategory value
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+    
+    # Relationships
+    user = relationship("User", back_populates="monthly_rollups")
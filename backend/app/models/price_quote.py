@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from app.database import Base
+
+class PriceQuote(Base):
+    """Última cotización conocida de cada símbolo, compartida por todos los workers"""
+    __tablename__ = "price_quotes"
+    
+    symbol = Column(String, primary_key=True)
+    price = Column(Float, nullable=False)
+    change = Column(Float, nullable=True)
+    change_percent = Column(String, nullable=True)
+    volume = Column(Integer, nullable=True)
+    previous_close = Column(Float, nullable=True)
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
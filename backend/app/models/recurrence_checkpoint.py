@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime
+from app.database import Base
+
+class RecurrenceCheckpoint(Base):
+    """Estado de cada shard (rango de user_id) del procesamiento nocturno de un día"""
+    __tablename__ = "recurrence_checkpoints"
+    
+    run_date = Column(Date, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    user_id_from = Column(Integer, nullable=True)  # Incluido; None = sin límite inferior
+    user_id_to = Column(Integer, nullable=True)    # Excluido; None = sin límite superior
+    status = Column(String, nullable=False, default="pending")  # pending, done, failed
+    templates = Column(Integer, nullable=False, default=0)
+    generated = Column(Integer, nullable=False, default=0)
+    failed_templates = Column(Integer, nullable=False, default=0)
+    elapsed_seconds = Column(Float, nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
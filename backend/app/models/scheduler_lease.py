@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+
+class SchedulerLease(Base):
+    """Lease del scheduler: solo el proceso que la tiene ejecuta las tareas programadas"""
+    __tablename__ = "scheduler_leases"
+    
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=True)  # host:pid:id del proceso líder
+    expires_at = Column(DateTime, nullable=False)  # UTC; otro proceso puede tomarla a partir de aquí
+    acquired_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
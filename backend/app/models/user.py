@@ -13,6 +13,7 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # Al incrementarlo se invalidan los tokens emitidos
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -21,4 +22,5 @@ class User(Base):
     expenses = relationship("Expense", back_populates="user", cascade="all, delete-orphan")
     goals = relationship("Goal", back_populates="user", cascade="all, delete-orphan")
     investments = relationship("Investment", back_populates="user", cascade="all, delete-orphan")
-    budgets = relationship("Budget", back_populates="user", cascade="all, delete-orphan")
\ No newline at end of file
+    budgets = relationship("Budget", back_populates="user", cascade="all, delete-orphan")
+    monthly_rollups = relationship("MonthlyRollup", back_populates="user", cascade="all, delete-orphan")
\ No newline at end of file
@@ -1,5 +1,5 @@
 # Import all routers
-from . import auth, users, incomes, expenses, goals, investments, dashboard, budgets
+from . import auth, users, incomes, expenses, goals, investments, dashboard, budgets, export, imports
 
 # This makes all routers available when importing from app.routers
 __all__ = [
@@ -10,5 +10,7 @@ __all__ = [
     "goals",
     "investments",
     "dashboard",
-    "budgets"
+    "budgets",
+    "export",
+    "imports"
 ]
\ No newline at end of file
@@ -1,15 +1,16 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas.user import Token, User as UserSchema, UserCreate
 from app.utils.auth import (
-    authenticate_user,
-    create_access_token,
-    get_password_hash,
+    authenticate_user_async,
+    create_user_access_token,
+    get_password_hash_async,
     get_current_active_user
 )
 
@@ -19,17 +20,17 @@ router = APIRouter(
 )
 
 @router.post("/register", response_model=UserSchema)
-def register(
+async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register a new user
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(
-        (User.email == user_data.email) | (User.username == user_data.username)
-    ).first()
+    existing_user = (await db.execute(
+        select(User).where((User.email == user_data.email) | (User.username == user_data.username))
+    )).scalars().first()
     
     if existing_user:
         if existing_user.email == user_data.email:
@@ -43,31 +44,34 @@ def register(
                 detail="El nombre de usuario ya está en uso"
             )
     
+    # Give the connection back to the pool while bcrypt runs
+    await db.close()
+    
     # Create new user
     db_user = User(
         email=user_data.email,
         username=user_data.username,
         full_name=user_data.full_name,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         is_active=user_data.is_active,
         is_superuser=user_data.is_superuser
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Login with username/email and password
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     
     if not user:
         raise HTTPException(
@@ -84,9 +88,7 @@ def login(
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
+    access_token = create_user_access_token(user, expires_delta=access_token_expires)
     
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
-from app.models import Budget, User, Expense
+from app.models import Budget, User
 from app.schemas.budget import BudgetCreate, BudgetUpdate, BudgetResponse
 from app.utils.auth import get_current_active_user
+from app.services.budget_engine import evaluate_budgets
 
 router = APIRouter(
     prefix="/budgets",
@@ -16,30 +17,8 @@ def get_budgets(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all budgets for current user"""
-    budgets = db.query(Budget).filter(Budget.user_id == current_user.id).all()
-    
-    # Calcular gastos actuales para cada presupuesto
-    for budget in budgets:
-        # Obtener gastos del período actual
-        expenses = db.query(Expense).filter(
-            Expense.user_id == current_user.id,
-            Expense.budget_id == budget.id,
-            # Filtrar por período actual según budget.period
-        ).all()
-        
-        budget.current_spent = sum(e.amount for e in expenses)
-        budget.available = budget.amount + budget.rollover_amount - budget.current_spent
-        budget.percentage_used = (budget.current_spent / (budget.amount + budget.rollover_amount)) * 100 if budget.amount > 0 else 0
-        
-        if budget.percentage_used >= 100:
-            budget.status = 'over'
-        elif budget.percentage_used >= budget.alert_percentage:
-            budget.status = 'warning'
-        else:
-            budget.status = 'under'
-    
-    return budgets
+    """Get all budgets for current user with the spend of their current period"""
+    return evaluate_budgets(db, current_user.id)
 
 @router.post("/", response_model=BudgetResponse)
 def create_budget(
@@ -51,8 +30,7 @@ def create_budget(
     db_budget = Budget(**budget.dict(), user_id=current_user.id)
     db.add(db_budget)
     db.commit()
-    db.refresh(db_budget)
-    return db_budget
+    return evaluate_budgets(db, current_user.id, [db_budget.id])[0]
 
 @router.put("/{budget_id}", response_model=BudgetResponse)
 def update_budget(
@@ -74,8 +52,7 @@ def update_budget(
         setattr(db_budget, key, value)
     
     db.commit()
-    db.refresh(db_budget)
-    return db_budget
+    return evaluate_budgets(db, current_user.id, [db_budget.id])[0]
 
 @router.delete("/{budget_id}")
 def delete_budget(
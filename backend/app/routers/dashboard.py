@@ -3,8 +3,10 @@ from datetime import datetime, date, timedelta
 from calendar import monthrange
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import extract, func, and_, or_
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, or_
+from app.config import settings
+from app.database import get_async_db
 from app.models.user import User
 from app.models.income import Income, IncomeType
 from app.models.expense import Expense, ExpenseCategory
@@ -24,9 +26,18 @@ from app.utils.auth import get_current_active_user
 from app.services.market_data import (
     get_current_price,
     get_quote,
-    update_investment_prices,
-    calculate_portfolio_metrics
+    update_investment_quotes_async,
+    calculate_portfolio_metrics,
+    price_freshness
 )
+from app.services.dashboard_aggregates import (
+    fetch_transaction_totals,
+    summarize_transactions,
+    fetch_goal_totals,
+    fetch_upcoming_goal,
+    fetch_recent_transactions
+)
+from app.services.rollups import fetch_rollups, INCOME
 import logging
 
 logger = logging.getLogger(__name__)
@@ -36,17 +47,14 @@ router = APIRouter(
     tags=["Dashboard"]
 )
 
-@router.get("/", response_model=DashboardData)
-def get_dashboard_data(
-    year: Optional[int] = None,
-    month: Optional[int] = None,
-    update_prices: bool = Query(True, description="Update investment prices"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    """
-    Get comprehensive dashboard data for the user
-    """
+def _active_investments(db: Session, user_id: int):
+    return db.query(Investment).filter(
+        Investment.user_id == user_id,
+        Investment.status == InvestmentStatus.ACTIVE
+    ).all()
+
+def _dashboard_data(db: Session, user_id: int, year: Optional[int], month: Optional[int]) -> DashboardData:
+    """Dashboard for the user from stored prices (the route refreshes them first if asked)"""
     # Set default to current year/month if not provided
     now = datetime.now()
     if not year:
@@ -56,15 +64,14 @@ def get_dashboard_data(
     
     # Calculate date ranges
     first_day = date(year, month, 1)
-    last_day = date(year, month, monthrange(year, month)[1])
     
-    # Get all time data for totals
-    all_incomes = db.query(Income).filter(Income.user_id == current_user.id).all()
-    all_expenses = db.query(Expense).filter(Expense.user_id == current_user.id).all()
+    # Totals, monthly overview, cash flow and breakdowns from one grouped query
+    transaction_rows = fetch_transaction_totals(db, user_id)
+    totals = summarize_transactions(transaction_rows, year, month)
     
     # Calculate total income and expenses
-    total_income = sum(income.amount for income in all_incomes)
-    total_expenses = sum(expense.amount for expense in all_expenses)
+    total_income = totals['total_income']
+    total_expenses = totals['total_expenses']
     net_balance = total_income - total_expenses
     savings_rate = ((total_income - total_expenses) / total_income * 100) if total_income > 0 else 0
     
@@ -77,20 +84,8 @@ def get_dashboard_data(
     )
     
     # Monthly Overview
-    monthly_incomes = db.query(Income).filter(
-        Income.user_id == current_user.id,
-        Income.date >= first_day,
-        Income.date <= last_day
-    ).all()
-    
-    monthly_expenses = db.query(Expense).filter(
-        Expense.user_id == current_user.id,
-        Expense.date >= first_day,
-        Expense.date <= last_day
-    ).all()
-    
-    monthly_income_total = sum(income.amount for income in monthly_incomes)
-    monthly_expense_total = sum(expense.amount for expense in monthly_expenses)
+    monthly_income_total = totals['monthly_income']
+    monthly_expense_total = totals['monthly_expenses']
     
     monthly_overview = MonthlyOverview(
         month=first_day.strftime("%B"),
@@ -101,105 +96,46 @@ def get_dashboard_data(
     )
     
     # Cash Flow (last 6 months)
-    cash_flow = []
-    cumulative_balance = 0
-    
-    for i in range(5, -1, -1):
-        # Calculate month
-        flow_date = date(year, month, 1) - timedelta(days=i * 30)
-        flow_year = flow_date.year
-        flow_month = flow_date.month
-        
-        # Get income and expenses for this month
-        month_income = db.query(func.sum(Income.amount)).filter(
-            Income.user_id == current_user.id,
-            extract('year', Income.date) == flow_year,
-            extract('month', Income.date) == flow_month
-        ).scalar() or 0
-        
-        month_expense = db.query(func.sum(Expense.amount)).filter(
-            Expense.user_id == current_user.id,
-            extract('year', Expense.date) == flow_year,
-            extract('month', Expense.date) == flow_month
-        ).scalar() or 0
-        
-        net_flow = month_income - month_expense
-        cumulative_balance += net_flow
-        
-        cash_flow.append(CashFlow(
-            date=f"{flow_year}-{flow_month:02d}",
-            income=float(month_income),
-            expenses=float(month_expense),
-            net_flow=net_flow,
-            cumulative_balance=cumulative_balance
-        ))
+    cash_flow = [CashFlow(**flow) for flow in totals['cash_flow']]
     
     # Income by Type
-    income_by_type_data = db.query(
-        Income.income_type,
-        func.sum(Income.amount).label('total'),
-        func.count(Income.id).label('count')
-    ).filter(
-        Income.user_id == current_user.id
-    ).group_by(Income.income_type).all()
-    
     income_by_type = [
         CategoryBreakdown(
-            category=row.income_type.value,
-            amount=float(row.total),
-            percentage=round((row.total / total_income * 100), 2) if total_income > 0 else 0,
-            count=row.count
+            category=category,
+            amount=data['amount'],
+            percentage=round((data['amount'] / total_income * 100), 2) if total_income > 0 else 0,
+            count=data['count']
         )
-        for row in income_by_type_data
+        for category, data in totals['income_by_type'].items()
     ]
     
     # Expenses by Category
-    expense_by_category_data = db.query(
-        Expense.category,
-        func.sum(Expense.amount).label('total'),
-        func.count(Expense.id).label('count')
-    ).filter(
-        Expense.user_id == current_user.id
-    ).group_by(Expense.category).all()
-    
     expenses_by_category = [
         CategoryBreakdown(
-            category=row.category.value,
-            amount=float(row.total),
-            percentage=round((row.total / total_expenses * 100), 2) if total_expenses > 0 else 0,
-            count=row.count
+            category=category,
+            amount=data['amount'],
+            percentage=round((data['amount'] / total_expenses * 100), 2) if total_expenses > 0 else 0,
+            count=data['count']
         )
-        for row in expense_by_category_data
+        for category, data in totals['expenses_by_category'].items()
     ]
     
     # Goals Summary
-    goals = db.query(Goal).filter(Goal.user_id == current_user.id).all()
-    active_goals = [g for g in goals if g.status == GoalStatus.ACTIVE]
-    completed_goals = [g for g in goals if g.status == GoalStatus.COMPLETED]
-    
-    total_target = sum(g.target_amount for g in goals) if goals else 0
-    total_saved = sum(g.current_amount for g in goals) if goals else 0
+    goal_totals = fetch_goal_totals(db, user_id)
+    total_target = goal_totals['total_target']
+    total_saved = goal_totals['total_saved']
     
     goals_summary = GoalsSummary(
-        total_goals=len(goals),
-        active_goals=len(active_goals),
-        completed_goals=len(completed_goals),
+        total_goals=goal_totals['total_goals'],
+        active_goals=goal_totals['active_goals'],
+        completed_goals=goal_totals['completed_goals'],
         total_target_amount=total_target,
         total_saved_amount=total_saved,
         overall_progress=round((total_saved / total_target * 100), 2) if total_target > 0 else 0
     )
     
     # Investments Summary
-    investments = db.query(Investment).filter(
-        Investment.user_id == current_user.id,
-        Investment.status == InvestmentStatus.ACTIVE
-    ).all()
-    
-    # Update prices using Alpha Vantage if requested
-    if investments and update_prices:
-        logger.info(f"Updating prices for {len(investments)} investments")
-        investments = update_investment_prices(investments)
-        db.commit()
+    investments = _active_investments(db, user_id)
     
     if investments:
         portfolio_metrics = calculate_portfolio_metrics(investments)
@@ -237,7 +173,8 @@ def get_dashboard_data(
             total_return=portfolio_metrics['profit_loss'],
             return_percentage=portfolio_metrics['profit_loss_percentage'],
             best_performer=best_performer,
-            worst_performer=worst_performer
+            worst_performer=worst_performer,
+            **price_freshness(investments)
         )
     else:
         investments_summary = InvestmentsSummary(
@@ -249,40 +186,11 @@ def get_dashboard_data(
             worst_performer=None
         )
     
-    # Recent Transactions
-    recent_incomes = db.query(Income).filter(
-        Income.user_id == current_user.id
-    ).order_by(Income.date.desc()).limit(5).all()
-    
-    recent_expenses = db.query(Expense).filter(
-        Expense.user_id == current_user.id
-    ).order_by(Expense.date.desc()).limit(5).all()
-    
-    recent_transactions = []
-    
-    for income in recent_incomes:
-        recent_transactions.append(RecentTransaction(
-            id=income.id,
-            type="income",
-            amount=income.amount,
-            description=income.source,
-            category=income.income_type.value,
-            date=income.date
-        ))
-    
-    for expense in recent_expenses:
-        recent_transactions.append(RecentTransaction(
-            id=expense.id,
-            type="expense",
-            amount=expense.amount,
-            description=expense.description or expense.vendor or expense.category.value,
-            category=expense.category.value,
-            date=expense.date
-        ))
-    
-    # Sort by date and get top 10
-    recent_transactions.sort(key=lambda x: x.date, reverse=True)
-    recent_transactions = recent_transactions[:10]
+    # Recent Transactions (top 5 of each kind merged by date)
+    recent_transactions = [
+        RecentTransaction(**transaction)
+        for transaction in fetch_recent_transactions(db, user_id)
+    ]
     
     # Calculate additional metrics
     days_in_month = monthrange(year, month)[1]
@@ -318,23 +226,18 @@ def get_dashboard_data(
             break  # Only show one category alert
     
     # Check for upcoming goals
-    upcoming_goals = db.query(Goal).filter(
-        Goal.user_id == current_user.id,
-        Goal.status == GoalStatus.ACTIVE,
-        Goal.target_date <= datetime.now() + timedelta(days=30)
-    ).all()
+    goal = fetch_upcoming_goal(db, user_id, datetime.now(), datetime.now() + timedelta(days=30))
     
-    for goal in upcoming_goals[:1]:  # Only show first upcoming goal
-        days_left = (goal.target_date - datetime.now()).days
+    if goal:  # Only show first upcoming goal
+        days_left = (goal['target_date'] - datetime.now()).days
         if days_left >= 0:
-            progress = (goal.current_amount / goal.target_amount * 100) if goal.target_amount > 0 else 0
+            progress = (goal['current_amount'] / goal['target_amount'] * 100) if goal['target_amount'] > 0 else 0
             if progress < 80:
                 alerts.append({
                     "type": "warning",
-                    "title": f"Objetivo próximo: {goal.name}",
+                    "title": f"Objetivo próximo: {goal['name']}",
                     "message": f"Faltan {days_left} días y has alcanzado el {round(progress, 1)}% de tu meta"
                 })
-                break
     
     # Investment alerts
     if investments_summary.return_percentage < -10:
@@ -376,40 +279,50 @@ def get_dashboard_data(
         alerts=alerts
     )
 
-@router.get("/quick-stats")
-def get_quick_stats(
-    db: Session = Depends(get_db),
+@router.get("/", response_model=DashboardData)
+async def get_dashboard_data(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    update_prices: bool = Query(not settings.ENABLE_SCHEDULED_TASKS, description="Update investment prices"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Get quick statistics for header/widgets
+    Get comprehensive dashboard data for the user. Prices are updated with
+    the async market client and the rest is read on the async session, so
+    the worker keeps serving while both are in flight.
     """
+    if update_prices:
+        investments = await db.run_sync(_active_investments, current_user.id)
+        if investments:
+            logger.info(f"Updating prices for {len(investments)} investments")
+            await update_investment_quotes_async(investments)
+            await db.commit()
+    
+    return await db.run_sync(_dashboard_data, current_user.id, year, month)
+
+def _quick_stats(db: Session, user_id: int):
+    """Quick statistics for header/widgets"""
     # Current month
     now = datetime.now()
-    first_day = date(now.year, now.month, 1)
     
-    # This month's balance
-    month_income = db.query(func.sum(Income.amount)).filter(
-        Income.user_id == current_user.id,
-        Income.date >= first_day
-    ).scalar() or 0
-    
-    month_expense = db.query(func.sum(Expense.amount)).filter(
-        Expense.user_id == current_user.id,
-        Expense.date >= first_day
-    ).scalar() or 0
+    # This month's balance (from the monthly rollups)
+    month_income = 0
+    month_expense = 0
+    for row in fetch_rollups(db, user_id, year=now.year, month=now.month):
+        if row.kind == INCOME:
+            month_income += row.total
+        else:
+            month_expense += row.total
     
     # Active goals count
     active_goals = db.query(func.count(Goal.id)).filter(
-        Goal.user_id == current_user.id,
+        Goal.user_id == user_id,
         Goal.status == GoalStatus.ACTIVE
     ).scalar() or 0
     
     # Investment value (with cached prices)
-    investments = db.query(Investment).filter(
-        Investment.user_id == current_user.id,
-        Investment.status == InvestmentStatus.ACTIVE
-    ).all()
+    investments = _active_investments(db, user_id)
     
     portfolio_value = sum(inv.current_value or 0 for inv in investments)
     
@@ -418,4 +331,14 @@ def get_quick_stats(
         "active_goals_count": active_goals,
         "portfolio_value": float(portfolio_value),
         "month_name": now.strftime("%B %Y")
-    }
\ No newline at end of file
+    }
+
+@router.get("/quick-stats")
+async def get_quick_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get quick statistics for header/widgets (read on the async session)
+    """
+    return await db.run_sync(_quick_stats, current_user.id)
@@ -1,9 +1,10 @@
 from typing import List, Optional
 from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import extract, func, and_
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, case
+from app.database import get_db, get_async_db
 from app.models.user import User
 from app.models.expense import Expense, ExpenseCategory, ExpenseFrequency
 from app.schemas.expense import (
@@ -12,30 +13,37 @@ from app.schemas.expense import (
     ExpenseUpdate,
     ExpenseStats
 )
+from app.schemas.batch import BatchRequest, BatchResult
 from app.utils.auth import get_current_active_user
+from app.utils.dates import period_range, day_range, apply_range
+from app.utils.pagination import paginate, set_next_cursor
+from app.services.rollups import track_expense, fetch_rollups, EXPENSE
+from app.services.batch_edit import apply_expense_batch
+from app.services.recurrence_processor import reschedule_expense
 
 router = APIRouter(
     prefix="/expenses",
     tags=["Expenses"]
 )
 
-@router.get("/", response_model=List[ExpenseSchema])
-def get_expenses(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    category: Optional[ExpenseCategory] = None,
-    frequency: Optional[ExpenseFrequency] = None,
-    is_recurring: Optional[bool] = None,
-    start_date: Optional[date] = None,
-    end_date: Optional[date] = None,
-    vendor: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+# Newest first; id breaks ties in the order of the (user_id, date DESC) index
+EXPENSE_ORDER = ((Expense.date, True), (Expense.id, False))
+
+def _expenses_page(
+    db: Session,
+    user_id: int,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    category: Optional[ExpenseCategory],
+    frequency: Optional[ExpenseFrequency],
+    is_recurring: Optional[bool],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    vendor: Optional[str]
 ):
-    """
-    Get all expenses for current user with optional filters
-    """
-    query = db.query(Expense).filter(Expense.user_id == current_user.id)
+    """One page of the user's expenses and the cursor of the next one"""
+    query = db.query(Expense).filter(Expense.user_id == user_id)
     
     # Apply filters
     if category:
@@ -47,17 +55,39 @@ def get_expenses(
     if is_recurring is not None:
         query = query.filter(Expense.is_recurring == is_recurring)
     
-    if start_date:
-        query = query.filter(Expense.date >= start_date)
-    
-    if end_date:
-        query = query.filter(Expense.date <= end_date)
+    # Whole days, as a half-open range on the indexed date column
+    query = apply_range(query, Expense.date, *day_range(start_date, end_date))
     
     if vendor:
         query = query.filter(Expense.vendor.ilike(f"%{vendor}%"))
     
-    # Order by date descending
-    expenses = query.order_by(Expense.date.desc()).offset(skip).limit(limit).all()
+    # Order by date descending, one page at a time
+    return paginate(query, EXPENSE_ORDER, limit, skip=skip, cursor=cursor)
+
+@router.get("/", response_model=List[ExpenseSchema])
+async def get_expenses(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Next page cursor from the X-Next-Cursor header (replaces skip)"),
+    category: Optional[ExpenseCategory] = None,
+    frequency: Optional[ExpenseFrequency] = None,
+    is_recurring: Optional[bool] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    vendor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get all expenses for current user with optional filters (read on the
+    async session, so the worker keeps serving while the query runs)
+    """
+    expenses, next_cursor = await db.run_sync(
+        _expenses_page, current_user.id, skip, limit, cursor, category, frequency,
+        is_recurring, start_date, end_date, vendor
+    )
+    set_next_cursor(response, next_cursor)
     
     return expenses
 
@@ -71,17 +101,14 @@ def get_expense_stats(
     """
     Get expense statistics for current user
     """
-    query = db.query(Expense).filter(Expense.user_id == current_user.id)
-    
-    # Apply date filters
-    if year:
-        query = query.filter(extract('year', Expense.date) == year)
-    if month:
-        query = query.filter(extract('month', Expense.date) == month)
+    start, end = period_range(year, month)
+    if start:
+        year = start.year
     
-    expenses = query.all()
+    rollups = fetch_rollups(db, current_user.id, kind=EXPENSE, year=year)
+    period_rollups = [row for row in rollups if not month or row.month == month]
     
-    if not expenses:
+    if not period_rollups:
         return ExpenseStats(
             total_expenses=0,
             monthly_average=0,
@@ -94,38 +121,25 @@ def get_expense_stats(
         )
     
     # Calculate statistics
-    total_expenses = sum(expense.amount for expense in expenses)
+    total_expenses = sum(row.total for row in period_rollups)
     
     # Expenses by category
     expenses_by_category = {}
-    for expense in expenses:
-        category_key = expense.category.value
-        expenses_by_category[category_key] = expenses_by_category.get(category_key, 0) + expense.amount
-    
-    # Monthly expenses
-    monthly_query = (
-        db.query(
-            extract('year', Expense.date).label('year'),
-            extract('month', Expense.date).label('month'),
-            func.sum(Expense.amount).label('total')
-        )
-        .filter(Expense.user_id == current_user.id)
-        .group_by('year', 'month')
-        .order_by('year', 'month')
-    )
+    for row in period_rollups:
+        expenses_by_category[row.category] = expenses_by_category.get(row.category, 0) + row.total
     
-    if year:
-        monthly_query = monthly_query.filter(extract('year', Expense.date) == year)
-    
-    monthly_data = monthly_query.all()
+    # Monthly expenses (whole year when filtering by year)
+    monthly_totals = {}
+    for row in rollups:
+        monthly_totals[(row.year, row.month)] = monthly_totals.get((row.year, row.month), 0) + row.total
     
     expenses_by_month = [
         {
-            'year': int(row.year),
-            'month': int(row.month),
-            'total': float(row.total)
+            'year': row_year,
+            'month': row_month,
+            'total': float(total)
         }
-        for row in monthly_data
+        for (row_year, row_month), total in sorted(monthly_totals.items())
     ]
     
     # Calculate monthly average
@@ -145,18 +159,16 @@ def get_expense_stats(
             Expense.user_id == current_user.id,
             Expense.vendor.isnot(None)
         )
+    )
+    
+    vendor_data = (
+        apply_range(vendor_query, Expense.date, start, end)
         .group_by(Expense.vendor)
         .order_by(func.sum(Expense.amount).desc())
         .limit(10)
+        .all()
     )
     
-    if year:
-        vendor_query = vendor_query.filter(extract('year', Expense.date) == year)
-    if month:
-        vendor_query = vendor_query.filter(extract('month', Expense.date) == month)
-    
-    vendor_data = vendor_query.all()
-    
     top_vendors = [
         {
             'vendor': row.vendor,
@@ -166,10 +178,6 @@ def get_expense_stats(
         for row in vendor_data
     ]
     
-    # Recurring expenses
-    recurring_expenses = [e for e in expenses if e.is_recurring]
-    recurring_expenses_total = sum(e.amount for e in recurring_expenses)
-    
     # Fixed vs Variable expenses
     fixed_categories = [
         ExpenseCategory.HOUSING,
@@ -177,11 +185,25 @@ def get_expense_stats(
         ExpenseCategory.INSURANCE
     ]
     
-    fixed_expenses = sum(
-        e.amount for e in expenses 
-        if e.category in fixed_categories or e.is_recurring
+    # Recurring expenses are the only figures the rollups can't answer
+    recurring_query = db.query(
+        func.sum(Expense.amount).label('total'),
+        func.sum(
+            case((Expense.category.notin_(fixed_categories), Expense.amount), else_=0)
+        ).label('variable_categories')
+    ).filter(
+        Expense.user_id == current_user.id,
+        Expense.is_recurring == True
     )
     
+    recurring = apply_range(recurring_query, Expense.date, start, end).one()
+    recurring_expenses_total = recurring.total or 0
+    
+    fixed_expenses = sum(
+        total for category, total in expenses_by_category.items()
+        if ExpenseCategory(category) in fixed_categories
+    ) + (recurring.variable_categories or 0)
+    
     variable_expenses = total_expenses - fixed_expenses
     
     return ExpenseStats(
@@ -232,11 +254,30 @@ def create_expense(
     )
     
     db.add(db_expense)
+    track_expense(db, db_expense)
     db.commit()
     db.refresh(db_expense)
     
     return db_expense
 
+@router.post("/batch", response_model=BatchResult)
+def batch_expenses(
+    batch: BatchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Create, update and delete many expenses in one transaction.
+    
+    Each operation has an action (create/update/delete), the id for
+    update/delete and the fields in `data`. Operations that fail are
+    reported in `results` and the rest are applied.
+    """
+    result = apply_expense_batch(db, current_user.id, batch.operations)
+    db.commit()
+    
+    return result
+
 @router.put("/{expense_id}", response_model=ExpenseSchema)
 def update_expense(
     expense_id: int,
@@ -258,10 +299,14 @@ def update_expense(
             detail="Gasto no encontrado"
         )
     
-    # Update fields
+    # Update fields (moving the amount between rollup buckets)
     update_data = expense_update.model_dump(exclude_unset=True)
+    track_expense(db, expense, sign=-1)
     for field, value in update_data.items():
         setattr(expense, field, value)
+    track_expense(db, expense)
+    # Changing the recurrence, frequency or date of a template moves its next occurrence
+    reschedule_expense(expense, update_data)
     
     db.commit()
     db.refresh(expense)
@@ -288,6 +333,7 @@ def delete_expense(
             detail="Gasto no encontrado"
         )
     
+    track_expense(db, expense, sign=-1)
     db.delete(expense)
     db.commit()
     
@@ -303,30 +349,26 @@ def get_categories_summary(
     """
     Get expense summary grouped by category with percentages
     """
-    query = db.query(
-        Expense.category,
-        func.sum(Expense.amount).label('total'),
-        func.count(Expense.id).label('count')
-    ).filter(Expense.user_id == current_user.id)
-    
-    if year:
-        query = query.filter(extract('year', Expense.date) == year)
-    if month:
-        query = query.filter(extract('month', Expense.date) == month)
+    if month and not year:
+        year = datetime.now().year
     
-    category_data = query.group_by(Expense.category).all()
+    category_totals = {}
+    for row in fetch_rollups(db, current_user.id, kind=EXPENSE, year=year, month=month):
+        totals = category_totals.setdefault(row.category, {'total': 0, 'count': 0})
+        totals['total'] += row.total
+        totals['count'] += row.count
     
     # Calculate total for percentages
-    total = sum(row.total for row in category_data)
+    total = sum(data['total'] for data in category_totals.values())
     
     summary = [
         {
-            'category': row.category.value,
-            'total': float(row.total),
-            'count': row.count,
-            'percentage': round((row.total / total * 100), 2) if total > 0 else 0
+            'category': category,
+            'total': float(data['total']),
+            'count': data['count'],
+            'percentage': round((data['total'] / total * 100), 2) if total > 0 else 0
         }
-        for row in category_data
+        for category, data in category_totals.items()
     ]
     
     # Sort by total descending
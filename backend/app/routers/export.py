@@ -0,0 +1,63 @@
+from typing import Optional
+from datetime import datetime, date
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.income import IncomeType
+from app.models.expense import ExpenseCategory
+from app.utils.auth import get_current_active_user
+from app.utils.dates import day_range
+from app.services.transaction_export import iter_transactions, ndjson_chunks, csv_chunks
+
+router = APIRouter(
+    prefix="/export",
+    tags=["Export"]
+)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8"
+}
+
+@router.get("/transactions")
+def export_transactions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    income_type: Optional[IncomeType] = None,
+    category: Optional[ExpenseCategory] = None,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Stream all incomes and expenses of the current user, newest first,
+    as NDJSON or CSV. Filtering by income type leaves out expenses and
+    filtering by expense category leaves out incomes, unless both are given.
+    """
+    user_id = current_user.id
+    start, end = day_range(start_date, end_date)
+    include_incomes = income_type is not None or category is None
+    include_expenses = category is not None or income_type is None
+    
+    def stream():
+        # The request session is closed before the body is sent, so the
+        # generator reads through its own
+        with SessionLocal() as db:
+            rows = iter_transactions(
+                db,
+                user_id,
+                start=start,
+                end=end,
+                income_type=income_type,
+                category=category,
+                include_incomes=include_incomes,
+                include_expenses=include_expenses
+            )
+            yield from (csv_chunks(rows) if format == "csv" else ndjson_chunks(rows))
+    
+    filename = f"transactions-{datetime.now():%Y%m%d}.{format}"
+    return StreamingResponse(
+        stream(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
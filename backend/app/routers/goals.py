@@ -1,6 +1,6 @@
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.database import get_db
@@ -13,16 +13,22 @@ from app.schemas.goal import (
     GoalContribution
 )
 from app.utils.auth import get_current_active_user
+from app.utils.pagination import paginate, set_next_cursor
 
 router = APIRouter(
     prefix="/goals",
     tags=["Goals"]
 )
 
+# Priority, then closest target date; id breaks ties
+GOAL_ORDER = ((Goal.priority, True), (Goal.target_date, False), (Goal.id, False))
+
 @router.get("/", response_model=List[GoalSchema])
 def get_goals(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Next page cursor from the X-Next-Cursor header (replaces skip)"),
     status: Optional[GoalStatus] = None,
     priority: Optional[GoalPriority] = None,
     include_completed: bool = Query(False, description="Include completed goals"),
@@ -46,11 +52,9 @@ def get_goals(
     if priority:
         query = query.filter(Goal.priority == priority)
     
-    # Order by priority (critical first) and target date
-    goals = query.order_by(
-        Goal.priority.desc(),
-        Goal.target_date.asc()
-    ).offset(skip).limit(limit).all()
+    # Order by priority (critical first) and target date, one page at a time
+    goals, next_cursor = paginate(query, GOAL_ORDER, limit, skip=skip, cursor=cursor)
+    set_next_cursor(response, next_cursor)
     
     # Convert to schema with calculations
     return [GoalSchema.from_orm_with_calculations(goal) for goal in goals]
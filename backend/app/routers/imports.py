@@ -0,0 +1,76 @@
+import shutil
+import uuid
+from pathlib import Path
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import get_db
+from app.models.user import User
+from app.schemas.transaction_import import ImportResult
+from app.utils.auth import get_current_active_user
+from app.services.statement_import import import_statement, StatementFormatError
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/import",
+    tags=["Import"]
+)
+
+FORMATS_BY_EXTENSION = {".csv": "csv", ".txt": "csv", ".ofx": "ofx", ".qfx": "ofx"}
+COPY_BUFFER_SIZE = 1024 * 1024
+
+def _save_upload(upload: UploadFile) -> Path:
+    """Copy the upload to UPLOAD_DIR in blocks, enforcing IMPORT_MAX_UPLOAD_MB"""
+    max_bytes = settings.IMPORT_MAX_UPLOAD_MB * 1024 * 1024
+    path = settings.UPLOAD_DIR / f"import-{uuid.uuid4().hex}{Path(upload.filename or '').suffix.lower()}"
+    written = 0
+    
+    with open(path, "wb") as target:
+        while block := upload.file.read(COPY_BUFFER_SIZE):
+            written += len(block)
+            if written > max_bytes:
+                target.close()
+                path.unlink(missing_ok=True)
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"El fichero supera el máximo de {settings.IMPORT_MAX_UPLOAD_MB} MB"
+                )
+            target.write(block)
+    
+    return path
+
+@router.post("/transactions", response_model=ImportResult)
+def import_transactions(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ofx)$", description="Por defecto, según la extensión"),
+    dayfirst: bool = Query(True, description="Fechas no ISO en formato día/mes/año"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Import incomes and expenses from a bank statement (CSV or OFX).
+    
+    CSV files need `date` and `amount` columns (or fecha/importe) and may
+    have description, vendor, category and type. Without a type column,
+    negative amounts are expenses and positive amounts incomes.
+    """
+    file_format = format or FORMATS_BY_EXTENSION.get(Path(file.filename or "").suffix.lower())
+    if not file_format:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato no soportado: sube un fichero .csv u .ofx"
+        )
+    
+    path = _save_upload(file)
+    try:
+        return import_statement(db, current_user.id, path, file_format, dayfirst=dayfirst)
+    except StatementFormatError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    finally:
+        path.unlink(missing_ok=True)
@@ -1,9 +1,10 @@
 from typing import List, Optional
 from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import extract, func
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func
+from app.database import get_db, get_async_db
 from app.models.user import User
 from app.models.income import Income, IncomeType
 from app.schemas.income import (
@@ -12,40 +13,64 @@ from app.schemas.income import (
     IncomeUpdate,
     IncomeStats
 )
+from app.schemas.batch import BatchRequest, BatchResult
 from app.utils.auth import get_current_active_user
+from app.utils.dates import period_range, day_range, apply_range
+from app.utils.pagination import paginate, set_next_cursor
+from app.services.rollups import track_income, fetch_rollups, INCOME
+from app.services.batch_edit import apply_income_batch
 
 router = APIRouter(
     prefix="/incomes",
     tags=["Incomes"]
 )
 
+# Newest first; id breaks ties in the order of the (user_id, date DESC) index
+INCOME_ORDER = ((Income.date, True), (Income.id, False))
+
+def _incomes_page(
+    db: Session,
+    user_id: int,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    income_type: Optional[IncomeType],
+    start_date: Optional[date],
+    end_date: Optional[date]
+):
+    """One page of the user's incomes and the cursor of the next one"""
+    query = db.query(Income).filter(Income.user_id == user_id)
+    
+    # Apply filters
+    if income_type:
+        query = query.filter(Income.income_type == income_type)
+    
+    # Whole days, as a half-open range on the indexed date column
+    query = apply_range(query, Income.date, *day_range(start_date, end_date))
+    
+    # Order by date descending, one page at a time
+    return paginate(query, INCOME_ORDER, limit, skip=skip, cursor=cursor)
+
 @router.get("/", response_model=List[IncomeSchema])
-def get_incomes(
+async def get_incomes(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Next page cursor from the X-Next-Cursor header (replaces skip)"),
     income_type: Optional[IncomeType] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Get all incomes for current user with optional filters
+    Get all incomes for current user with optional filters (read on the
+    async session, so the worker keeps serving while the query runs)
     """
-    query = db.query(Income).filter(Income.user_id == current_user.id)
-    
-    # Apply filters
-    if income_type:
-        query = query.filter(Income.income_type == income_type)
-    
-    if start_date:
-        query = query.filter(Income.date >= start_date)
-    
-    if end_date:
-        query = query.filter(Income.date <= end_date)
-    
-    # Order by date descending
-    incomes = query.order_by(Income.date.desc()).offset(skip).limit(limit).all()
+    incomes, next_cursor = await db.run_sync(
+        _incomes_page, current_user.id, skip, limit, cursor, income_type, start_date, end_date
+    )
+    set_next_cursor(response, next_cursor)
     
     return incomes
 
@@ -59,17 +84,14 @@ def get_income_stats(
     """
     Get income statistics for current user
     """
-    query = db.query(Income).filter(Income.user_id == current_user.id)
+    start, end = period_range(year, month)
+    if start:
+        year = start.year
     
-    # Apply date filters
-    if year:
-        query = query.filter(extract('year', Income.date) == year)
-    if month:
-        query = query.filter(extract('month', Income.date) == month)
+    rollups = fetch_rollups(db, current_user.id, kind=INCOME, year=year)
+    period_rollups = [row for row in rollups if not month or row.month == month]
     
-    incomes = query.all()
-    
-    if not incomes:
+    if not period_rollups:
         return IncomeStats(
             total_income=0,
             monthly_average=0,
@@ -79,38 +101,25 @@ def get_income_stats(
         )
     
     # Calculate statistics
-    total_income = sum(income.amount for income in incomes)
+    total_income = sum(row.total for row in period_rollups)
     
     # Income by type
     income_by_type = {}
-    for income in incomes:
-        type_key = income.income_type.value
-        income_by_type[type_key] = income_by_type.get(type_key, 0) + income.amount
-    
-    # Income by month
-    monthly_query = (
-        db.query(
-            extract('year', Income.date).label('year'),
-            extract('month', Income.date).label('month'),
-            func.sum(Income.amount).label('total')
-        )
-        .filter(Income.user_id == current_user.id)
-        .group_by('year', 'month')
-        .order_by('year', 'month')
-    )
-    
-    if year:
-        monthly_query = monthly_query.filter(extract('year', Income.date) == year)
+    for row in period_rollups:
+        income_by_type[row.category] = income_by_type.get(row.category, 0) + row.total
     
-    monthly_data = monthly_query.all()
+    # Income by month (whole year when filtering by year)
+    monthly_totals = {}
+    for row in rollups:
+        monthly_totals[(row.year, row.month)] = monthly_totals.get((row.year, row.month), 0) + row.total
     
     income_by_month = [
         {
-            'year': int(row.year),
-            'month': int(row.month),
-            'total': float(row.total)
+            'year': row_year,
+            'month': row_month,
+            'total': float(total)
         }
-        for row in monthly_data
+        for (row_year, row_month), total in sorted(monthly_totals.items())
     ]
     
     # Calculate monthly average
@@ -120,14 +129,17 @@ def get_income_stats(
         monthly_average = 0
     
     # Last income date
-    last_income = max(incomes, key=lambda x: x.date)
+    last_income_query = apply_range(
+        db.query(func.max(Income.date)).filter(Income.user_id == current_user.id),
+        Income.date, start, end
+    )
     
     return IncomeStats(
         total_income=total_income,
         monthly_average=monthly_average,
         income_by_type=income_by_type,
         income_by_month=income_by_month,
-        last_income_date=last_income.date
+        last_income_date=last_income_query.scalar()
     )
 
 @router.get("/{income_id}", response_model=IncomeSchema)
@@ -167,11 +179,30 @@ def create_income(
     )
     
     db.add(db_income)
+    track_income(db, db_income)
     db.commit()
     db.refresh(db_income)
     
     return db_income
 
+@router.post("/batch", response_model=BatchResult)
+def batch_incomes(
+    batch: BatchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Create, update and delete many incomes in one transaction.
+    
+    Each operation has an action (create/update/delete), the id for
+    update/delete and the fields in `data`. Operations that fail are
+    reported in `results` and the rest are applied.
+    """
+    result = apply_income_batch(db, current_user.id, batch.operations)
+    db.commit()
+    
+    return result
+
 @router.put("/{income_id}", response_model=IncomeSchema)
 def update_income(
     income_id: int,
@@ -193,10 +224,12 @@ def update_income(
             detail="Ingreso no encontrado"
         )
     
-    # Update fields
+    # Update fields (moving the amount between rollup buckets)
     update_data = income_update.model_dump(exclude_unset=True)
+    track_income(db, income, sign=-1)
     for field, value in update_data.items():
         setattr(income, field, value)
+    track_income(db, income)
     
     db.commit()
     db.refresh(income)
@@ -223,6 +256,7 @@ def delete_income(
             detail="Ingreso no encontrado"
         )
     
+    track_income(db, income, sign=-1)
     db.delete(income)
     db.commit()
     
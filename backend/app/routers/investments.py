@@ -1,9 +1,12 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
+from operator import attrgetter, itemgetter
 from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, inspect
+from app.config import settings
+from app.database import get_db, get_async_db
 from app.models.user import User
 from app.models.investment import Investment, InvestmentType, InvestmentStatus
 from app.schemas.investment import (
@@ -15,13 +18,22 @@ from app.schemas.investment import (
     InvestmentWithMarketData
 )
 from app.utils.auth import get_current_active_user
+from app.utils.pagination import paginate, set_next_cursor
 from app.services.market_data import (
     get_current_price,
     get_quote,
     search_symbol,
     market_data_service,
     update_investment_prices,
-    calculate_portfolio_metrics
+    update_investment_quotes,
+    update_investment_quotes_async,
+    calculate_portfolio_metrics,
+    fetch_quotes,
+    fetch_quotes_async,
+    get_quote_async,
+    search_symbol_async,
+    is_price_stale,
+    price_freshness
 )
 import logging
 
@@ -32,69 +44,64 @@ router = APIRouter(
     tags=["Investments"]
 )
 
-def update_investment_prices(investments: List[Investment]) -> List[Investment]:
-    """
-    Update prices for a list of investments using Alpha Vantage
-    """
-    for investment in investments:
-        if investment.status == InvestmentStatus.ACTIVE:
-            try:
-                # Get current price from Alpha Vantage
-                current_price = get_current_price(investment.symbol)
-                
-                if current_price:
-                    investment.current_price = current_price
-                    investment.last_price_update = datetime.now()
-                    
-                    # Update calculated fields
-                    investment.current_value = current_price * investment.quantity
-                    investment.profit_loss = investment.current_value - investment.total_invested
-                    investment.profit_loss_percentage = (
-                        (investment.profit_loss / investment.total_invested * 100) 
-                        if investment.total_invested > 0 else 0
-                    )
-                    logger.info(f"Updated price for {investment.symbol}: ${current_price}")
-                else:
-                    logger.warning(f"Could not get price for {investment.symbol}")
-                    
-            except Exception as e:
-                logger.error(f"Error updating price for {investment.symbol}: {e}")
-                # Keep last known price if update fails
-                pass
-    
-    return investments
+# Newest purchases first; id breaks ties
+INVESTMENT_ORDER = ((Investment.purchase_date, True), (Investment.id, False))
 
-def calculate_portfolio_metrics(investments: List[Investment]) -> dict:
-    """
-    Calculate portfolio performance metrics
-    """
-    total_invested = sum(inv.total_invested or 0 for inv in investments)
-    current_value = sum(inv.current_value or 0 for inv in investments)
-    profit_loss = current_value - total_invested
-    profit_loss_percentage = (profit_loss / total_invested * 100) if total_invested > 0 else 0
+# Column names and getters for all of them, resolved once at import
+_INVESTMENT_COLUMNS = tuple(column.name for column in Investment.__table__.columns)
+_read_loaded_columns = itemgetter(*_INVESTMENT_COLUMNS)
+_read_investment_columns = attrgetter(*_INVESTMENT_COLUMNS)
+
+def _with_market_data(investment: Investment, quote_data: Optional[Dict]) -> InvestmentWithMarketData:
+    """Build the response row from the ORM row and an already fetched quote"""
+    try:
+        # Freshly loaded rows: read the loaded state without attribute instrumentation
+        row = _read_loaded_columns(inspect(investment).dict)
+    except KeyError:
+        # Expired or partially loaded rows go through the ORM
+        row = _read_investment_columns(investment)
+    values = dict(zip(_INVESTMENT_COLUMNS, row))
+    values['price_is_stale'] = is_price_stale(investment.last_price_update)
     
-    return {
-        'total_invested': total_invested,
-        'current_value': current_value,
-        'profit_loss': profit_loss,
-        'profit_loss_percentage': profit_loss_percentage
-    }
+    if quote_data:
+        values['real_time_price'] = quote_data.get('price', investment.current_price)
+        values['day_change'] = quote_data.get('change')
+        values['day_change_percentage'] = quote_data.get('change_percent')
+        values['market_status'] = 'open'
+    
+    return InvestmentWithMarketData.model_validate(values)
 
-@router.get("/", response_model=List[InvestmentWithMarketData])
-def get_investments(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    investment_type: Optional[InvestmentType] = None,
-    status: Optional[InvestmentStatus] = None,
-    platform: Optional[str] = None,
-    update_prices: bool = Query(True, description="Update current prices from market"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
+def _market_quotes(investments: List[Investment], update_prices: bool) -> Dict[str, Optional[Dict]]:
     """
-    Get all investments for current user with optional real-time prices
+    Quotes by symbol for the investments, updating their prices first when
+    requested. Every symbol is looked up at most once per request.
     """
-    query = db.query(Investment).filter(Investment.user_id == current_user.id)
+    quotes = update_investment_quotes(investments) if update_prices else {}
+    missing = [inv.symbol for inv in investments if inv.symbol not in quotes]
+    if missing:
+        quotes.update(fetch_quotes(missing, network=update_prices))
+    return quotes
+
+async def _market_quotes_async(investments: List[Investment], update_prices: bool) -> Dict[str, Optional[Dict]]:
+    """Awaitable version of _market_quotes"""
+    quotes = await update_investment_quotes_async(investments) if update_prices else {}
+    missing = [inv.symbol for inv in investments if inv.symbol not in quotes]
+    if missing:
+        quotes.update(await fetch_quotes_async(missing, network=update_prices))
+    return quotes
+
+def _investments_page(
+    db: Session,
+    user_id: int,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    investment_type: Optional[InvestmentType],
+    status: Optional[InvestmentStatus],
+    platform: Optional[str]
+):
+    """One page of the user's investments and the cursor of the next one"""
+    query = db.query(Investment).filter(Investment.user_id == user_id)
     
     # Apply filters
     if investment_type:
@@ -106,39 +113,53 @@ def get_investments(
     if platform:
         query = query.filter(Investment.platform.ilike(f"%{platform}%"))
     
-    # Order by purchase date descending
-    investments = query.order_by(Investment.purchase_date.desc()).offset(skip).limit(limit).all()
+    # Order by purchase date descending, one page at a time
+    return paginate(query, INVESTMENT_ORDER, limit, skip=skip, cursor=cursor)
+
+def _with_quotes(investments: List[Investment], quotes: Dict[str, Optional[Dict]]) -> List[InvestmentWithMarketData]:
+    """Convert to schema with market data (add real-time data when available)"""
+    return [
+        _with_market_data(
+            inv,
+            quotes.get(inv.symbol) if inv.current_price and inv.last_price_update else None
+        )
+        for inv in investments
+    ]
+
+@router.get("/", response_model=List[InvestmentWithMarketData])
+async def get_investments(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Next page cursor from the X-Next-Cursor header (replaces skip)"),
+    investment_type: Optional[InvestmentType] = None,
+    status: Optional[InvestmentStatus] = None,
+    platform: Optional[str] = None,
+    update_prices: bool = Query(not settings.ENABLE_SCHEDULED_TASKS, description="Update current prices from market"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get all investments for current user with optional real-time prices.
+    The page is read on the async session and the quotes are awaited on the
+    market client, so the worker keeps serving while both are in flight.
+    """
+    investments, next_cursor = await db.run_sync(
+        _investments_page, current_user.id, skip, limit, cursor, investment_type, status, platform
+    )
+    set_next_cursor(response, next_cursor)
+    
+    quotes = await _market_quotes_async(investments, update_prices)
+    result = _with_quotes(investments, quotes)
     
-    # Update prices if requested
     if update_prices:
-        investments = update_investment_prices(investments)
-        # Save updated prices to database
-        db.commit()
-    
-    # Convert to schema with market data
-    result = []
-    for inv in investments:
-        inv_dict = {
-            column.name: getattr(inv, column.name) 
-            for column in inv.__table__.columns
-        }
-        
-        # Add real-time market data if available (from Alpha Vantage)
-        if inv.current_price and inv.last_price_update:
-            quote_data = get_quote(inv.symbol)
-            if quote_data:
-                inv_dict['real_time_price'] = quote_data.get('price', inv.current_price)
-                inv_dict['day_change'] = quote_data.get('change')
-                inv_dict['day_change_percentage'] = quote_data.get('change_percent')
-                inv_dict['market_status'] = 'open' if quote_data else 'closed'
-        
-        result.append(InvestmentWithMarketData(**inv_dict))
+        await db.commit()
     
     return result
 
 @router.get("/portfolio/summary", response_model=PortfolioSummary)
 def get_portfolio_summary(
-    update_prices: bool = Query(True, description="Update current prices from market"),
+    update_prices: bool = Query(not settings.ENABLE_SCHEDULED_TASKS, description="Update current prices from market"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -231,13 +252,14 @@ def get_portfolio_summary(
         investments_count=len(investments),
         investments_by_type=investments_by_type,
         top_performers=top_performers,
-        worst_performers=worst_performers
+        worst_performers=worst_performers,
+        **price_freshness(investments)
     )
 
 @router.get("/{investment_id}", response_model=InvestmentWithMarketData)
 def get_investment(
     investment_id: int,
-    update_price: bool = Query(True, description="Update current price from market"),
+    update_price: bool = Query(not settings.ENABLE_SCHEDULED_TASKS, description="Update current price from market"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -255,27 +277,14 @@ def get_investment(
             detail="Inversión no encontrada"
         )
     
-    # Update price if requested
+    # Update price if requested and add real-time market data from Alpha Vantage
+    quotes = _market_quotes([investment], update_price)
+    result = _with_market_data(investment, quotes.get(investment.symbol))
+    
     if update_price:
-        investments = update_investment_prices([investment])
-        investment = investments[0]
         db.commit()
     
-    # Convert to schema with market data
-    inv_dict = {
-        column.name: getattr(investment, column.name) 
-        for column in investment.__table__.columns
-    }
-    
-    # Add real-time market data from Alpha Vantage
-    quote_data = get_quote(investment.symbol)
-    if quote_data:
-        inv_dict['real_time_price'] = quote_data.get('price')
-        inv_dict['day_change'] = quote_data.get('change')
-        inv_dict['day_change_percentage'] = quote_data.get('change_percent')
-        inv_dict['market_status'] = 'open' if quote_data else 'closed'
-    
-    return InvestmentWithMarketData(**inv_dict)
+    return result
 
 @router.post("/", response_model=InvestmentSchema)
 def create_investment(
@@ -455,7 +464,7 @@ def delete_investment(
     return {"detail": "Inversión eliminada exitosamente"}
 
 @router.get("/market/search")
-def search_market_symbols(
+async def search_market_symbols(
     query: str = Query(..., min_length=1),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -464,11 +473,11 @@ def search_market_symbols(
     """
     try:
         # Search using Alpha Vantage
-        results = search_symbol(query)
+        results = await search_symbol_async(query)
         
         if not results:
             # If no results, try getting a direct quote
-            quote = get_quote(query.upper())
+            quote = await get_quote_async(query.upper())
             if quote:
                 return [{
                     'symbol': query.upper(),
@@ -479,9 +488,11 @@ def search_market_symbols(
         
         # Format results for frontend
         formatted_results = []
+        quotes = await fetch_quotes_async(result['symbol'] for result in results[:5])
         for result in results[:5]:  # Limit to 5 results
-            # Get current price for each result
-            price = get_current_price(result['symbol'])
+            # Current price for each result, fetched as one batch
+            quote = quotes.get(result['symbol'])
+            price = quote.get('price') if quote else None
             formatted_results.append({
                 'symbol': result['symbol'],
                 'name': result['name'],
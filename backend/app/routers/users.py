@@ -7,7 +7,8 @@ from app.schemas.user import User as UserSchema, UserUpdate
 from app.utils.auth import (
     get_current_active_user,
     get_current_superuser,
-    get_password_hash
+    get_password_hash,
+    invalidate_cached_user
 )
 
 router = APIRouter(
@@ -90,11 +91,16 @@ def update_user(
         update_data.pop("is_active", None)
         update_data.pop("is_superuser", None)
     
+    # A new password or an is_active change revokes the tokens already issued
+    if "hashed_password" in update_data or update_data.get("is_active", user.is_active) != user.is_active:
+        user.token_version = (user.token_version or 0) + 1
+    
     for field, value in update_data.items():
         setattr(user, field, value)
     
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user_id)
     
     return user
 
@@ -125,5 +131,6 @@ def delete_user(
     
     db.delete(user)
     db.commit()
+    invalidate_cached_user(user_id)
     
     return {"detail": "Usuario eliminado exitosamente"}
\ No newline at end of file
@@ -32,6 +32,12 @@ from .dashboard import (
     InvestmentsSummary, RecentTransaction
 )
 
+# Import schemas
+from .transaction_import import ImportRowError, ImportResult
+
+# Batch schemas
+from .batch import BatchOperation, BatchRequest, BatchItemResult, BatchResult
+
 __all__ = [
     # User
     "User", "UserCreate", "UserUpdate", "UserInDB",
@@ -53,5 +59,11 @@ __all__ = [
     # Dashboard
     "DashboardData", "FinancialSummary", "MonthlyOverview",
     "CashFlow", "CategoryBreakdown", "GoalsSummary",
-    "InvestmentsSummary", "RecentTransaction"
+    "InvestmentsSummary", "RecentTransaction",
+    
+    # Import
+    "ImportRowError", "ImportResult",
+    
+    # Batch
+    "BatchOperation", "BatchRequest", "BatchItemResult", "BatchResult"
 ]
\ No newline at end of file
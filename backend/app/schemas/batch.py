@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+
+MAX_BATCH_OPERATIONS = 1000
+
+BatchAction = Literal["create", "update", "delete"]
+
+class BatchOperation(BaseModel):
+    """Una operación del lote"""
+    action: BatchAction
+    id: Optional[int] = None  # Obligatorio en update y delete
+    data: Optional[Dict[str, Any]] = None  # Campos de create/update, validados por operación
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+class BatchItemResult(BaseModel):
+    """Resultado de una operación, en el mismo orden que la petición"""
+    index: int
+    action: BatchAction
+    id: Optional[int] = None  # Id asignado en create
+    ok: bool
+    error: Optional[str] = None
+
+class BatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
@@ -36,6 +36,8 @@ class BudgetResponse(BudgetBase):
     available: float = 0
     percentage_used: float = 0
     status: str = "under"
+    period_start: Optional[datetime] = None  # Período actual [inicio, fin)
+    period_end: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -49,6 +49,8 @@ class InvestmentsSummary(BaseModel):
     return_percentage: float
     best_performer: Optional[Dict] = None
     worst_performer: Optional[Dict] = None
+    prices_updated_at: Optional[datetime] = None  # Precio más antiguo de la cartera
+    prices_are_stale: bool = False
 
 class RecentTransaction(BaseModel):
     """Transacción reciente (ingreso o gasto)"""
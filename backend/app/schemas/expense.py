@@ -3,6 +3,24 @@ from typing import Optional
 from datetime import datetime
 from app.models.expense import ExpenseCategory, ExpenseFrequency
 
+RECURRENCE_TYPES = {'daily', 'weekly', 'monthly', 'yearly'}
+RECURRENCE_DAY_OPTIONS = {'first_day', 'last_day', 'salary_day', 'custom'}
+
+def _check_recurrence_type(v):
+    if v is not None and v not in RECURRENCE_TYPES:
+        raise ValueError(f"El tipo de recurrencia debe ser uno de: {', '.join(sorted(RECURRENCE_TYPES))}")
+    return v
+
+def _check_recurrence_day_option(v):
+    if v is not None and v not in RECURRENCE_DAY_OPTIONS:
+        raise ValueError(f"La opción de día debe ser una de: {', '.join(sorted(RECURRENCE_DAY_OPTIONS))}")
+    return v
+
+def _check_recurrence_custom_day(v):
+    if v is not None and not 1 <= v <= 31:
+        raise ValueError('El día debe estar entre 1 y 31')
+    return v
+
 class ExpenseBase(BaseModel):
     amount: float
     category: ExpenseCategory
@@ -11,6 +29,10 @@ class ExpenseBase(BaseModel):
     vendor: Optional[str] = None
     frequency: ExpenseFrequency = ExpenseFrequency.ONE_TIME
     is_recurring: bool = False
+    recurrence_type: Optional[str] = None  # Por defecto sale de la frecuencia
+    recurrence_day_option: Optional[str] = None
+    recurrence_custom_day: Optional[int] = None
+    recurrence_end_date: Optional[datetime] = None
     date: datetime
     
     @field_validator('amount')
@@ -18,6 +40,18 @@ class ExpenseBase(BaseModel):
         if v <= 0:
             raise ValueError('El monto debe ser mayor que 0')
         return v
+    
+    @field_validator('recurrence_type')
+    def recurrence_type_must_be_known(cls, v):
+        return _check_recurrence_type(v)
+    
+    @field_validator('recurrence_day_option')
+    def recurrence_day_option_must_be_known(cls, v):
+        return _check_recurrence_day_option(v)
+    
+    @field_validator('recurrence_custom_day')
+    def recurrence_custom_day_must_be_a_day(cls, v):
+        return _check_recurrence_custom_day(v)
 
 class ExpenseCreate(ExpenseBase):
     pass
@@ -30,6 +64,10 @@ class ExpenseUpdate(BaseModel):
     vendor: Optional[str] = None
     frequency: Optional[ExpenseFrequency] = None
     is_recurring: Optional[bool] = None
+    recurrence_type: Optional[str] = None
+    recurrence_day_option: Optional[str] = None
+    recurrence_custom_day: Optional[int] = None
+    recurrence_end_date: Optional[datetime] = None
     date: Optional[datetime] = None
     
     @field_validator('amount')
@@ -37,10 +75,23 @@ class ExpenseUpdate(BaseModel):
         if v is not None and v <= 0:
             raise ValueError('El monto debe ser mayor que 0')
         return v
+    
+    @field_validator('recurrence_type')
+    def recurrence_type_must_be_known(cls, v):
+        return _check_recurrence_type(v)
+    
+    @field_validator('recurrence_day_option')
+    def recurrence_day_option_must_be_known(cls, v):
+        return _check_recurrence_day_option(v)
+    
+    @field_validator('recurrence_custom_day')
+    def recurrence_custom_day_must_be_a_day(cls, v):
+        return _check_recurrence_custom_day(v)
 
 class ExpenseInDBBase(ExpenseBase):
     id: int
     user_id: int
+    next_occurrence: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     
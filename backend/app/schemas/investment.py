@@ -79,10 +79,13 @@ class PortfolioSummary(BaseModel):
     investments_by_type: dict[str, dict]  # type -> {count, value, percentage}
     top_performers: list[dict]
     worst_performers: list[dict]
+    prices_updated_at: Optional[datetime] = None  # Precio más antiguo de la cartera
+    prices_are_stale: bool = False
 
 # Schema for investment with real-time data
 class InvestmentWithMarketData(Investment):
     real_time_price: Optional[float] = None
     day_change: Optional[float] = None
     day_change_percentage: Optional[float] = None
-    market_status: Optional[str] = None  # "open", "closed", "pre-market", etc.
\ No newline at end of file
+    market_status: Optional[str] = None  # "open", "closed", "pre-market", etc.
+    price_is_stale: bool = False  # current_price más antiguo que PRICE_STALE_HOURS
\ No newline at end of file
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List
+
+class ImportRowError(BaseModel):
+    """Fila del fichero que no se pudo importar"""
+    row: int  # Línea en CSV, número de movimiento en OFX
+    error: str
+
+class ImportResult(BaseModel):
+    """Resultado de importar un extracto bancario"""
+    rows_processed: int
+    imported_incomes: int
+    imported_expenses: int
+    error_count: int
+    errors: List[ImportRowError]  # Limitado a IMPORT_MAX_REPORTED_ERRORS
@@ -72,4 +72,8 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 class TokenData(BaseModel):
-    username: Optional[str] = None
\ No newline at end of file
+    username: Optional[str] = None
+    user_id: Optional[int] = None  # Tokens anteriores no llevan uid/ver/active
+    version: Optional[int] = None
+    active: Optional[bool] = None
+    exp: Optional[int] = None
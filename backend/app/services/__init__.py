@@ -2,19 +2,29 @@
 from .market_data import (
     get_current_price,
     get_quote,
+    get_quote_async,
     search_symbol,
+    search_symbol_async,
     market_data_service,
     update_investment_prices,
+    update_investment_quotes,
     calculate_portfolio_metrics,
+    fetch_quotes,
+    fetch_quotes_async,
     AlphaVantageService
 )
 
 __all__ = [
     "get_current_price",
     "get_quote", 
+    "get_quote_async",
     "search_symbol",
+    "search_symbol_async",
     "market_data_service",
     "update_investment_prices",
+    "update_investment_quotes",
     "calculate_portfolio_metrics",
+    "fetch_quotes",
+    "fetch_quotes_async",
     "AlphaVantageService"
 ]
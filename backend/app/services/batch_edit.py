@@ -0,0 +1,175 @@
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Type
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, delete, text
+from app.models.income import Income
+from app.models.expense import Expense
+from app.schemas.batch import BatchOperation
+from app.schemas.income import IncomeCreate, IncomeUpdate
+from app.schemas.expense import ExpenseCreate, ExpenseUpdate
+from app.services.rollups import add_delta, apply_rollup_deltas, income_category, expense_category, INCOME, EXPENSE
+from app.services.recurrence_processor import reschedule_expense
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fields an update cannot set to null (the rollups and the listings need them)
+INCOME_REQUIRED_FIELDS = ('amount', 'source', 'income_type', 'date')
+EXPENSE_REQUIRED_FIELDS = ('amount', 'category', 'date')
+
+# Everything reschedule_expense reads besides the changed fields
+EXPENSE_BATCH_COLUMNS = (
+    Expense.amount,
+    Expense.date,
+    Expense.category,
+    Expense.frequency,
+    Expense.is_recurring,
+    Expense.recurrence_type,
+    Expense.recurrence_day_option,
+    Expense.recurrence_custom_day,
+    Expense.last_processed
+)
+
+def _insert_returning_ids(db: Session, model, rows: List[Dict]) -> List[int]:
+    """
+    Insert `rows` and return their ids in the same order. SQLite cannot
+    batch INSERT ... RETURNING sorted by parameter order (SQLAlchemy sends
+    one statement per row), so there the rows go in one bulk insert: new
+    rowids are one above the largest while the transaction holds the write
+    lock, so the ids are the consecutive run ending at last_insert_rowid().
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows).all()
+    db.execute(insert(model), rows)
+    last_id = db.execute(text("SELECT last_insert_rowid()")).scalar_one()
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+def _validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    field = ".".join(str(part) for part in first['loc'])
+    return f"{field}: {first['msg']}" if field else first['msg']
+
+def _apply_batch(
+    db: Session,
+    user_id: int,
+    operations: List[BatchOperation],
+    model,
+    kind: str,
+    columns: tuple,
+    category_of: Callable,
+    create_schema: Type[BaseModel],
+    update_schema: Type[BaseModel],
+    not_found: str,
+    required: tuple,
+    reschedule: Optional[Callable] = None
+) -> Dict:
+    """
+    Apply create/update/delete operations in order within the caller's
+    transaction (caller commits). Ownership is checked with one query and
+    the changes are written with one statement per kind of operation, plus
+    one rollup upsert for the whole batch. Failed operations are reported
+    and skipped; the rest are applied. `columns` are loaded for each id
+    (amount, date and category at least), `required` fields cannot be set
+    to null and `reschedule(row, changes)` returns the extra fields an
+    update has to write.
+    """
+    results = []
+    created = []
+    updates = {}
+    deleted = []
+    deltas = {}
+
+    def rollup_entry(row, sign: int) -> tuple:
+        return (category_of(row), row.date, sign * row.amount, sign)
+
+    def track(*entries):
+        # Entries are computed before any is added, so a failing operation leaves no partial delta
+        for entry in entries:
+            add_delta(deltas, user_id, kind, *entry)
+
+    # One query for every id in the batch; ids of other users are simply not found
+    ids = {operation.id for operation in operations if operation.id is not None}
+    current = {}
+    if ids:
+        current = {
+            row.id: SimpleNamespace(**row._asdict())
+            for row in db.execute(
+                select(model.id, *columns)
+                .where(model.id.in_(ids), model.user_id == user_id)
+            )
+        }
+
+    for index, operation in enumerate(operations):
+        result = {'index': index, 'action': operation.action, 'id': operation.id, 'ok': False, 'error': None}
+        results.append(result)
+
+        try:
+            if operation.action == "create":
+                values = create_schema.model_validate(operation.data or {}).model_dump()
+                track(rollup_entry(SimpleNamespace(**values), 1))
+                created.append((result, {**values, 'user_id': user_id}))
+            elif operation.id is None:
+                result['error'] = "Falta el id"
+                continue
+            elif operation.id not in current:
+                result['error'] = not_found
+                continue
+            elif operation.action == "update":
+                changes = update_schema.model_validate(operation.data or {}).model_dump(exclude_unset=True)
+                nulls = [field for field in required if field in changes and changes[field] is None]
+                if nulls:
+                    result['error'] = f"{nulls[0]}: no puede ser nulo"
+                    continue
+                row = current[operation.id]
+                updated = SimpleNamespace(**vars(row))
+                vars(updated).update((field, value) for field, value in changes.items() if hasattr(updated, field))
+                if reschedule is not None:
+                    changes.update(reschedule(updated, changes))
+                track(rollup_entry(row, -1), rollup_entry(updated, 1))
+                current[operation.id] = updated
+                updates.setdefault(operation.id, {}).update(changes)
+            else:
+                track(rollup_entry(current[operation.id], -1))
+                del current[operation.id]
+                updates.pop(operation.id, None)
+                deleted.append(operation.id)
+        except ValidationError as e:
+            result['error'] = _validation_message(e)
+            continue
+        except Exception as e:
+            # One bad operation must not sink the rest of the batch
+            logger.warning(f"Batch {kind} operation {index} for user {user_id} failed: {e}")
+            result['error'] = "No se pudo aplicar la operación"
+            continue
+
+        result['ok'] = True
+
+    changed = [{'id': row_id, **changes} for row_id, changes in updates.items() if changes]
+    if changed:
+        # Bulk UPDATE by primary key, one executemany per set of changed columns
+        db.execute(update(model), changed)
+    if deleted:
+        db.execute(delete(model).where(model.id.in_(deleted)), execution_options={'synchronize_session': False})
+    if created:
+        new_ids = _insert_returning_ids(db, model, [values for _, values in created])
+        for (result, _), new_id in zip(created, new_ids):
+            result['id'] = new_id
+
+    apply_rollup_deltas(db, deltas)
+
+    succeeded = sum(result['ok'] for result in results)
+    logger.info(f"Batch of {len(results)} {kind} operations for user {user_id}: {succeeded} applied")
+    return {'succeeded': succeeded, 'failed': len(results) - succeeded, 'results': results}
+
+def apply_income_batch(db: Session, user_id: int, operations: List[BatchOperation]) -> Dict:
+    return _apply_batch(
+        db, user_id, operations, Income, INCOME, (Income.amount, Income.date, Income.income_type), income_category,
+        IncomeCreate, IncomeUpdate, "Ingreso no encontrado", INCOME_REQUIRED_FIELDS
+    )
+
+def apply_expense_batch(db: Session, user_id: int, operations: List[BatchOperation]) -> Dict:
+    return _apply_batch(
+        db, user_id, operations, Expense, EXPENSE, EXPENSE_BATCH_COLUMNS, expense_category,
+        ExpenseCreate, ExpenseUpdate, "Gasto no encontrado", EXPENSE_REQUIRED_FIELDS, reschedule_expense
+    )
@@ -0,0 +1,101 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from dateutil.relativedelta import relativedelta
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, literal, union_all, Integer, DateTime
+from app.models.budget import Budget, BudgetPeriod
+from app.models.expense import Expense
+
+BUDGET_COLUMNS = tuple(Budget.__table__.columns)
+
+# Filas por CTE de ventanas (SQLite admite hasta 500 SELECT en un UNION ALL)
+_WINDOWS_PER_QUERY = 400
+
+def period_window(period: Optional[BudgetPeriod], today: date) -> Tuple[datetime, datetime]:
+    """[start, end) of the budget period containing `today`; weeks start on Monday"""
+    period = period or BudgetPeriod.MONTHLY
+    if period == BudgetPeriod.WEEKLY:
+        start = today - timedelta(days=today.weekday())
+        end = start + timedelta(weeks=1)
+    elif period == BudgetPeriod.QUARTERLY:
+        start = date(today.year, 3 * ((today.month - 1) // 3) + 1, 1)
+        end = start + relativedelta(months=3)
+    elif period == BudgetPeriod.YEARLY:
+        start = date(today.year, 1, 1)
+        end = start + relativedelta(years=1)
+    else:
+        start = today.replace(day=1)
+        end = start + relativedelta(months=1)
+    return datetime.combine(start, time.min), datetime.combine(end, time.min)
+
+def budget_status(spent: float, limit: float, alert_percentage: Optional[int]) -> Tuple[float, str]:
+    """(percentage_used, status) for `spent` out of `limit`"""
+    percentage_used = spent / limit * 100 if limit > 0 else 0
+    if percentage_used >= 100:
+        return percentage_used, 'over'
+    if percentage_used >= (alert_percentage or 80):
+        return percentage_used, 'warning'
+    return percentage_used, 'under'
+
+def spent_by_budget(db: Session, user_id: int, windows: Dict[int, Tuple[datetime, datetime]]) -> Dict[int, float]:
+    """
+    Spend of each budget inside its own window with one grouped query: the
+    windows are a CTE of literal rows (a portable VALUES list) joined to
+    expenses on (budget_id, date range), which the (user_id, budget_id, date)
+    index answers without loading rows
+    """
+    spent = {}
+    items = list(windows.items())
+    for offset in range(0, len(items), _WINDOWS_PER_QUERY):
+        window = union_all(*(
+            select(
+                literal(budget_id, Integer).label('budget_id'),
+                literal(start, DateTime).label('period_start'),
+                literal(end, DateTime).label('period_end')
+            )
+            for budget_id, (start, end) in items[offset:offset + _WINDOWS_PER_QUERY]
+        )).cte('budget_windows')
+
+        rows = db.execute(
+            select(window.c.budget_id, func.sum(Expense.amount))
+            .join(
+                Expense,
+                (Expense.user_id == user_id)
+                & (Expense.budget_id == window.c.budget_id)
+                & (Expense.date >= window.c.period_start)
+                & (Expense.date < window.c.period_end)
+            )
+            .group_by(window.c.budget_id)
+        )
+        spent.update((budget_id, total or 0.0) for budget_id, total in rows)
+    return spent
+
+def evaluate_budgets(db: Session, user_id: int, budget_ids: Optional[List[int]] = None, today: Optional[date] = None) -> List[Dict]:
+    """
+    Budgets of a user (all, or `budget_ids`) with the spend of their current
+    period, `available`, `percentage_used` and `status`. Budget columns are
+    read as plain rows, so nothing is written back to the budgets table.
+    """
+    today = today or datetime.now().date()
+
+    query = select(*BUDGET_COLUMNS).where(Budget.user_id == user_id).order_by(Budget.id)
+    if budget_ids is not None:
+        query = query.where(Budget.id.in_(budget_ids))
+    budgets = [dict(row._mapping) for row in db.execute(query)]
+
+    windows = {budget['id']: period_window(budget['period'], today) for budget in budgets}
+    spent = spent_by_budget(db, user_id, windows)
+
+    for budget in budgets:
+        current_spent = spent.get(budget['id'], 0.0)
+        limit = budget['amount'] + (budget['rollover_amount'] or 0)
+        percentage_used, status = budget_status(current_spent, limit, budget['alert_percentage'])
+        budget.update(
+            current_spent=current_spent,
+            available=limit - current_spent,
+            percentage_used=percentage_used,
+            status=status,
+            period_start=windows[budget['id']][0],
+            period_end=windows[budget['id']][1]
+        )
+    return budgets
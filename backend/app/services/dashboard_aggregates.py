@@ -0,0 +1,162 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import select, union_all, literal, func, case, type_coerce, String
+from app.models.income import Income
+from app.models.expense import Expense
+from app.models.goal import Goal, GoalStatus
+from app.services.rollups import fetch_rollups, CATEGORY_VALUES
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _shift_month(year: int, month: int, offset: int) -> tuple:
+    """Return (year, month) moved `offset` calendar months"""
+    index = year * 12 + (month - 1) + offset
+    return index // 12, index % 12 + 1
+
+def fetch_transaction_totals(db: Session, user_id: int) -> List:
+    """
+    Per (kind, category, year, month) sums and counts of incomes and expenses,
+    read from the monthly rollups. The result has O(categories x months) rows
+    regardless of how many transactions the user has.
+    """
+    return fetch_rollups(db, user_id)
+
+def summarize_transactions(rows: List, year: int, month: int, months: int = 6) -> Dict:
+    """
+    Fold the grouped rows into all-time totals, the selected month, a cash flow
+    series of the last `months` months and per-category breakdowns
+    """
+    totals = {'income': 0.0, 'expense': 0.0}
+    selected = {'income': 0.0, 'expense': 0.0}
+    by_month = {}
+    by_category = {'income': {}, 'expense': {}}
+
+    for row in rows:
+        kind = row.kind
+        amount = float(row.total or 0)
+        period = (int(row.year), int(row.month))
+
+        totals[kind] += amount
+        if period == (year, month):
+            selected[kind] += amount
+
+        month_totals = by_month.setdefault(period, {'income': 0.0, 'expense': 0.0})
+        month_totals[kind] += amount
+
+        bucket = by_category[kind].setdefault(row.category, {'amount': 0.0, 'count': 0})
+        bucket['amount'] += amount
+        bucket['count'] += row.count
+
+    cash_flow = []
+    cumulative_balance = 0.0
+    for offset in range(months - 1, -1, -1):
+        flow_year, flow_month = _shift_month(year, month, -offset)
+        month_totals = by_month.get((flow_year, flow_month), {'income': 0.0, 'expense': 0.0})
+        net_flow = month_totals['income'] - month_totals['expense']
+        cumulative_balance += net_flow
+        cash_flow.append({
+            'date': f"{flow_year}-{flow_month:02d}",
+            'income': month_totals['income'],
+            'expenses': month_totals['expense'],
+            'net_flow': net_flow,
+            'cumulative_balance': cumulative_balance
+        })
+
+    return {
+        'total_income': totals['income'],
+        'total_expenses': totals['expense'],
+        'monthly_income': selected['income'],
+        'monthly_expenses': selected['expense'],
+        'cash_flow': cash_flow,
+        'income_by_type': by_category['income'],
+        'expenses_by_category': by_category['expense']
+    }
+
+def fetch_goal_totals(db: Session, user_id: int) -> Dict:
+    """Goal counts and amounts in one aggregate statement"""
+    row = db.execute(
+        select(
+            func.count(Goal.id).label('total_goals'),
+            func.coalesce(func.sum(case((Goal.status == GoalStatus.ACTIVE, 1), else_=0)), 0).label('active_goals'),
+            func.coalesce(func.sum(case((Goal.status == GoalStatus.COMPLETED, 1), else_=0)), 0).label('completed_goals'),
+            func.coalesce(func.sum(Goal.target_amount), 0).label('total_target'),
+            func.coalesce(func.sum(Goal.current_amount), 0).label('total_saved')
+        ).where(Goal.user_id == user_id)
+    ).one()
+
+    return {
+        'total_goals': row.total_goals,
+        'active_goals': int(row.active_goals),
+        'completed_goals': int(row.completed_goals),
+        'total_target': float(row.total_target),
+        'total_saved': float(row.total_saved)
+    }
+
+def fetch_upcoming_goal(db: Session, user_id: int, since: datetime, until: datetime) -> Optional[Dict]:
+    """Closest active goal whose target date falls between `since` and `until`"""
+    row = db.execute(
+        select(Goal.name, Goal.target_date, Goal.target_amount, Goal.current_amount)
+        .where(
+            Goal.user_id == user_id,
+            Goal.status == GoalStatus.ACTIVE,
+            Goal.target_date >= since,
+            Goal.target_date <= until
+        )
+        .order_by(Goal.target_date.asc())
+        .limit(1)
+    ).first()
+
+    return dict(row._mapping) if row else None
+
+def fetch_recent_transactions(db: Session, user_id: int, per_kind: int = 5) -> List[Dict]:
+    """Latest incomes and expenses merged by date in one statement"""
+    incomes = (
+        select(
+            Income.id.label('id'),
+            literal('income').label('type'),
+            Income.amount.label('amount'),
+            Income.source.label('description'),
+            type_coerce(Income.income_type, String).label('category'),
+            Income.date.label('date')
+        )
+        .where(Income.user_id == user_id)
+        .order_by(Income.date.desc())
+        .limit(per_kind)
+        .subquery()
+    )
+
+    expenses = (
+        select(
+            Expense.id.label('id'),
+            literal('expense').label('type'),
+            Expense.amount.label('amount'),
+            func.coalesce(func.nullif(Expense.description, ''), Expense.vendor).label('description'),
+            type_coerce(Expense.category, String).label('category'),
+            Expense.date.label('date')
+        )
+        .where(Expense.user_id == user_id)
+        .order_by(Expense.date.desc())
+        .limit(per_kind)
+        .subquery()
+    )
+
+    merged = union_all(select(incomes), select(expenses)).subquery()
+    rows = db.execute(
+        select(merged).order_by(merged.c.date.desc())
+    ).all()
+
+    transactions = []
+    for row in rows:
+        category = CATEGORY_VALUES[row.type].get(row.category, row.category)
+        transactions.append({
+            'id': row.id,
+            'type': row.type,
+            'amount': row.amount,
+            'description': row.description or category,
+            'category': category,
+            'date': row.date
+        })
+
+    return transactions
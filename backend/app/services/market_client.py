@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Dict, Optional
+import httpx
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class MarketDataClient:
+    """
+    Shared httpx.AsyncClient for the market data provider.
+
+    The client and its keep-alive connection pool live on a dedicated event
+    loop thread, so the same pool serves async endpoints (`submit`) and sync
+    code such as RecurrenceProcessor, the scheduler or the scripts (`run`).
+    """
+
+    def __init__(self, base_url: str, timeout: float, max_connections: int):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max(max_connections, 1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="market-data-client",
+                    daemon=True
+                )
+                self._thread.start()
+                self._loop = loop
+            return self._loop
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Only called from the client loop, so no locking needed
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(self.timeout, pool=None),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    async def get_json(self, params: Dict[str, Any]) -> Dict:
+        """GET the provider endpoint and decode the JSON body (runs on the client loop)"""
+        response = await self._get_client().get(self.base_url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def submit(self, coroutine: Awaitable) -> Future:
+        """Schedule a coroutine on the client loop"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._start())
+
+    async def call(self, coroutine: Awaitable) -> Any:
+        """Await a coroutine running on the client loop from any other loop"""
+        return await asyncio.wrap_future(self.submit(coroutine))
+
+    def run(self, coroutine: Awaitable) -> Any:
+        """Sync facade: block the calling thread until the coroutine finishes"""
+        return self.submit(coroutine).result()
+
+    def close(self):
+        """Close the connection pool and stop the loop thread"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+            self._client = None
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+
+# One pool for the whole process
+market_client = MarketDataClient(
+    base_url=settings.ALPHA_VANTAGE_BASE_URL,
+    timeout=settings.MARKET_DATA_TIMEOUT_SECONDS,
+    max_connections=settings.MARKET_DATA_MAX_WORKERS
+)
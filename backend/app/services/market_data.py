@@ -1,27 +1,175 @@
-import requests
+import asyncio
+import httpx
 import logging
-from typing import Optional, Dict, List
-from datetime import datetime
-from functools import lru_cache
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Hashable, Optional, Dict, List, Iterable, Tuple
+from datetime import datetime, timedelta
 from app.config import settings
+from app.utils.cache import quote_cache, MISSING
+from app.services import price_store
+from app.services.market_client import market_client
 
 logger = logging.getLogger(__name__)
 
+class QuoteRateLimited(Exception):
+    """No request slot became available within MARKET_DATA_MAX_WAIT_SECONDS"""
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: one token every `interval` seconds, up to
+    `capacity` saved tokens for short bursts
+    """
+    
+    def __init__(self, interval: float, capacity: int):
+        self.interval = max(interval, 0)
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        if self.interval:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) / self.interval)
+        else:
+            self._tokens = float(self.capacity)
+        self._updated = now
+    
+    def _reserve(self, timeout: Optional[float]) -> Optional[float]:
+        """Take a token and return how long to wait for it (None if over timeout)"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) * self.interval
+            if timeout is not None and wait > timeout:
+                return None
+            self._tokens -= 1
+        return wait
+    
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a token is available; False if that takes longer than timeout"""
+        wait = self._reserve(timeout)
+        if wait is None:
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+    
+    async def acquire_async(self, timeout: Optional[float] = None) -> bool:
+        """Like acquire, but waits without blocking the event loop"""
+        wait = self._reserve(timeout)
+        if wait is None:
+            return False
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+# Shared across requests so every Alpha Vantage call counts against one budget
+rate_limiter = TokenBucket(settings.MARKET_DATA_RATE_LIMIT_SECONDS, settings.MARKET_DATA_BURST)
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key: the first caller owns the
+    call and the rest wait on its concurrent.futures.Future, which works
+    from worker threads and (wrapped) from any event loop
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+    
+    def claim(self, keys: Iterable[Hashable]) -> Tuple[Dict[Hashable, Future], List[Hashable]]:
+        """Futures for every key, plus the keys whose call the caller now owns"""
+        futures = {}
+        owned = []
+        with self._lock:
+            for key in keys:
+                future = self._calls.get(key)
+                if future is None:
+                    future = self._calls[key] = Future()
+                    owned.append(key)
+                futures[key] = future
+        return futures, owned
+    
+    def resolve(self, results: Dict[Hashable, Any]):
+        """Finish owned calls and hand their result to every waiting caller"""
+        with self._lock:
+            futures = [(self._calls.pop(key), result) for key, result in results.items()]
+        for future, result in futures:
+            future.set_result(result)
+    
+    def fail(self, keys: Iterable[Hashable], error: BaseException):
+        """Finish owned calls with an error raised in every waiting caller"""
+        with self._lock:
+            futures = [self._calls.pop(key) for key in keys if key in self._calls]
+        for future in futures:
+            future.set_exception(error)
+    
+    def __len__(self) -> int:
+        return len(self._calls)
+
+# Quote fetches in flight, by symbol
+quote_flights = SingleFlight()
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter, so retries from many callers spread out"""
+    return random.uniform(0, settings.MARKET_DATA_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+def _rate_limit_note(data: Dict) -> Optional[str]:
+    """Alpha Vantage answers over-quota calls with 200 and a Note/Information message"""
+    return data.get('Note') or data.get('Information')
+
+async def _call_api(params: Dict, max_wait: Optional[float], label: str) -> Dict:
+    """
+    Call Alpha Vantage through the shared client, retrying rate-limit notes
+    with jittered backoff. Every attempt takes a rate limiter token.
+    """
+    for attempt in range(settings.MARKET_DATA_MAX_RETRIES + 1):
+        if not await rate_limiter.acquire_async(timeout=max_wait):
+            raise QuoteRateLimited(label)
+        
+        data = await market_client.get_json(params)
+        note = _rate_limit_note(data)
+        if not note or attempt == settings.MARKET_DATA_MAX_RETRIES:
+            return data
+        
+        delay = _backoff_delay(attempt)
+        logger.info(f"Alpha Vantage rate limit for {label}, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
 class AlphaVantageService:
     """Service for fetching market data using Alpha Vantage API"""
     
-    BASE_URL = "https://www.alphavantage.co/query"
+    BASE_URL = settings.ALPHA_VANTAGE_BASE_URL
+    
+    @staticmethod
+    def get_quote(symbol: str, network: bool = True) -> Optional[Dict]:
+        """
+        Get real-time quote for a symbol using Alpha Vantage GLOBAL_QUOTE.
+        Reads the in-process cache, then the shared price store, and only
+        calls the API when the stored quote is older than MARKET_DATA_CACHE_MINUTES
+        (never with network=False).
+        """
+        return fetch_quotes([symbol], network=network).get(symbol)
+    
+    @staticmethod
+    async def get_quote_async(symbol: str, network: bool = True) -> Optional[Dict]:
+        """Awaitable version of get_quote"""
+        return (await fetch_quotes_async([symbol], network=network)).get(symbol)
     
     @staticmethod
-    @lru_cache(maxsize=128)
-    def get_quote(symbol: str) -> Optional[Dict]:
+    async def _fetch_quote(symbol: str, max_wait: Optional[float] = settings.MARKET_DATA_MAX_WAIT_SECONDS) -> Optional[Dict]:
         """
-        Get real-time quote for a symbol using Alpha Vantage GLOBAL_QUOTE
+        Request GLOBAL_QUOTE from the API (None on errors or rate-limit notes).
+        Waits at most `max_wait` seconds for a rate limiter slot (None: no limit).
+        Runs on the market client loop.
         """
         if not settings.ALPHA_VANTAGE_API_KEY:
             logger.warning("Alpha Vantage API key not configured")
             return None
-            
+        
         try:
             params = {
                 'function': 'GLOBAL_QUOTE',
@@ -29,9 +177,7 @@ class AlphaVantageService:
                 'apikey': settings.ALPHA_VANTAGE_API_KEY
             }
             
-            response = requests.get(AlphaVantageService.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = await _call_api(params, max_wait, symbol)
             
             if 'Global Quote' in data:
                 quote = data['Global Quote']
@@ -47,14 +193,14 @@ class AlphaVantageService:
             elif 'Error Message' in data:
                 logger.error(f"Alpha Vantage error for {symbol}: {data['Error Message']}")
                 return None
-            elif 'Note' in data:
-                logger.warning(f"Alpha Vantage rate limit for {symbol}: {data['Note']}")
+            elif _rate_limit_note(data):
+                logger.warning(f"Alpha Vantage rate limit for {symbol}: {_rate_limit_note(data)}")
                 return None
             else:
                 logger.warning(f"Unexpected response format for {symbol}: {data}")
                 return None
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Network error fetching quote for {symbol}: {e}")
             return None
         except (ValueError, KeyError) as e:
@@ -66,6 +212,15 @@ class AlphaVantageService:
         """
         Search for symbols using Alpha Vantage SYMBOL_SEARCH
         """
+        return market_client.run(AlphaVantageService._search_symbol(query))
+    
+    @staticmethod
+    async def search_symbol_async(query: str) -> List[Dict]:
+        """Awaitable version of search_symbol"""
+        return await market_client.call(AlphaVantageService._search_symbol(query))
+    
+    @staticmethod
+    async def _search_symbol(query: str) -> List[Dict]:
         if not settings.ALPHA_VANTAGE_API_KEY:
             logger.warning("Alpha Vantage API key not configured")
             return []
@@ -77,9 +232,7 @@ class AlphaVantageService:
                 'apikey': settings.ALPHA_VANTAGE_API_KEY
             }
             
-            response = requests.get(AlphaVantageService.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = await _call_api(params, settings.MARKET_DATA_MAX_WAIT_SECONDS, query)
             
             if 'bestMatches' in data:
                 results = []
@@ -100,7 +253,10 @@ class AlphaVantageService:
                 logger.warning(f"No results found for search: {query}")
                 return []
                 
-        except requests.RequestException as e:
+        except QuoteRateLimited:
+            logger.warning(f"Skipping search for {query}: local rate limit reached")
+            return []
+        except httpx.HTTPError as e:
             logger.error(f"Network error searching for {query}: {e}")
             return []
         except (ValueError, KeyError) as e:
@@ -115,51 +271,246 @@ def get_current_price(symbol: str) -> Optional[float]:
         return quote.get('price')
     return None
 
-def get_quote(symbol: str) -> Optional[Dict]:
+def get_quote(symbol: str, network: bool = True) -> Optional[Dict]:
     """Get full quote data for a symbol"""
-    return AlphaVantageService.get_quote(symbol)
+    return AlphaVantageService.get_quote(symbol, network=network)
+
+async def get_quote_async(symbol: str, network: bool = True) -> Optional[Dict]:
+    """Get full quote data for a symbol without blocking the event loop"""
+    return await AlphaVantageService.get_quote_async(symbol, network=network)
 
 def search_symbol(query: str) -> List[Dict]:
     """Search for symbols"""
     return AlphaVantageService.search_symbol(query)
 
+async def search_symbol_async(query: str) -> List[Dict]:
+    """Search for symbols without blocking the event loop"""
+    return await AlphaVantageService.search_symbol_async(query)
+
+def quote_cache_stats() -> Dict:
+    """Hit/miss/eviction counters of the shared quote cache"""
+    return quote_cache.stats()
+
 # Market data service instance
 market_data_service = AlphaVantageService()
 
-def update_investment_prices(investments: List) -> List:
-    """Update current prices for a list of investments using Alpha Vantage"""
-    updated_investments = []
+async def _request_quote(symbol: str, max_wait: Optional[float]) -> Tuple[Optional[Dict], bool]:
+    """Network fetch; the flag is False when the local rate limiter skipped it"""
+    try:
+        return await AlphaVantageService._fetch_quote(symbol, max_wait), True
+    except QuoteRateLimited:
+        # Not cached: the next call may get a slot
+        logger.warning(f"Skipping quote for {symbol}: local rate limit reached")
+        return None, False
+
+async def _request_quotes(symbols: List[str], max_wait: Optional[float]) -> List[Tuple[Optional[Dict], bool]]:
+    """Fetch the symbols concurrently over the shared connection pool"""
+    return await asyncio.gather(*(_request_quote(symbol, max_wait) for symbol in symbols))
+
+def _load_stored_quotes(symbols: List[str], max_age_seconds: float) -> Dict[str, Dict]:
+    try:
+        return price_store.load_quotes(symbols, max_age_seconds)
+    except Exception as e:
+        logger.error(f"Error reading stored quotes: {e}")
+        return {}
+
+def _save_stored_quotes(quotes: Dict[str, Dict]):
+    try:
+        price_store.save_quotes(quotes)
+    except Exception as e:
+        logger.error(f"Error storing quotes: {e}")
+
+def _stored_quote_max_age(network: bool) -> float:
+    """
+    Oldest stored quote a caller accepts: callers that may hit the network
+    refresh after MARKET_DATA_CACHE_MINUTES, while network=False callers
+    (which rely on the scheduled refresh) take anything up to
+    PRICE_STALE_HOURS and leave marking it stale to price_freshness
+    """
+    if network:
+        return settings.MARKET_DATA_CACHE_MINUTES * 60
+    return max(settings.PRICE_STALE_HOURS * 3600, settings.MARKET_DATA_CACHE_MINUTES * 60)
+
+def _lookup_local_quotes(symbols: List[str], network: bool = True) -> Tuple[Dict[str, Dict], List[str]]:
+    """Quotes found in the in-process cache or the price store, plus the missing symbols"""
+    quotes = {}
+    pending = []
+    
+    for symbol in symbols:
+        cached = quote_cache.get(('alpha_vantage', symbol))
+        # A cached failure only says the API just failed; an older stored quote still serves network=False
+        if cached is MISSING or (cached is None and not network):
+            pending.append(symbol)
+        else:
+            quotes[symbol] = cached
+    
+    if pending:
+        fresh_for = settings.MARKET_DATA_CACHE_MINUTES * 60
+        stored = _load_stored_quotes(pending, _stored_quote_max_age(network))
+        for symbol, quote in stored.items():
+            quotes[symbol] = quote
+            # Only quotes fresh enough for every caller go to the shared cache
+            ttl = fresh_for - price_store.quote_age_seconds(quote)
+            if ttl > 0:
+                quote_cache.set(('alpha_vantage', symbol), quote, ttl=ttl)
+        pending = [symbol for symbol in pending if symbol not in stored]
+    
+    return quotes, pending
+
+def _remember_quotes(symbols: List[str], results: List[Tuple[Optional[Dict], bool]], quotes: Dict):
+    """Cache fetched quotes (failures briefly) and write the good ones to the price store"""
+    fetched = {}
+    for symbol, (quote, cacheable) in zip(symbols, results):
+        quotes[symbol] = quote
+        if not cacheable:
+            continue
+        quote_cache.set(
+            ('alpha_vantage', symbol), quote,
+            ttl=None if quote else settings.MARKET_DATA_NEGATIVE_CACHE_SECONDS
+        )
+        if quote:
+            fetched[symbol] = quote
+    
+    # One transaction so other workers see the whole batch at once
+    _save_stored_quotes(fetched)
+
+async def _fly(symbols: List[str], max_wait: Optional[float]):
+    """Owner side of a quote flight: fetch, remember and resolve (client loop)"""
+    quotes = {}
+    try:
+        results = await _request_quotes(symbols, max_wait)
+        await asyncio.to_thread(_remember_quotes, symbols, results, quotes)
+    except BaseException as e:
+        quote_flights.fail(symbols, e)
+        raise
+    quote_flights.resolve({symbol: quotes.get(symbol) for symbol in symbols})
+
+def _join_flights(symbols: List[str], max_wait: Optional[float]) -> Dict[str, Future]:
+    """
+    Join the in-flight fetches for the symbols and start one flight for
+    the rest, so concurrent callers share a single request per symbol
+    """
+    flights, owned = quote_flights.claim(symbols)
+    
+    # A flight may have finished between the cache lookup and the claim
+    settled = {}
+    for symbol in owned:
+        cached = quote_cache.get(('alpha_vantage', symbol))
+        if cached is not MISSING:
+            settled[symbol] = cached
+    if settled:
+        quote_flights.resolve(settled)
+    
+    owned = [symbol for symbol in owned if symbol not in settled]
+    if owned:
+        market_client.submit(_fly(owned, max_wait))
+    return flights
+
+def fetch_quotes(
+    symbols: Iterable[str],
+    network: bool = True,
+    max_wait: Optional[float] = settings.MARKET_DATA_MAX_WAIT_SECONDS
+) -> Dict[str, Optional[Dict]]:
+    """
+    Fetch quotes for many symbols at once. Each symbol is looked up in the
+    in-process cache, then in the price store shared by all workers, and
+    only the remaining ones go to the network (unless network=False):
+    duplicates once, concurrently over the shared connection pool and
+    through the shared rate limiter. Concurrent callers asking for the
+    same symbol share one in-flight request. Failures are cached for
+    MARKET_DATA_NEGATIVE_CACHE_SECONDS.
+    """
+    unique_symbols = list(dict.fromkeys(symbol for symbol in symbols if symbol))
+    quotes, pending = _lookup_local_quotes(unique_symbols, network)
+    
+    if pending and network:
+        for symbol, flight in _join_flights(pending, max_wait).items():
+            quotes[symbol] = flight.result()
+    
+    return {symbol: quotes.get(symbol) for symbol in unique_symbols}
+
+async def fetch_quotes_async(
+    symbols: Iterable[str],
+    network: bool = True,
+    max_wait: Optional[float] = settings.MARKET_DATA_MAX_WAIT_SECONDS
+) -> Dict[str, Optional[Dict]]:
+    """
+    Awaitable version of fetch_quotes. The price store is read and written
+    in a worker thread and the API calls run on the market client loop.
+    """
+    unique_symbols = list(dict.fromkeys(symbol for symbol in symbols if symbol))
+    quotes, pending = await asyncio.to_thread(_lookup_local_quotes, unique_symbols, network)
+    
+    if pending and network:
+        flights = _join_flights(pending, max_wait)
+        # Shielded: a cancelled request must not cancel a flight others wait on
+        results = await asyncio.shield(asyncio.gather(*(asyncio.wrap_future(flight) for flight in flights.values())))
+        quotes.update(zip(flights, results))
+    
+    return {symbol: quotes.get(symbol) for symbol in unique_symbols}
+
+def apply_quote(investment, quote: Dict):
+    """Set the current price of an investment and recompute its metrics"""
+    investment.current_price = quote['price']
+    # Quotes served from the price store keep the time they were fetched
+    investment.last_price_update = (
+        datetime.fromisoformat(quote['timestamp']) if quote.get('timestamp') else datetime.now()
+    )
     
-    for investment in investments:
+    # Calculate performance metrics
+    investment.total_invested = (
+        investment.quantity * investment.purchase_price + 
+        (investment.purchase_fees or 0)
+    )
+    investment.current_value = investment.quantity * investment.current_price
+    investment.profit_loss = investment.current_value - investment.total_invested
+    investment.profit_loss_percentage = (
+        (investment.profit_loss / investment.total_invested) * 100
+        if investment.total_invested > 0 else 0
+    )
+
+def _active_investments(investments: List) -> List:
+    return [
+        investment for investment in investments
+        if investment.status is None or investment.status.value == "active"
+    ]
+
+def _apply_quotes(active: List, quotes: Dict[str, Optional[Dict]]):
+    for investment in active:
+        quote_data = quotes.get(investment.symbol)
+        
         try:
-            quote_data = get_quote(investment.symbol)
-            
             if quote_data and quote_data.get('price'):
-                investment.current_price = quote_data['price']
-                investment.last_price_update = datetime.now()
-                
-                # Calculate performance metrics
-                investment.total_invested = (
-                    investment.quantity * investment.purchase_price + 
-                    investment.purchase_fees
-                )
-                investment.current_value = investment.quantity * investment.current_price
-                investment.profit_loss = investment.current_value - investment.total_invested
-                investment.profit_loss_percentage = (
-                    (investment.profit_loss / investment.total_invested) * 100
-                    if investment.total_invested > 0 else 0
-                )
-                
+                apply_quote(investment, quote_data)
                 logger.info(f"Updated price for {investment.symbol}: {investment.current_price}")
             else:
+                # Keep last known price if update fails
                 logger.warning(f"Could not fetch price for {investment.symbol}")
                 
         except Exception as e:
             logger.error(f"Error updating price for {investment.symbol}: {e}")
-        
-        updated_investments.append(investment)
-    
-    return updated_investments
+
+def update_investment_quotes(investments: List) -> Dict[str, Optional[Dict]]:
+    """
+    Update current prices of the active investments and return the quotes
+    by symbol, so callers can reuse them instead of looking them up again
+    """
+    active = _active_investments(investments)
+    quotes = fetch_quotes(investment.symbol for investment in active)
+    _apply_quotes(active, quotes)
+    return quotes
+
+async def update_investment_quotes_async(investments: List) -> Dict[str, Optional[Dict]]:
+    """Awaitable version of update_investment_quotes"""
+    active = _active_investments(investments)
+    quotes = await fetch_quotes_async(investment.symbol for investment in active)
+    _apply_quotes(active, quotes)
+    return quotes
+
+def update_investment_prices(investments: List) -> List:
+    """Update current prices for a list of investments using Alpha Vantage"""
+    update_investment_quotes(investments)
+    return investments
 
 def calculate_portfolio_metrics(investments: List) -> Dict:
     """Calculate overall portfolio metrics"""
@@ -182,3 +533,18 @@ def calculate_portfolio_metrics(investments: List) -> Dict:
         'profit_loss': profit_loss,
         'profit_loss_percentage': profit_loss_percentage
     }
+
+def is_price_stale(last_price_update: Optional[datetime]) -> bool:
+    """True when the stored price is older than PRICE_STALE_HOURS (or missing)"""
+    if last_price_update is None:
+        return True
+    now = datetime.now(last_price_update.tzinfo)
+    return now - last_price_update > timedelta(hours=settings.PRICE_STALE_HOURS)
+
+def price_freshness(investments: List) -> Dict:
+    """Oldest price update among the investments and whether any price is stale"""
+    updates = [inv.last_price_update for inv in investments if inv.last_price_update]
+    return {
+        'prices_updated_at': min(updates) if updates else None,
+        'prices_are_stale': any(is_price_stale(inv.last_price_update) for inv in investments)
+    }
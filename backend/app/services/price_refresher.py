@@ -0,0 +1,73 @@
+from typing import Dict, List
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, case, or_
+from app.config import settings
+from app.database import SessionLocal
+from app.models.investment import Investment, InvestmentStatus
+from app.services.market_data import fetch_quotes, apply_quote
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _active_filter():
+    return or_(Investment.status == InvestmentStatus.ACTIVE, Investment.status.is_(None))
+
+def select_symbols_to_refresh(db: Session, limit: int) -> List[str]:
+    """
+    Distinct symbols held by any user, in refresh priority order: symbols
+    with a holding that never got a price, then the stalest, then the most held
+    """
+    never_priced = func.sum(case((Investment.last_price_update.is_(None), 1), else_=0))
+    rows = db.execute(
+        select(Investment.symbol)
+        .where(_active_filter())
+        .group_by(Investment.symbol)
+        .order_by(
+            never_priced.desc(),
+            func.min(Investment.last_price_update).asc(),
+            func.count(Investment.id).desc(),
+            Investment.symbol
+        )
+        .limit(limit)
+    ).all()
+    return [row.symbol for row in rows]
+
+def refresh_prices(db: Session, max_symbols: int = None) -> Dict:
+    """
+    Refresh the stored price of every active investment for up to
+    `max_symbols` symbols. Waits for rate limiter slots instead of skipping,
+    since it runs outside the request path.
+    """
+    max_symbols = max_symbols or settings.PRICE_REFRESH_MAX_SYMBOLS
+    symbols = select_symbols_to_refresh(db, max_symbols)
+    if not symbols:
+        return {'symbols': 0, 'refreshed': 0, 'investments': 0}
+    
+    quotes = fetch_quotes(symbols, max_wait=None)
+    refreshed = {symbol: quote for symbol, quote in quotes.items() if quote and quote.get('price')}
+    
+    investments = []
+    if refreshed:
+        investments = db.query(Investment).filter(
+            Investment.symbol.in_(refreshed),
+            _active_filter()
+        ).all()
+        for investment in investments:
+            apply_quote(investment, refreshed[investment.symbol])
+        db.commit()
+    
+    missing = [symbol for symbol in symbols if symbol not in refreshed]
+    if missing:
+        logger.warning(f"Could not refresh prices for: {', '.join(missing)}")
+    
+    logger.info(f"Refreshed {len(refreshed)}/{len(symbols)} symbols ({len(investments)} investments)")
+    return {'symbols': len(symbols), 'refreshed': len(refreshed), 'investments': len(investments)}
+
+def run_price_refresh():
+    """Ejecutar cada UPDATE_PRICES_SCHEDULE_HOURS horas"""
+    with SessionLocal() as db:
+        try:
+            refresh_prices(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error refreshing investment prices: {e}")
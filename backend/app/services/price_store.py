@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable
+from sqlalchemy import select
+from app.database import SessionLocal, dialect_insert
+from app.models.price_quote import PriceQuote
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _upsert_statement(db):
+    """INSERT ... ON CONFLICT DO UPDATE replacing the stored quote"""
+    stmt = dialect_insert(db, PriceQuote)
+    return stmt.on_conflict_do_update(
+        index_elements=[PriceQuote.symbol],
+        set_={
+            column: stmt.excluded[column]
+            for column in ('price', 'change', 'change_percent', 'volume', 'previous_close', 'fetched_at')
+        },
+        # Never overwrite a newer quote written by another worker
+        where=PriceQuote.fetched_at <= stmt.excluded.fetched_at
+    )
+
+def _to_quote(row: PriceQuote) -> Dict:
+    return {
+        'symbol': row.symbol,
+        'price': row.price,
+        'change': row.change,
+        'change_percent': row.change_percent,
+        'volume': row.volume,
+        'previous_close': row.previous_close,
+        'timestamp': row.fetched_at.isoformat()
+    }
+
+def load_quotes(symbols: Iterable[str], max_age_seconds: float) -> Dict[str, Dict]:
+    """Stored quotes newer than max_age_seconds, keyed by symbol"""
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+    
+    oldest = datetime.now() - timedelta(seconds=max_age_seconds)
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(PriceQuote).where(
+                PriceQuote.symbol.in_(symbols),
+                PriceQuote.fetched_at >= oldest
+            )
+        ).scalars().all()
+    
+    return {row.symbol: _to_quote(row) for row in rows}
+
+def save_quotes(quotes: Dict[str, Dict], fetched_at: datetime = None):
+    """Write quotes in a single transaction so other workers see all or none"""
+    if not quotes:
+        return
+    
+    fetched_at = fetched_at or datetime.now()
+    rows = [
+        {
+            'symbol': symbol,
+            'price': quote['price'],
+            'change': quote.get('change'),
+            'change_percent': quote.get('change_percent'),
+            'volume': quote.get('volume'),
+            'previous_close': quote.get('previous_close'),
+            'fetched_at': fetched_at
+        }
+        for symbol, quote in quotes.items()
+    ]
+    
+    with SessionLocal() as db:
+        db.execute(_upsert_statement(db), rows)
+        db.commit()
+    
+    logger.info(f"Stored {len(rows)} quotes")
+
+def quote_age_seconds(quote: Dict) -> float:
+    """Seconds since a stored quote was fetched"""
+    return (datetime.now() - datetime.fromisoformat(quote['timestamp'])).total_seconds()
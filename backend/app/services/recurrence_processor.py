@@ -1,12 +1,425 @@
-from datetime import datetime, timedelta
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from time import perf_counter
+from datetime import datetime, date, time, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from dateutil.relativedelta import relativedelta
 from sqlalchemy.orm import Session
-from app.models import Income, Expense, Goal
-from app.database import get_db
+from sqlalchemy import select, update, func
+from sqlalchemy.exc import IntegrityError
+from app.config import settings
+from app.models import Income, IncomeType, Expense, ExpenseFrequency, Goal, User, RecurrenceCheckpoint
+from app.database import SessionLocal, dialect_insert
+from app.services.rollups import add_delta, apply_rollup_deltas, income_category, expense_category, INCOME, EXPENSE
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Máximo de ids por consulta IN (por debajo del límite de parámetros de SQLite)
+_IN_BATCH = 5000
+
+# (user_id_from incluido, user_id_to excluido); None = sin límite
+UserRange = Tuple[Optional[int], Optional[int]]
+
+INCOME_TEMPLATE_COLUMNS = (
+    Income.id,
+    Income.user_id,
+    Income.amount,
+    Income.source,
+    Income.income_type,
+    Income.description,
+    Income.recurrence_type,
+    Income.recurrence_day_option,
+    Income.recurrence_custom_day,
+    Income.recurrence_end_date,
+    Income.next_occurrence
+)
+
+EXPENSE_TEMPLATE_COLUMNS = (
+    Expense.id,
+    Expense.user_id,
+    Expense.budget_id,
+    Expense.amount,
+    Expense.category,
+    Expense.subcategory,
+    Expense.description,
+    Expense.vendor,
+    Expense.frequency,
+    Expense.recurrence_type,
+    Expense.recurrence_day_option,
+    Expense.recurrence_custom_day,
+    Expense.recurrence_end_date,
+    Expense.next_occurrence
+)
+
+# Tipo de recurrencia por defecto de los gastos según su frecuencia
+EXPENSE_RECURRENCE_TYPES = {
+    ExpenseFrequency.WEEKLY: 'weekly',
+    ExpenseFrequency.MONTHLY: 'monthly',
+    ExpenseFrequency.YEARLY: 'yearly'
+}
+
+def due_before(today: date) -> datetime:
+    """Todo lo programado hasta el final de `today` está pendiente"""
+    return datetime.combine(today + timedelta(days=1), time.min)
+
+def _local(moment: Optional[datetime]) -> Optional[datetime]:
+    """
+    Hora local sin zona, como due_before y el resto de la aplicación. Con
+    PostgreSQL las columnas DateTime(timezone=True) se leen con zona y
+    Python no puede compararlas con fechas sin zona
+    """
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
+
+def _in_range(model, user_range: Optional[UserRange]) -> list:
+    if user_range is None:
+        return []
+    first, last = user_range
+    conditions = []
+    if first is not None:
+        conditions.append(model.user_id >= first)
+    if last is not None:
+        conditions.append(model.user_id < last)
+    return conditions
+
+def _due_chunks(
+    db: Session, model, horizon: datetime, chunk_size: int, user_range: Optional[UserRange] = None
+) -> List[array]:
+    """
+    Ids de las plantillas pendientes agrupados en lotes de unas `chunk_size`,
+    sin repartir nunca las plantillas de un usuario entre dos lotes
+    """
+    rows = db.execute(
+        select(model.user_id, model.id)
+        .where(model.is_recurring == True, model.next_occurrence < horizon, *_in_range(model, user_range))
+        .order_by(model.user_id, model.id)
+    )
+
+    chunks = []
+    current = array('q')
+    current_user = None
+    for user_id, template_id in rows:
+        if user_id != current_user and len(current) >= chunk_size:
+            chunks.append(current)
+            current = array('q')
+        current_user = user_id
+        current.append(template_id)
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _load_templates(db: Session, model, columns, ids: array, horizon: datetime) -> Iterator:
+    """Columnas de las plantillas de un lote que siguen pendientes"""
+    for start in range(0, len(ids), _IN_BATCH):
+        yield from db.execute(
+            select(*columns).where(
+                model.id.in_(ids[start:start + _IN_BATCH].tolist()),
+                model.is_recurring == True,
+                model.next_occurrence < horizon
+            )
+        )
+
+def expand_occurrences(template, horizon: datetime) -> Tuple[List[datetime], Optional[datetime]]:
+    """
+    Todas las ocurrencias pendientes de una plantilla (incluidas las
+    atrasadas) y la siguiente fecha programada, o None si la recurrencia
+    ha terminado
+    """
+    occurrences = []
+    occurrence = _local(template.next_occurrence)
+    end = _local(template.recurrence_end_date)
+
+    while occurrence < horizon:
+        if end is not None and occurrence > end:
+            return occurrences, None
+        occurrences.append(occurrence)
+        following = RecurrenceProcessor.calculate_next_occurrence(
+            template.recurrence_type,
+            template.recurrence_day_option,
+            template.recurrence_custom_day,
+            occurrence
+        )
+        if following <= occurrence:
+            logger.warning(f"Recurring template {template.id} cannot advance ({template.recurrence_type}); stopping it")
+            return occurrences, None
+        occurrence = following
+
+    if end is not None and occurrence > end:
+        return occurrences, None
+    return occurrences, occurrence
+
+def _income_copy(template, occurrence: datetime) -> Dict:
+    return {
+        'user_id': template.user_id,
+        'amount': template.amount,
+        'source': template.source,
+        'income_type': template.income_type or IncomeType.SALARY,
+        'description': f"[Automático] {template.description or ''}",
+        'date': occurrence,
+        'is_recurring': False,  # La copia no es recurrente
+        'template_id': template.id,
+        'occurrence_date': occurrence.date()
+    }
+
+def _expense_copy(template, occurrence: datetime) -> Dict:
+    return {
+        'user_id': template.user_id,
+        'budget_id': template.budget_id,
+        'amount': template.amount,
+        'category': template.category,
+        'subcategory': template.subcategory,
+        'description': f"[Automático] {template.description or ''}",
+        'vendor': template.vendor,
+        'frequency': template.frequency,
+        'date': occurrence,
+        'is_recurring': False,  # La copia no es recurrente
+        'template_id': template.id,
+        'occurrence_date': occurrence.date()
+    }
+
+def schedule_new_expenses(db: Session) -> int:
+    """
+    Programa los gastos recurrentes que todavía no tienen next_occurrence
+    (creados desde la API, en lote o importados): el tipo de recurrencia
+    sale de la frecuencia y la primera ocurrencia es un periodo después de
+    su fecha. Las plantillas terminadas tienen last_processed y no se
+    vuelven a programar.
+    """
+    rows = db.execute(
+        select(
+            Expense.id,
+            Expense.frequency,
+            Expense.date,
+            Expense.recurrence_type,
+            Expense.recurrence_day_option,
+            Expense.recurrence_custom_day
+        ).where(
+            Expense.is_recurring == True,
+            Expense.next_occurrence.is_(None),
+            Expense.last_processed.is_(None)
+        )
+    )
+
+    schedule = []
+    for row in rows:
+        recurrence_type = row.recurrence_type or EXPENSE_RECURRENCE_TYPES.get(row.frequency, 'monthly')
+        schedule.append({
+            'id': row.id,
+            'recurrence_type': recurrence_type,
+            'next_occurrence': RecurrenceProcessor.calculate_next_occurrence(
+                recurrence_type, row.recurrence_day_option, row.recurrence_custom_day, row.date
+            )
+        })
+
+    if schedule:
+        db.execute(update(Expense), schedule)
+        db.commit()
+    return len(schedule)
+
+# Campos de un gasto que cambian su programación
+EXPENSE_SCHEDULE_FIELDS = {
+    'is_recurring', 'frequency', 'date', 'recurrence_type', 'recurrence_day_option', 'recurrence_custom_day'
+}
+
+def reschedule_expense(expense, changes: Dict) -> Dict:
+    """
+    Vuelve a programar un gasto editado si `changes` toca su recurrencia y
+    devuelve los campos recalculados (vacío si no cambia nada). Si cambia
+    la frecuencia sin indicar recurrence_type, el tipo sale de la nueva
+    frecuencia. La siguiente ocurrencia es un periodo después de su fecha,
+    como en schedule_new_expenses, sin repetir las que ya se generaron
+    hasta last_processed.
+    """
+    if not EXPENSE_SCHEDULE_FIELDS & changes.keys():
+        return {}
+    if not expense.is_recurring:
+        expense.next_occurrence = None
+        return {'next_occurrence': None}
+
+    if not expense.recurrence_type or ('frequency' in changes and 'recurrence_type' not in changes):
+        expense.recurrence_type = EXPENSE_RECURRENCE_TYPES.get(expense.frequency, 'monthly')
+
+    def following(current: datetime) -> datetime:
+        return RecurrenceProcessor.calculate_next_occurrence(
+            expense.recurrence_type, expense.recurrence_day_option, expense.recurrence_custom_day, current
+        )
+
+    occurrence = following(expense.date)
+    if expense.last_processed is not None:
+        while occurrence.date() <= expense.last_processed.date():
+            later = following(occurrence)
+            if later <= occurrence:
+                break
+            occurrence = later
+
+    expense.next_occurrence = occurrence
+    return {'recurrence_type': expense.recurrence_type, 'next_occurrence': occurrence}
+
+def _insert_new_statement(db: Session, model):
+    """
+    INSERT ... ON CONFLICT DO NOTHING sobre (template_id, occurrence_date)
+    que devuelve la clave de las filas realmente insertadas
+    """
+    table = model.__table__
+    return dialect_insert(db, table).on_conflict_do_nothing(
+        index_elements=[table.c.template_id, table.c.occurrence_date]
+    ).returning(table.c.template_id, table.c.occurrence_date)
+
+def generate_occurrences(
+    db: Session,
+    model,
+    kind: str,
+    columns,
+    make_copy: Callable,
+    category_of: Callable,
+    today: date,
+    user_range: Optional[UserRange] = None
+) -> Dict[str, int]:
+    """
+    Genera todas las ocurrencias pendientes de las plantillas de `model`
+    hasta hoy (solo las de `user_range` si se indica). Cada lote de RECURRENCE_CHUNK_SIZE plantillas (agrupadas por
+    usuario) es una transacción: un insert masivo de las copias, una
+    actualización masiva de next_occurrence y un upsert de los totales
+    mensuales. Si un lote falla se deshace solo ese lote.
+
+    Las copias llevan la clave única (template_id, occurrence_date): las que
+    ya existen (otra ejecución simultánea o un reintento) se ignoran y no
+    cuentan en los totales mensuales.
+    """
+    horizon = due_before(today)
+    processed_at = datetime.combine(today, time.min)
+    stats = {'templates': 0, 'generated': 0, 'failed_templates': 0}
+
+    for ids in _due_chunks(db, model, horizon, settings.RECURRENCE_CHUNK_SIZE, user_range):
+        copies = []
+        templates = {}
+        schedule = []
+        deltas = {}
+        inserted = []
+
+        try:
+            for template in _load_templates(db, model, columns, ids, horizon):
+                occurrences, next_occurrence = expand_occurrences(template, horizon)
+                templates[template.id] = template
+                copies.extend(make_copy(template, occurrence) for occurrence in occurrences)
+                schedule.append({'id': template.id, 'next_occurrence': next_occurrence, 'last_processed': processed_at})
+
+            if copies:
+                inserted = db.execute(_insert_new_statement(db, model), copies).all()
+            for template_id, occurrence_date in inserted:
+                template = templates[template_id]
+                add_delta(deltas, template.user_id, kind, category_of(template), occurrence_date, template.amount)
+            if schedule:
+                db.execute(update(model), schedule)
+            apply_rollup_deltas(db, deltas)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            stats['failed_templates'] += len(ids)
+            logger.error(f"Error generating recurring {kind} occurrences for templates {ids[0]}-{ids[-1]}: {e}")
+            continue
+
+        stats['templates'] += len(schedule)
+        stats['generated'] += len(inserted)
+
+    return stats
+
+def plan_shards(db: Session, run_date: date, shards: int) -> List[Tuple[int, Optional[int], Optional[int]]]:
+    """
+    Shards pendientes del día como (shard, user_id_from, user_id_to). La
+    primera ejecución reparte los usuarios en `shards` rangos de tamaño
+    parecido y guarda un checkpoint por rango; las siguientes reutilizan
+    los mismos rangos y devuelven solo los que no terminaron
+    """
+    checkpoints = db.query(RecurrenceCheckpoint).filter(
+        RecurrenceCheckpoint.run_date == run_date
+    ).order_by(RecurrenceCheckpoint.shard).all()
+
+    if not checkpoints:
+        users = db.scalar(select(func.count()).select_from(User))
+        bounds = []
+        for k in range(1, max(shards, 1)):
+            bound = db.scalar(select(User.id).order_by(User.id).offset(users * k // shards).limit(1))
+            if bound is not None and (not bounds or bound > bounds[-1]):
+                bounds.append(bound)
+        # El primer y el último rango están abiertos: cubren cualquier usuario nuevo
+        edges = [None, *bounds, None]
+        checkpoints = [
+            RecurrenceCheckpoint(
+                run_date=run_date, shard=shard, user_id_from=edges[shard], user_id_to=edges[shard + 1],
+                status="pending", templates=0, generated=0, failed_templates=0
+            )
+            for shard in range(len(edges) - 1)
+        ]
+        db.add_all(checkpoints)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Otra ejecución ha creado los checkpoints del día a la vez
+            db.rollback()
+            return plan_shards(db, run_date, shards)
+
+    return [
+        (checkpoint.shard, checkpoint.user_id_from, checkpoint.user_id_to)
+        for checkpoint in checkpoints if checkpoint.status != "done"
+    ]
+
+def process_shard(run_date: date, shard: int, user_id_from: Optional[int], user_id_to: Optional[int]) -> Dict:
+    """
+    Ingresos y gastos recurrentes de un rango de usuarios con su propia
+    sesión (se ejecuta en un proceso del pool). Cada lote hace commit por
+    separado y al final se actualiza el checkpoint del shard; con lotes
+    fallidos queda como "failed" y se repite en la siguiente ejecución
+    """
+    started = perf_counter()
+    user_range = (user_id_from, user_id_to)
+    stats = {'templates': 0, 'generated': 0, 'failed_templates': 0}
+
+    with SessionLocal() as db:
+        for model, kind, columns, make_copy, category_of in RECURRING_MODELS:
+            result = generate_occurrences(db, model, kind, columns, make_copy, category_of, run_date, user_range)
+            for key in stats:
+                stats[key] += result[key]
+
+        elapsed = perf_counter() - started
+        db.execute(
+            update(RecurrenceCheckpoint)
+            .where(RecurrenceCheckpoint.run_date == run_date, RecurrenceCheckpoint.shard == shard)
+            .values(
+                status="failed" if stats['failed_templates'] else "done",
+                elapsed_seconds=round(elapsed, 3),
+                finished_at=datetime.now(),
+                **stats
+            )
+        )
+        db.commit()
+
+    return {'shard': shard, 'user_id_from': user_id_from, 'user_id_to': user_id_to, 'elapsed': elapsed, **stats}
+
+def _run_shards(run_date: date, shards: List[Tuple]) -> Iterator[Optional[Dict]]:
+    """
+    Resultado de cada shard a medida que termina (None si el proceso ha
+    fallado); en paralelo si hay más de un worker
+    """
+    workers = min(settings.RECURRENCE_WORKERS, len(shards))
+    if workers <= 1:
+        for shard in shards:
+            yield process_shard(run_date, *shard)
+        return
+
+    # spawn: el scheduler tiene hilos y conexiones abiertas que no deben copiarse con fork
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        futures = {pool.submit(process_shard, run_date, *shard): shard for shard in shards}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                logger.error(f"Recurrence shard {futures[future][0]} crashed: {e}")
+                yield None
+
 class RecurrenceProcessor:
     """Procesa transacciones recurrentes automáticamente"""
     
@@ -31,61 +444,31 @@ class RecurrenceProcessor:
     
     @staticmethod
     def process_recurring_incomes(db: Session, today):
-        """Procesa ingresos recurrentes"""
-        incomes = db.query(Income).filter(
-            Income.is_recurring == True,
-            Income.next_occurrence <= today
-        ).all()
-        
-        for income in incomes:
-            # Crear nueva instancia del ingreso
-            new_income = Income(
-                user_id=income.user_id,
-                amount=income.amount,
-                source=income.source,
-                income_type=income.income_type,
-                description=f"[Automático] {income.description or ''}",
-                date=income.next_occurrence,
-                is_recurring=False  # La copia no es recurrente
-            )
-            db.add(new_income)
-            
-            # Calcular próxima ocurrencia
-            income.next_occurrence = RecurrenceProcessor.calculate_next_occurrence(
-                income.recurrence_type,
-                income.recurrence_day_option,
-                income.recurrence_custom_day,
-                income.next_occurrence
-            )
-            income.last_processed = today
-            
-            logger.info(f"Processed recurring income {income.id} for user {income.user_id}")
+        """Procesa ingresos recurrentes, incluidas las ocurrencias atrasadas"""
+        started = perf_counter()
+        stats = generate_occurrences(
+            db, Income, INCOME, INCOME_TEMPLATE_COLUMNS, _income_copy, income_category, today
+        )
+        logger.info(
+            f"Processed {stats['templates']} recurring incomes: {stats['generated']} incomes generated, "
+            f"{stats['failed_templates']} templates failed ({perf_counter() - started:.1f}s)"
+        )
+        return stats
     
     @staticmethod
     def process_recurring_expenses(db: Session, today):
-        """Procesa gastos recurrentes"""
-        expenses = db.query(Expense).filter(
-            Expense.is_recurring == True,
-            # Assuming next_occurrence field exists, if not, this would need to be adjusted
-        ).all()
-        
-        for expense in expenses:
-            # Create new expense instance
-            new_expense = Expense(
-                user_id=expense.user_id,
-                budget_id=expense.budget_id,
-                amount=expense.amount,
-                category=expense.category,
-                subcategory=expense.subcategory,
-                description=f"[Automático] {expense.description or ''}",
-                vendor=expense.vendor,
-                frequency=expense.frequency,
-                is_recurring=False,  # The copy is not recurring
-                date=today
-            )
-            db.add(new_expense)
-            
-            logger.info(f"Processed recurring expense {expense.id} for user {expense.user_id}")
+        """Procesa gastos recurrentes, incluidas las ocurrencias atrasadas"""
+        started = perf_counter()
+        scheduled = schedule_new_expenses(db)
+        stats = generate_occurrences(
+            db, Expense, EXPENSE, EXPENSE_TEMPLATE_COLUMNS, _expense_copy, expense_category, today
+        )
+        logger.info(
+            f"Processed {stats['templates']} recurring expenses ({scheduled} newly scheduled): "
+            f"{stats['generated']} expenses generated, {stats['failed_templates']} templates failed "
+            f"({perf_counter() - started:.1f}s)"
+        )
+        return stats
     
     @staticmethod
     def process_goal_contributions(db: Session, today):
@@ -127,14 +510,55 @@ class RecurrenceProcessor:
                 except ValueError:
                     # Si el día no existe en el mes, usar el último día
                     return next_month + relativedelta(day=31)
+            # salary_day o sin opción: mismo día del mes siguiente
+            return next_month
         elif recurrence_type == 'yearly':
             return current_date + relativedelta(years=1)
         
         return current_date
 
+RECURRING_MODELS = (
+    (Income, INCOME, INCOME_TEMPLATE_COLUMNS, _income_copy, income_category),
+    (Expense, EXPENSE, EXPENSE_TEMPLATE_COLUMNS, _expense_copy, expense_category),
+)
+
 # Crear tarea programada (usar con Celery o APScheduler)
-def run_daily_processing():
-    """Ejecutar diariamente a las 00:01"""
-    with next(get_db()) as db:
-        processor = RecurrenceProcessor()
-        processor.process_all_recurring(db)
\ No newline at end of file
+def run_daily_processing(today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Ejecutar diariamente a las 00:01. Las transacciones recurrentes se
+    reparten en RECURRENCE_SHARDS rangos de user_id procesados en paralelo
+    por RECURRENCE_WORKERS procesos; si se relanza el mismo día solo se
+    procesan los shards que no terminaron
+    """
+    today = today or datetime.now().date()
+    started = perf_counter()
+
+    with SessionLocal() as db:
+        schedule_new_expenses(db)
+        shards = plan_shards(db, today, settings.RECURRENCE_SHARDS)
+
+    totals = {'shards': len(shards), 'failed_shards': 0, 'templates': 0, 'generated': 0, 'failed_templates': 0}
+    for result in _run_shards(today, shards):
+        if result is None or result['failed_templates']:
+            totals['failed_shards'] += 1
+        if result is None:
+            continue
+        for key in ('templates', 'generated', 'failed_templates'):
+            totals[key] += result[key]
+        logger.info(
+            f"Recurrence shard {result['shard']} (users {result['user_id_from']}-{result['user_id_to']}): "
+            f"{result['templates']} templates, {result['generated']} generated, "
+            f"{result['failed_templates']} failed ({result['elapsed']:.1f}s)"
+        )
+
+    with SessionLocal() as db:
+        RecurrenceProcessor.process_goal_contributions(db, today)
+        RecurrenceProcessor.update_budget_rollovers(db, today)
+        db.commit()
+
+    logger.info(
+        f"Daily processing for {today}: {totals['shards']} shards ({totals['failed_shards']} failed), "
+        f"{totals['templates']} templates, "
+        f"{totals['generated']} generated, {totals['failed_templates']} failed ({perf_counter() - started:.1f}s)"
+    )
+    return totals
@@ -0,0 +1,188 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, insert, func, extract, literal, case, type_coerce, String
+from app.models.income import Income, IncomeType
+from app.models.expense import Expense, ExpenseCategory
+from app.models.monthly_rollup import MonthlyRollup
+from app.database import dialect_insert
+import logging
+
+logger = logging.getLogger(__name__)
+
+INCOME = "income"
+EXPENSE = "expense"
+
+# Enum columns are stored by member name; map them back to the public values
+CATEGORY_VALUES = {
+    INCOME: {member.name: member.value for member in IncomeType},
+    EXPENSE: {member.name: member.value for member in ExpenseCategory},
+}
+
+# (user_id, year, month, kind, category) -> [amount, count]
+RollupDeltas = Dict[Tuple[int, int, int, str, str], List]
+
+def _upsert_statement(db: Session):
+    """INSERT ... ON CONFLICT DO UPDATE that adds to the existing bucket"""
+    stmt = dialect_insert(db, MonthlyRollup)
+    return stmt.on_conflict_do_update(
+        index_elements=[
+            MonthlyRollup.user_id,
+            MonthlyRollup.year,
+            MonthlyRollup.month,
+            MonthlyRollup.kind,
+            MonthlyRollup.category
+        ],
+        set_={
+            'total': MonthlyRollup.total + stmt.excluded.total,
+            'count': MonthlyRollup.count + stmt.excluded.count
+        }
+    )
+
+def add_delta(
+    deltas: RollupDeltas,
+    user_id: int,
+    kind: str,
+    category: str,
+    when: datetime,
+    amount: float,
+    count: int = 1
+) -> RollupDeltas:
+    """Accumulate a change for the (user, month, kind, category) bucket"""
+    bucket = deltas.setdefault((user_id, when.year, when.month, kind, category), [0.0, 0])
+    bucket[0] += amount
+    bucket[1] += count
+    return deltas
+
+def income_category(income) -> str:
+    """Rollup category for an income"""
+    return IncomeType(income.income_type or IncomeType.SALARY).value
+
+def expense_category(expense) -> str:
+    """Rollup category for an expense"""
+    return ExpenseCategory(expense.category).value
+
+def apply_rollup_deltas(db: Session, deltas: RollupDeltas):
+    """Apply accumulated deltas in one executemany upsert (caller commits)"""
+    rows = [
+        {
+            'user_id': user_id,
+            'year': year,
+            'month': month,
+            'kind': kind,
+            'category': category,
+            'total': amount,
+            'count': count
+        }
+        for (user_id, year, month, kind, category), (amount, count) in deltas.items()
+        if amount or count
+    ]
+    if not rows:
+        return
+
+    db.execute(_upsert_statement(db), rows)
+
+    # Drop buckets left without transactions after deletes/moves
+    if any(row['count'] < 0 for row in rows):
+        user_ids = {row['user_id'] for row in rows}
+        db.execute(
+            delete(MonthlyRollup).where(
+                MonthlyRollup.user_id.in_(user_ids),
+                MonthlyRollup.count <= 0
+            )
+        )
+
+def track_income(db: Session, income: Income, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) an income from the rollups"""
+    deltas = add_delta({}, income.user_id, INCOME, income_category(income), income.date, sign * income.amount, sign)
+    apply_rollup_deltas(db, deltas)
+
+def track_expense(db: Session, expense: Expense, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) an expense from the rollups"""
+    deltas = add_delta({}, expense.user_id, EXPENSE, expense_category(expense), expense.date, sign * expense.amount, sign)
+    apply_rollup_deltas(db, deltas)
+
+def _grouped_select(model, kind: str, category_column, enum_cls, user_id: Optional[int]):
+    year = extract('year', model.date)
+    month = extract('month', model.date)
+    # Enum columns hold the member name; rollups store the public value
+    category = case(
+        {member.name: member.value for member in enum_cls},
+        value=type_coerce(category_column, String),
+        else_=type_coerce(category_column, String)
+    )
+
+    query = (
+        select(
+            model.user_id,
+            year,
+            month,
+            literal(kind),
+            category,
+            func.sum(model.amount),
+            func.count(model.id)
+        )
+        .group_by(model.user_id, year, month, category_column)
+    )
+    if user_id is not None:
+        query = query.where(model.user_id == user_id)
+    return query
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None):
+    """Recreate the rollups from the raw incomes/expenses (caller commits)"""
+    cleanup = delete(MonthlyRollup)
+    if user_id is not None:
+        cleanup = cleanup.where(MonthlyRollup.user_id == user_id)
+    db.execute(cleanup)
+
+    columns = ['user_id', 'year', 'month', 'kind', 'category', 'total', 'count']
+    for model, kind, category_column, enum_cls in (
+        (Income, INCOME, Income.income_type, IncomeType),
+        (Expense, EXPENSE, Expense.category, ExpenseCategory)
+    ):
+        db.execute(
+            insert(MonthlyRollup).from_select(
+                columns,
+                _grouped_select(model, kind, category_column, enum_cls, user_id)
+            )
+        )
+
+    logger.info(f"Rebuilt monthly rollups for {'all users' if user_id is None else f'user {user_id}'}")
+
+def ensure_rollups(db: Session):
+    """Build the rollups once for databases created before the table existed"""
+    has_rollups = db.execute(select(MonthlyRollup.user_id).limit(1)).first() is not None
+    has_transactions = (
+        db.execute(select(Income.id).limit(1)).first() is not None
+        or db.execute(select(Expense.id).limit(1)).first() is not None
+    )
+
+    if not has_rollups and has_transactions:
+        rebuild_rollups(db)
+        db.commit()
+
+def fetch_rollups(
+    db: Session,
+    user_id: int,
+    kind: Optional[str] = None,
+    year: Optional[int] = None,
+    month: Optional[int] = None
+) -> List:
+    """Rollup rows (kind, category, year, month, total, count) for a user"""
+    query = select(
+        MonthlyRollup.kind,
+        MonthlyRollup.category,
+        MonthlyRollup.year,
+        MonthlyRollup.month,
+        MonthlyRollup.total,
+        MonthlyRollup.count
+    ).where(MonthlyRollup.user_id == user_id)
+
+    if kind:
+        query = query.where(MonthlyRollup.kind == kind)
+    if year:
+        query = query.where(MonthlyRollup.year == year)
+    if month:
+        query = query.where(MonthlyRollup.month == month)
+
+    return db.execute(query.order_by(MonthlyRollup.year, MonthlyRollup.month)).all()
@@ -0,0 +1,206 @@
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from uuid import uuid4
+from apscheduler.schedulers.background import BackgroundScheduler
+from sqlalchemy import update, or_, case
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal, dialect_insert
+from app.models.scheduler_lease import SchedulerLease
+from app.services.recurrence_processor import run_daily_processing
+from app.services.price_refresher import run_price_refresh
+import logging
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "scheduler"
+
+def _utcnow() -> datetime:
+    # Naive UTC, comparable with the stored expires_at whatever the server timezone
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _insert_missing_statement(db: Session):
+    """INSERT ... ON CONFLICT DO NOTHING for the lease row"""
+    lease = SchedulerLease.__table__
+    return dialect_insert(db, lease).on_conflict_do_nothing(index_elements=[lease.c.name])
+
+def try_acquire_lease(db: Session, name: str, holder: str, lease_seconds: float) -> bool:
+    """
+    Take or renew the lease in one conditional UPDATE: it succeeds if
+    `holder` already has it or the current one has expired. Returns True if
+    `holder` is the leader until now + lease_seconds.
+    """
+    lease = SchedulerLease.__table__
+    for _ in range(2):
+        now = _utcnow()
+        result = db.execute(
+            update(lease)
+            .where(
+                lease.c.name == name,
+                or_(lease.c.holder == holder, lease.c.expires_at <= now)
+            )
+            .values(
+                holder=holder,
+                expires_at=now + timedelta(seconds=lease_seconds),
+                heartbeat_at=now,
+                acquired_at=case((lease.c.holder == holder, lease.c.acquired_at), else_=now)
+            )
+        )
+        if result.rowcount:
+            db.commit()
+            return True
+
+        # First run against this database: create the row already expired and retry
+        created = db.execute(_insert_missing_statement(db), {'name': name, 'holder': None, 'expires_at': now})
+        db.commit()
+        if not created.rowcount:
+            return False
+    return False
+
+def release_lease(db: Session, name: str, holder: str):
+    """Expire the lease now so another worker takes over on its next heartbeat"""
+    lease = SchedulerLease.__table__
+    db.execute(
+        update(lease)
+        .where(lease.c.name == name, lease.c.holder == holder)
+        .values(expires_at=_utcnow())
+    )
+    db.commit()
+
+def read_lease(db: Session, name: str) -> Optional[SchedulerLease]:
+    """Current lease row, or None before any worker has tried to take it"""
+    return db.get(SchedulerLease, name)
+
+def build_scheduler() -> BackgroundScheduler:
+    """APScheduler with the app's jobs, not started"""
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(
+        func=run_daily_processing,
+        trigger="cron",
+        hour=0,
+        minute=1,
+        id="process_recurring_transactions",
+        name="Process recurring transactions",
+        replace_existing=True,
+        # A worker that takes over after the leader died still runs tonight's job
+        misfire_grace_time=3600,
+        coalesce=True
+    )
+    if settings.ENABLE_SCHEDULED_TASKS:
+        # Prices are refreshed here so request handlers only read stored values
+        scheduler.add_job(
+            func=run_price_refresh,
+            trigger="interval",
+            hours=settings.UPDATE_PRICES_SCHEDULE_HOURS,
+            next_run_time=datetime.now(),
+            id="refresh_investment_prices",
+            name="Refresh investment prices",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            # The first run (and any run missed while paused) still happens when a follower takes over
+            misfire_grace_time=settings.UPDATE_PRICES_SCHEDULE_HOURS * 3600
+        )
+    return scheduler
+
+class SchedulerCoordinator:
+    """
+    Runs the scheduled jobs in exactly one process.
+
+    Every worker starts its scheduler paused plus a heartbeat thread that
+    tries to take or renew the lease row. Only the holder resumes its
+    scheduler; when the leader stops renewing (crash, shutdown), another
+    worker takes the lease once it expires and resumes its own jobs.
+    """
+
+    def __init__(self, scheduler: BackgroundScheduler, name: str, lease_seconds: float, heartbeat_seconds: float):
+        self.scheduler = scheduler
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.is_leader = False
+        self._lease_valid_until = 0.0  # time.monotonic() deadline of our last renewal
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the scheduler paused and the heartbeat thread"""
+        if self._thread is not None:
+            return
+        self.scheduler.start(paused=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scheduler-lease", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self.heartbeat()
+            if self._stop.wait(self.heartbeat_seconds):
+                return
+
+    def heartbeat(self):
+        """Try to take or renew the lease and pause/resume the jobs accordingly"""
+        started = time.monotonic()
+        try:
+            with SessionLocal() as db:
+                leader = try_acquire_lease(db, self.name, self.holder, self.lease_seconds)
+            if leader:
+                self._lease_valid_until = started + self.lease_seconds
+        except Exception as e:
+            # A busy database must not stop the jobs while our lease is still valid
+            leader = self.is_leader and time.monotonic() < self._lease_valid_until - self.heartbeat_seconds
+            logger.warning(f"Scheduler lease heartbeat failed: {e}")
+
+        if leader and not self.is_leader:
+            self.scheduler.resume()
+            logger.info(f"Scheduler lease acquired by {self.holder}: running scheduled jobs")
+        elif not leader and self.is_leader:
+            self.scheduler.pause()
+            logger.warning(f"Scheduler lease lost by {self.holder}: scheduled jobs paused")
+        self.is_leader = leader
+
+    def stop(self):
+        """Stop the heartbeat and the scheduler and hand the lease over"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.scheduler.shutdown()
+
+        if self.is_leader:
+            try:
+                with SessionLocal() as db:
+                    release_lease(db, self.name, self.holder)
+            except Exception as e:
+                logger.warning(f"Could not release the scheduler lease: {e}")
+            self.is_leader = False
+
+    def status(self) -> Dict:
+        """Leader according to the lease row, plus this process's own view"""
+        current = {'holder': None, 'expires_at': None, 'valid': False}
+        try:
+            with SessionLocal() as db:
+                lease = read_lease(db, self.name)
+            if lease is not None:
+                current = {
+                    'holder': lease.holder,
+                    'expires_at': lease.expires_at,
+                    'valid': lease.holder is not None and lease.expires_at > _utcnow()
+                }
+        except Exception as e:
+            logger.warning(f"Could not read the scheduler lease: {e}")
+        return {**current, 'instance': self.holder, 'is_leader': self.is_leader}
+
+# Shared by the app; started and stopped from the FastAPI lifespan
+scheduler_coordinator = SchedulerCoordinator(
+    build_scheduler(),
+    LEASE_NAME,
+    settings.SCHEDULER_LEASE_SECONDS,
+    settings.SCHEDULER_HEARTBEAT_SECONDS
+)
@@ -1,18 +1,30 @@
 
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy import update
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from app.config import settings
-from app.database import get_db
+from app.database import AsyncSessionLocal
 from app.models.user import User
 from app.schemas.user import TokenData
+from app.utils.cache import user_cache, token_cache, MISSING
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# token_cache value for tokens that must be rejected without decoding them again
+REVOKED = object()
+
+# Password hashing; hashes with a different cost are flagged for rehash on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -25,6 +37,45 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+class HashingPool:
+    """
+    Dedicated, bounded thread pool for bcrypt (the bcrypt module releases the
+    GIL while hashing). At most `workers + queue_size` calls are in flight;
+    beyond that callers get a 429 instead of piling up, so a login storm
+    cannot starve the threadpool that serves the sync data routes.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="password-hashing")
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max(queue_size, 0))
+        self.rejected = 0
+
+    async def run(self, func: Callable, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Demasiadas peticiones de autenticación, inténtalo de nuevo en unos segundos",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+hashing_pool = HashingPool(settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_QUEUE_SIZE)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new_hash) on the hashing pool; new_hash is set when the stored cost is outdated"""
+    return await hashing_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate password hash on the hashing pool"""
+    return await hashing_pool.run(pwd_context.hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -37,36 +88,140 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str, credentials_exception) -> TokenData:
-    """Verify JWT token and return token data"""
+def create_user_access_token(user: User, expires_delta: Optional[timedelta] = None) -> str:
+    """Access token carrying the user id, token version and active flag"""
+    return create_access_token(
+        data={
+            "sub": user.username,
+            "uid": user.id,
+            "ver": user.token_version or 0,
+            "active": bool(user.is_active)
+        },
+        expires_delta=expires_delta
+    )
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def _seconds_until(exp: Optional[float]) -> Optional[float]:
+    return None if exp is None else exp - time.time()
+
+def decode_token(token: str, credentials_exception) -> TokenData:
+    """Verify the JWT signature and expiry and parse its claims"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(
+            username=username,
+            user_id=payload.get("uid"),
+            version=payload.get("ver"),
+            active=payload.get("active"),
+            exp=payload.get("exp")
+        )
         return token_data
     except JWTError:
         raise credentials_exception
 
+def verify_token(token: str, credentials_exception) -> TokenData:
+    """
+    Verify JWT token and return token data. Verified claims are kept in
+    token_cache (keyed by the token's sha256) until the token expires, so a
+    resent token skips the HMAC check and claims parsing.
+    """
+    key = _token_key(token)
+    token_data = token_cache.get(key)
+    if token_data is REVOKED:
+        raise credentials_exception
+    if token_data is not MISSING:
+        return token_data
+
+    token_data = decode_token(token, credentials_exception)
+    ttl = _seconds_until(token_data.exp)
+    if ttl is None or ttl > 0:
+        token_cache.set(key, token_data, ttl)
+    return token_data
+
+def revoke_token(token: str, token_data: Optional[TokenData] = None):
+    """Reject `token` in this process until it expires, without decoding it again"""
+    ttl = _seconds_until(token_data.exp if token_data else None)
+    if ttl is None or ttl > 0:
+        token_cache.set(_token_key(token), REVOKED, ttl)
+
 def get_user(db: Session, username: str) -> Optional[User]:
-    """Get user by username or email"""
-    return db.query(User).filter(
-        (User.username == username) | (User.email == username)
-    ).first()
-
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-    """Authenticate user with username/email and password"""
-    user = get_user(db, username)
-    if not user or not verify_password(password, user.hashed_password):
+    """Get user by username or email (two lookups, each on its unique index)"""
+    user = db.query(User).filter(User.username == username).first()
+    if user is None:
+        user = db.query(User).filter(User.email == username).first()
+    return user
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Read-only snapshot of the authenticated user, shared through user_cache"""
+    id: int
+    email: str
+    username: str
+    full_name: Optional[str]
+    is_active: bool
+    is_superuser: bool
+    token_version: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            full_name=user.full_name,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+            token_version=user.token_version or 0,
+            created_at=user.created_at,
+            updated_at=user.updated_at
+        )
+
+def _cache_user(user: Optional[User]) -> Optional[CurrentUser]:
+    if user is None:
+        return None
+    current = CurrentUser.from_user(user)
+    user_cache.set(current.id, current)
+    return current
+
+def invalidate_cached_user(user_id: int):
+    """Drop a user from this process' cache after it changes or is deleted"""
+    user_cache.delete(user_id)
+
+async def authenticate_user_async(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    """
+    Authenticate user with username/email and password, verifying on the
+    hashing pool. A hash with an outdated cost is replaced transparently.
+    """
+    user = await db.run_sync(get_user, username)
+    if not user:
+        return None
+    # Give the connection back to the pool while bcrypt runs; close() keeps the loaded attributes
+    await db.close()
+    valid, new_hash = await verify_password_async(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        await db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
+        await db.commit()
     return user
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token"""
+    token: str = Depends(oauth2_scheme)
+) -> CurrentUser:
+    """
+    Get current authenticated user from JWT token. Tokens with uid/ver are
+    resolved from the process-local user cache, so a hit never touches the
+    users table; a miss opens a short async session of its own, so the
+    lookup doesn't block the event loop and async routes don't need the
+    sync get_db dependency (and its threadpool hop).
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
@@ -74,9 +229,32 @@ async def get_current_user(
     )
     
     token_data = verify_token(token, credentials_exception)
-    user = get_user(db, username=token_data.username)
+    
+    if token_data.active is False:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Usuario inactivo"
+        )
+    
+    if token_data.user_id is not None:
+        user = user_cache.get(token_data.user_id, None)
+        if user is None or user.token_version != token_data.version:
+            # Miss, or a version change the cache may not have seen yet
+            async with AsyncSessionLocal() as db:
+                user = _cache_user(await db.get(User, token_data.user_id))
+        if user is not None and user.token_version != token_data.version:
+            revoke_token(token, token_data)
+            raise credentials_exception
+    else:
+        # Tokens issued before uid/ver stay valid until the first revocation
+        async with AsyncSessionLocal() as db:
+            user = _cache_user(await db.run_sync(get_user, token_data.username))
+        if user is not None and user.token_version != 0:
+            revoke_token(token, token_data)
+            raise credentials_exception
     
     if user is None:
+        revoke_token(token, token_data)
         raise credentials_exception
     
     if not user.is_active:
@@ -88,8 +266,8 @@ async def get_current_user(
     return user
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: CurrentUser = Depends(get_current_user)
+) -> CurrentUser:
     """Ensure current user is active"""
     if not current_user.is_active:
         raise HTTPException(
@@ -99,8 +277,8 @@ async def get_current_active_user(
     return current_user
 
 async def get_current_superuser(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: CurrentUser = Depends(get_current_user)
+) -> CurrentUser:
     """Ensure current user is superuser"""
     if not current_user.is_superuser:
         raise HTTPException(
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from app.config import settings
+
+# Returned by TTLCache.get on a miss, so None can be cached as a value
+MISSING = object()
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-entry time to live.
+    When full, the least recently used entry is evicted.
+    """
+    
+    def __init__(self, maxsize: int, default_ttl: float):
+        self.maxsize = max(maxsize, 1)
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Cached value, or `default` if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value for `ttl` seconds (default_ttl when omitted)"""
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def clear_namespace(self, namespace: Hashable) -> int:
+        """Drop the entries whose key is a (namespace, ...) tuple; returns how many"""
+        with self._lock:
+            keys = [key for key in self._data if isinstance(key, tuple) and key and key[0] == namespace]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+# Shared by the Alpha Vantage and yfinance services (keys are (provider, symbol))
+quote_cache = TTLCache(
+    maxsize=settings.MARKET_DATA_CACHE_SIZE,
+    default_ttl=settings.MARKET_DATA_CACHE_MINUTES * 60
+)
+
+# Authenticated users of this process (keys are user ids), see app.utils.auth
+user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_SIZE,
+    default_ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+# Verified JWT claims of this process (keys are sha256 of the token), see app.utils.auth
+token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    default_ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
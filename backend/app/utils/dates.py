@@ -0,0 +1,41 @@
+from datetime import datetime, date, time, timedelta
+from typing import Optional, Tuple
+
+def month_start(year: int, month: int) -> datetime:
+    """Midnight of the first day of a month"""
+    return datetime(year, month, 1)
+
+def next_month_start(year: int, month: int) -> datetime:
+    """Midnight of the first day of the following month"""
+    return datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+
+def period_range(
+    year: Optional[int] = None,
+    month: Optional[int] = None
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Half-open [start, end) range for a year/month filter, so queries compare
+    the raw date column and can use the (user_id, date) indexes.
+    A month without a year refers to the current year.
+    """
+    if not year and not month:
+        return None, None
+    
+    year = year or datetime.now().year
+    if month:
+        return month_start(year, month), next_month_start(year, month)
+    return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+
+def day_range(start_date: Optional[date] = None, end_date: Optional[date] = None) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Half-open range covering whole days from start_date to end_date inclusive"""
+    start = datetime.combine(start_date, time.min) if start_date else None
+    end = datetime.combine(end_date + timedelta(days=1), time.min) if end_date else None
+    return start, end
+
+def apply_range(query, column, start: Optional[datetime], end: Optional[datetime]):
+    """Filter a query with start <= column < end (either bound optional)"""
+    if start is not None:
+        query = query.filter(column >= start)
+    if end is not None:
+        query = query.filter(column < end)
+    return query
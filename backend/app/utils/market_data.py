@@ -1,7 +1,8 @@
 import yfinance as yf
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List
-from functools import lru_cache
+from app.config import settings
+from app.utils.cache import quote_cache, MISSING
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,12 +11,23 @@ class MarketDataService:
     """Service for fetching market data using yfinance"""
     
     @staticmethod
-    @lru_cache(maxsize=128)
     def get_stock_price(symbol: str) -> Optional[Dict]:
         """
         Get current stock price and related info
-        Cached for 15 minutes to avoid excessive API calls
+        Cached for MARKET_DATA_CACHE_MINUTES in the shared quote cache
         """
+        key = ('yfinance', symbol)
+        cached = quote_cache.get(key)
+        if cached is not MISSING:
+            return cached
+        
+        price_data = MarketDataService._fetch_stock_price(symbol)
+        quote_cache.set(key, price_data, ttl=None if price_data else settings.MARKET_DATA_NEGATIVE_CACHE_SECONDS)
+        return price_data
+    
+    @staticmethod
+    def _fetch_stock_price(symbol: str) -> Optional[Dict]:
+        """Fetch price info from yfinance (None on errors)"""
         try:
             ticker = yf.Ticker(symbol)
             info = ticker.info
@@ -108,8 +120,8 @@ class MarketDataService:
     
     @staticmethod
     def clear_cache():
-        """Clear the price cache"""
-        MarketDataService.get_stock_price.cache_clear()
+        """Clear the yfinance prices (the Alpha Vantage quotes share the cache and are kept)"""
+        quote_cache.clear_namespace('yfinance')
 
 # Helper functions for batch operations
 def update_investment_prices(investments: List) -> List:
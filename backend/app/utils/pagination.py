@@ -0,0 +1,117 @@
+import base64
+import enum
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, or_, false, DateTime, Enum
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# (column, descending) pairs; the last column must be unique (the id).
+# NULLs in nullable columns sort last in either direction, on every database.
+SortKey = Sequence[Tuple[Any, bool]]
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        # Enum columns are stored by member name
+        return value.name
+    return value
+
+def _decode_value(column, value):
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, Enum) and column.type.enum_class is not None:
+        return column.type.enum_class[value]
+    return value
+
+def encode_cursor(row, sort_key: SortKey) -> str:
+    """Opaque cursor pointing just after `row` in the sort order"""
+    values = [_encode_value(getattr(row, column.key)) for column, _ in sort_key]
+    payload = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_key: SortKey) -> List:
+    """Sort key values stored in a cursor (400 if it was not produced by encode_cursor)"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) != len(sort_key):
+            raise ValueError(cursor)
+        return [_decode_value(column, value) for (column, _), value in zip(sort_key, values)]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación no válido"
+        )
+
+def _order_by(column, descending: bool):
+    order = column.desc() if descending else column.asc()
+    return order.nulls_last() if column.nullable else order
+
+def _after(sort_key: SortKey, values: List):
+    """
+    Rows strictly after `values` in the sort order. The first column also
+    gets a plain range bound so the database can seek in the index instead
+    of walking from the start. A NULL cursor value only has other NULLs
+    after it; a non-NULL one also has every NULL row after it.
+    """
+    def beyond(column, descending, value):
+        if value is None:
+            return false()
+        after = column < value if descending else column > value
+        return or_(after, column.is_(None)) if column.nullable else after
+
+    def same(column, value):
+        return column.is_(None) if value is None else column == value
+
+    first_column, first_descending = sort_key[0]
+    if values[0] is None:
+        bound = first_column.is_(None)
+    else:
+        bound = first_column <= values[0] if first_descending else first_column >= values[0]
+        if first_column.nullable:
+            bound = or_(bound, first_column.is_(None))
+
+    branches = []
+    for position, (column, descending) in enumerate(sort_key):
+        equal = [same(sort_key[i][0], values[i]) for i in range(position)]
+        branches.append(and_(*equal, beyond(column, descending, values[position])))
+
+    return and_(bound, or_(*branches))
+
+def paginate(
+    query,
+    sort_key: SortKey,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None
+) -> Tuple[List, Optional[str]]:
+    """
+    Order the query by `sort_key` and return one page plus the cursor of
+    the next one (None on the last page). With a cursor the page starts
+    right after it (keyset pagination); without one, `skip` rows are
+    skipped as before.
+    """
+    query = query.order_by(*(_order_by(column, descending) for column, descending in sort_key))
+
+    if cursor:
+        query = query.filter(_after(sort_key, decode_cursor(cursor, sort_key)))
+    elif skip:
+        query = query.offset(skip)
+
+    # One extra row tells whether there is a next page
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1], sort_key)
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    """Expose the next page cursor to the client"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
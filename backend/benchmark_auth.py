@@ -0,0 +1,114 @@
+"""
+Script para medir el coste de autenticar cada petición con y sin la caché
+de tokens verificados
+
+Compara la verificación del JWT (firma HMAC y lectura de claims) frente a la
+lectura de la caché, y el tiempo de GET /auth/me completo en ambos casos.
+Después comprueba que un token revocado (cambio de contraseña) se rechaza
+sin volver a consultar la base de datos.
+
+Uso:
+    python benchmark_auth.py           # 20k verificaciones
+    python benchmark_auth.py 100000    # número de verificaciones personalizado
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# La app usa su propio engine: apuntarlo a una base de datos temporal antes de importarla
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'benchmark.db'}"
+
+import logging
+import time
+from statistics import median
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.database import Base, engine, async_engine, SessionLocal
+from app.main import app
+from app.models import User
+from app.utils.auth import create_user_access_token, decode_token, verify_token, invalidate_cached_user
+from app.utils.cache import token_cache
+
+DEFAULT_VERIFICATIONS = 20_000
+REQUESTS = 2_000
+RUNS = 5
+
+def per_call_us(func, calls: int) -> float:
+    """Mediana de RUNS ejecuciones, en microsegundos por llamada"""
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        times.append((time.perf_counter() - start) / calls * 1e6)
+    return median(times)
+
+def main(verifications: int) -> int:
+    logging.disable(logging.WARNING)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = User(email="bench@example.com", username="bench", hashed_password="x")
+        db.add(user)
+        db.commit()
+        token = create_user_access_token(user)
+
+    error = HTTPException(status_code=401)
+    print(f"\n⏱️  Verificación del token ({verifications:,} llamadas, mediana de {RUNS} ejecuciones)")
+    decode_us = per_call_us(lambda: decode_token(token, error), verifications)
+    verify_token(token, error)
+    cached_us = per_call_us(lambda: verify_token(token, error), verifications)
+    print(f"   jwt.decode:     {decode_us:7.2f} µs")
+    print(f"   caché:          {cached_us:7.2f} µs  (x{decode_us / cached_us:.0f})")
+
+    queries = []
+    # get_current_user reads the users table through the async engine
+    event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+    headers = {"Authorization": f"Bearer {token}"}
+    with TestClient(app) as client:
+        def uncached():
+            token_cache.clear()
+            assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+        def cached():
+            assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+        print(f"\n⏱️  GET /auth/me ({REQUESTS:,} peticiones, mediana de {RUNS} ejecuciones)")
+        before_us = per_call_us(uncached, REQUESTS)
+        token_cache.clear()
+        hits, misses = token_cache.hits, token_cache.misses
+        after_us = per_call_us(cached, REQUESTS)
+        hits, misses = token_cache.hits - hits, token_cache.misses - misses
+        hit_rate = hits / (hits + misses)
+        print(f"   sin caché de tokens: {before_us:7.1f} µs/petición")
+        print(f"   con caché de tokens: {after_us:7.1f} µs/petición  ({before_us - after_us:.1f} µs menos)")
+        print(f"   tasa de aciertos: {hit_rate:.2%} ({hits:,} aciertos, {misses:,} fallos)")
+
+        # Cambio de contraseña en otro worker: la versión del token deja de coincidir
+        with SessionLocal() as db:
+            db.get(User, user.id).token_version = 1
+            db.commit()
+        invalidate_cached_user(user.id)
+        queries.clear()
+        first = client.get("/api/v1/auth/me", headers=headers).status_code
+        first_queries = len(queries)
+        queries.clear()
+        again = [client.get("/api/v1/auth/me", headers=headers).status_code for _ in range(100)]
+        again_queries = len(queries)
+
+    checks = [
+        (cached_us < decode_us, "La caché es más rápida que jwt.decode"),
+        (hit_rate > 0.99, f"Tasa de aciertos con un token repetido: {hit_rate:.2%}"),
+        (first == 401 and first_queries == 1, f"Token revocado rechazado ({first}) tras {first_queries} consulta"),
+        (set(again) == {401} and again_queries == 0,
+         f"Reintentos con el token revocado: {len(again)} rechazados con {again_queries} consultas"),
+    ]
+    print()
+    for ok, message in checks:
+        print(f"{'✅' if ok else '❌'} {message}")
+    engine.dispose()
+    return 0 if all(ok for ok, _ in checks) else 1
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_VERIFICATIONS))
@@ -0,0 +1,166 @@
+"""
+Script para medir POST /expenses/batch e /incomes/batch (apply_*_batch)
+con 1.000 operaciones mixtas y comprobar los totales mensuales
+
+Cada lote crea, edita (importe, categoría y fecha) y elimina gastos de un
+usuario con muchos movimientos, e incluye operaciones inválidas (importe o
+fecha nulos, ids de otro usuario) que deben fallar solas sin tumbar el
+lote. Al final los totales mensuales incrementales se comparan con los de
+rebuild_rollups.
+
+Uso:
+    python benchmark_batch.py            # 20k gastos de partida
+    python benchmark_batch.py 100000     # número de gastos personalizado
+"""
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from random import choice, randint, sample, uniform
+from statistics import median
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User, Income, Expense, MonthlyRollup, IncomeType, ExpenseCategory
+from app.schemas.batch import BatchOperation
+from app.services.batch_edit import apply_expense_batch, apply_income_batch
+from app.services.rollups import rebuild_rollups
+
+DEFAULT_ROWS = 20_000
+OPERATIONS = 1_000
+TARGET_MS = 100
+RUNS = 5
+CATEGORIES = [category.value for category in ExpenseCategory]
+
+def seed(session, rows: int):
+    users = [User(email=f"batch{i}@example.com", username=f"batch{i}", hashed_password="x") for i in range(2)]
+    session.add_all(users)
+    session.commit()
+
+    now = datetime.now()
+    for user in users:
+        session.execute(insert(Expense), [{
+            "user_id": user.id,
+            "amount": uniform(5, 200),
+            "category": choice(list(ExpenseCategory)),
+            "date": now - timedelta(days=randint(0, 730), minutes=randint(0, 1440))
+        } for _ in range(rows)])
+        session.execute(insert(Income), [{
+            "user_id": user.id,
+            "amount": uniform(500, 3000),
+            "source": "Nómina",
+            "income_type": IncomeType.SALARY,
+            "date": now - timedelta(days=randint(0, 730))
+        } for _ in range(100)])
+    rebuild_rollups(session)
+    session.commit()
+    return users
+
+def random_date() -> str:
+    return (datetime.now() - timedelta(days=randint(0, 730))).isoformat()
+
+def mixed_operations(ids: list, other_ids: list) -> list:
+    """Un tercio de altas, un tercio de ediciones y un tercio de bajas, más algunas inválidas"""
+    invalid = [
+        BatchOperation(action="update", id=ids[0], data={"amount": None}),
+        BatchOperation(action="update", id=ids[1], data={"date": None}),
+        BatchOperation(action="update", id=ids[2], data={"category": None}),
+        BatchOperation(action="delete", id=other_ids[0]),
+        BatchOperation(action="update", id=other_ids[1], data={"amount": 1}),
+    ]
+    valid = OPERATIONS - len(invalid)
+    targets = iter(sample(ids[3:], 2 * valid // 3 + 1))
+    operations = []
+    for i in range(valid):
+        if i % 3 == 0:
+            operations.append(BatchOperation(action="create", data={
+                "amount": uniform(5, 200), "category": choice(CATEGORIES), "date": random_date()
+            }))
+        elif i % 3 == 1:
+            operations.append(BatchOperation(action="update", id=next(targets), data={
+                "amount": uniform(5, 200), "category": choice(CATEGORIES), "date": random_date()
+            }))
+        else:
+            operations.append(BatchOperation(action="delete", id=next(targets)))
+    return invalid + operations
+
+def rollup_totals(session):
+    rows = session.execute(
+        select(MonthlyRollup.user_id, MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.kind,
+               MonthlyRollup.category, MonthlyRollup.total, MonthlyRollup.count)
+        .where(MonthlyRollup.count != 0)
+    )
+    return sorted((*row[:5], round(row.total, 2), row.count) for row in rows)
+
+def main(rows: int) -> int:
+    workdir = Path(tempfile.mkdtemp())
+    engine = create_engine(f"sqlite:///{workdir / 'benchmark.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    print(f"\n📦 Generando {rows:,} gastos por usuario...")
+    user, other = seed(session, rows)
+    other_ids = session.scalars(select(Expense.id).where(Expense.user_id == other.id).limit(2)).all()
+
+    timings = []
+    results = []
+    created = 0
+    ids_match = True
+    for _ in range(RUNS):
+        ids = session.scalars(select(Expense.id).where(Expense.user_id == user.id)).all()
+        operations = mixed_operations(ids, other_ids)
+        start = time.perf_counter()
+        result = apply_expense_batch(session, user.id, operations)
+        session.commit()
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append(result)
+
+        # Cada alta devuelve el id de la fila que ha insertado
+        amounts = {
+            item['id']: round(operation.data['amount'], 6)
+            for operation, item in zip(operations, result['results'])
+            if operation.action == "create"
+        }
+        stored = session.execute(select(Expense.id, Expense.amount).where(Expense.id.in_(list(amounts))))
+        ids_match &= len(amounts) == sum(operation.action == "create" for operation in operations) and \
+            {expense_id: round(amount, 6) for expense_id, amount in stored} == amounts
+        created += len(amounts)
+
+    income_id = session.scalar(select(Income.id).where(Income.user_id == user.id))
+    income_result = apply_income_batch(session, user.id, [
+        BatchOperation(action="update", id=income_id, data={"source": None}),
+        BatchOperation(action="update", id=income_id, data={"income_type": None}),
+        BatchOperation(action="update", id=income_id, data={"amount": 10}),
+    ])
+    session.commit()
+
+    timings.sort()
+    print(f"\n⏱️  {OPERATIONS:,} operaciones mixtas (mediana de {RUNS} ejecuciones)")
+    print(f"   Latencia: min {timings[0]:.1f} ms | mediana {median(timings):.1f} ms | max {timings[-1]:.1f} ms")
+
+    before = rollup_totals(session)
+    rebuild_rollups(session)
+    session.commit()
+    after = rollup_totals(session)
+
+    errors = [item['error'] for item in results[0]['results'][:5]]
+    checks = [
+        (median(timings) < TARGET_MS, f"Mediana por debajo de {TARGET_MS} ms: {median(timings):.1f} ms"),
+        (all(result['failed'] == 5 and result['succeeded'] == OPERATIONS - 5 for result in results),
+         f"Solo fallan las operaciones inválidas: {errors}"),
+        ([item['ok'] for item in income_result['results']] == [False, False, True],
+         f"Ingresos con campos nulos rechazados: {[item['error'] for item in income_result['results'][:2]]}"),
+        (ids_match, f"Ids devueltos en las altas: {created:,} coinciden con las filas insertadas"),
+        (before == after, f"Totales mensuales iguales a rebuild_rollups ({len(after):,} meses y categorías)"),
+    ]
+    print()
+    for ok, message in checks:
+        print(f"{'✅' if ok else '❌'} {message}")
+
+    session.close()
+    engine.dispose()
+    return 0 if all(ok for ok, _ in checks) else 1
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS))
@@ -0,0 +1,99 @@
+"""
+Script para medir el rendimiento de GET /dashboard/ con distintos volúmenes de datos
+
+Uso:
+    python benchmark_dashboard.py                 # 10k y 100k transacciones
+    python benchmark_dashboard.py 10000 1000000   # tamaños personalizados
+"""
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from random import choice, uniform, randint
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User, Income, Expense, Goal, IncomeType, ExpenseCategory
+from app.routers.dashboard import _dashboard_data
+
+DEFAULT_SIZES = [10_000, 100_000]
+RUNS = 5
+CHUNK_SIZE = 50_000
+
+def seed_user(session, rows: int) -> User:
+    """Crea un usuario con `rows` transacciones repartidas en 10 años"""
+    user = User(email=f"bench{rows}@example.com", username=f"bench{rows}", hashed_password="x")
+    session.add(user)
+    session.commit()
+
+    now = datetime.now()
+    income_types = list(IncomeType)
+    categories = list(ExpenseCategory)
+
+    # 1 ingreso por cada 9 gastos
+    for start in range(0, rows, CHUNK_SIZE):
+        incomes, expenses = [], []
+        for i in range(start, min(start + CHUNK_SIZE, rows)):
+            moment = now - timedelta(days=randint(0, 3650), minutes=randint(0, 1440))
+            if i % 10 == 0:
+                incomes.append({
+                    "user_id": user.id,
+                    "amount": uniform(500, 3000),
+                    "source": "Benchmark",
+                    "income_type": choice(income_types),
+                    "date": moment
+                })
+            else:
+                expenses.append({
+                    "user_id": user.id,
+                    "amount": uniform(5, 200),
+                    "category": choice(categories),
+                    "vendor": f"Vendor {randint(1, 200)}",
+                    "date": moment
+                })
+        if incomes:
+            session.execute(insert(Income), incomes)
+        session.execute(insert(Expense), expenses)
+        session.commit()
+
+    session.add_all([
+        Goal(user_id=user.id, name=f"Goal {i}", target_amount=1000, current_amount=100 * i,
+             target_date=now + timedelta(days=20 + i * 30))
+        for i in range(5)
+    ])
+    session.commit()
+    return user
+
+def run_benchmark(rows: int):
+    workdir = Path(tempfile.mkdtemp())
+    engine = create_engine(f"sqlite:///{workdir / 'benchmark.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    session = Session()
+    print(f"\n📦 Generando {rows:,} transacciones...")
+    user = seed_user(session, rows)
+
+    timings = []
+    for _ in range(RUNS):
+        statements.clear()
+        start = time.perf_counter()
+        _dashboard_data(session, user.id, None, None)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    session.close()
+    engine.dispose()
+
+    timings.sort()
+    print(f"   Consultas SQL por petición: {len(statements)}")
+    print(f"   Latencia: min {timings[0]:.1f} ms | mediana {timings[len(timings) // 2]:.1f} ms | max {timings[-1]:.1f} ms")
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print("⏱️  Benchmark de GET /dashboard/")
+    for size in sizes:
+        run_benchmark(size)
@@ -0,0 +1,165 @@
+"""
+Script para medir el rendimiento de lecturas y escrituras concurrentes con
+la configuración anterior del engine (pool por defecto, sin PRAGMAs) y con
+la actual (WAL, busy_timeout, caché, mmap y pool dimensionado)
+
+Cada perfil usa una copia de la misma base de datos temporal. Varios hilos
+lectores listan gastos y calculan totales mientras otros hilos escriben
+como lo hacen los endpoints (crear un gasto o editar uno existente, con sus
+totales mensuales). Se cuentan las operaciones por segundo, la latencia y
+los errores "database is locked".
+
+Uso:
+    python benchmark_database.py            # 8 lectores, 4 escritores, 10 s por perfil
+    python benchmark_database.py 16 8 20    # lectores, escritores y segundos personalizados
+"""
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from random import choice, randint, uniform
+from statistics import median
+from sqlalchemy import create_engine, insert, select, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, build_engine
+from app.models import User, Expense, ExpenseCategory
+from app.services.rollups import track_expense, rebuild_rollups
+
+USERS = 20
+EXPENSES_PER_USER = 10_000
+CATEGORIES = list(ExpenseCategory)
+
+def seed(path: Path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    users = [User(email=f"load{i}@example.com", username=f"load{i}", hashed_password="x") for i in range(USERS)]
+    session.add_all(users)
+    session.commit()
+
+    now = datetime.now()
+    for user in users:
+        session.execute(insert(Expense), [{
+            "user_id": user.id,
+            "amount": uniform(5, 200),
+            "category": choice(CATEGORIES),
+            "date": now - timedelta(days=randint(0, 730), minutes=randint(0, 1440))
+        } for _ in range(EXPENSES_PER_USER)])
+    rebuild_rollups(session)
+    session.commit()
+    session.close()
+    engine.dispose()
+
+def read(db, user_id: int):
+    """Primera página del listado de gastos y totales por categoría del año"""
+    db.execute(
+        select(Expense).where(Expense.user_id == user_id).order_by(Expense.date.desc()).limit(50)
+    ).all()
+    db.execute(
+        select(Expense.category, func.sum(Expense.amount))
+        .where(Expense.user_id == user_id, Expense.date >= datetime.now() - timedelta(days=365))
+        .group_by(Expense.category)
+    ).all()
+
+def write(db, user_id: int):
+    """Como POST /expenses/ o PUT /expenses/{id}: lectura y escritura en la misma transacción"""
+    if randint(0, 1):
+        expense = Expense(user_id=user_id, amount=uniform(5, 200), category=choice(CATEGORIES), date=datetime.now())
+        db.add(expense)
+        track_expense(db, expense)
+    else:
+        expense = db.execute(
+            select(Expense).where(Expense.user_id == user_id).order_by(Expense.date.desc()).limit(1)
+        ).scalar_one()
+        track_expense(db, expense, sign=-1)
+        expense.amount = uniform(5, 200)
+        track_expense(db, expense)
+    db.commit()
+
+def run_profile(name: str, engine, readers: int, writers: int, seconds: float):
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    stop = threading.Event()
+    results = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+    lock = threading.Lock()
+
+    def worker(kind: str, operation):
+        latencies = []
+        failed = 0
+        while not stop.is_set():
+            user_id = randint(1, USERS)
+            start = time.perf_counter()
+            db = Session()
+            try:
+                operation(db, user_id)
+                latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                db.rollback()
+                failed += 1
+            finally:
+                db.close()
+        with lock:
+            results[kind].extend(latencies)
+            errors[kind] += failed
+
+    threads = [threading.Thread(target=worker, args=("read", read)) for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=("write", write)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    print(f"\n⏱️  {name}")
+    for kind, label in (("read", "lecturas"), ("write", "escrituras")):
+        latencies = sorted(results[kind])
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+        p50 = median(latencies) * 1000 if latencies else 0
+        print(f"   {label:10} {len(latencies) / seconds:8.1f} op/s | p50 {p50:7.2f} ms | p95 {p95:8.2f} ms | errores: {errors[kind]}")
+    return results, errors
+
+def main(readers: int, writers: int, seconds: float) -> int:
+    workdir = Path(tempfile.mkdtemp())
+    seed_path = workdir / "seed.db"
+    print(f"\n📦 Generando {USERS * EXPENSES_PER_USER:,} gastos de {USERS} usuarios...")
+    seed(seed_path)
+    print(f"🚀 {readers} lectores y {writers} escritores durante {seconds:g} s por perfil")
+
+    before_path, after_path = workdir / "before.db", workdir / "after.db"
+    shutil.copy(seed_path, before_path)
+    shutil.copy(seed_path, after_path)
+
+    before = run_profile(
+        "Antes: pool por defecto, sin PRAGMAs",
+        create_engine(f"sqlite:///{before_path}", connect_args={"check_same_thread": False}),
+        readers, writers, seconds
+    )
+    after = run_profile(
+        "Ahora: WAL, busy_timeout, caché y pool desde settings",
+        build_engine(f"sqlite:///{after_path}"),
+        readers, writers, seconds
+    )
+
+    reads_before, reads_after = len(before[0]["read"]), len(after[0]["read"])
+    writes_before, writes_after = len(before[0]["write"]), len(after[0]["write"])
+    checks = [
+        (sum(after[1].values()) == 0, f"Errores con la configuración actual: {sum(after[1].values())} (antes {sum(before[1].values())})"),
+        (writes_after > writes_before, f"Escrituras: {writes_before:,} → {writes_after:,}"),
+    ]
+    # Con un solo núcleo las lecturas están limitadas por la CPU, no por los bloqueos
+    print(f"\nℹ️  Lecturas: {reads_before:,} → {reads_after:,}")
+    for ok, message in checks:
+        print(f"{'✅' if ok else '❌'} {message}")
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0 if all(ok for ok, _ in checks) else 1
+
+if __name__ == "__main__":
+    args = [float(arg) for arg in sys.argv[1:4]]
+    readers, writers, seconds = (args + [8, 4, 10][len(args):])
+    sys.exit(main(int(readers), int(writers), seconds))
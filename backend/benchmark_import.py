@@ -0,0 +1,89 @@
+"""
+Script para medir la importación de extractos bancarios (filas por segundo)
+y comprobar que los totales mensuales quedan cuadrados
+
+Genera un CSV con formato de banco español (separador `;`, fechas
+día/mes/año e importes 1.234,56) con algunas filas erróneas, y lo importa
+en una base de datos temporal, sin pasar por HTTP.
+
+Uso:
+    python benchmark_import.py            # 200k filas
+    python benchmark_import.py 500000     # número de filas personalizado
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+from random import choice, randint, uniform
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User, MonthlyRollup
+from app.services.rollups import rebuild_rollups
+from app.services.statement_import import import_statement
+
+DEFAULT_ROWS = 200_000
+TARGET_ROWS_PER_SECOND = 50_000
+BAD_ROW_EVERY = 1000
+CATEGORIES = ["food", "Transporte", "utilities", "", "otros"]
+
+def write_statement(path: Path, rows: int):
+    """CSV con un ingreso por cada 10 movimientos y una fila errónea cada BAD_ROW_EVERY"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Fecha;Importe;Concepto;Comercio;Categoría\n")
+        for i in range(rows):
+            if i % BAD_ROW_EVERY == BAD_ROW_EVERY - 1:
+                f.write("31/02/2024;abc;Fila errónea;;\n")
+                continue
+            amount = uniform(1500, 3000) if i % 10 == 0 else -uniform(1, 2000)
+            formatted = f"{amount:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+            f.write(
+                f"{randint(1, 28):02d}/{randint(1, 12):02d}/{randint(2015, 2024)};{formatted};"
+                f"Movimiento {i};Comercio {randint(1, 300)};{choice(CATEGORIES)}\n"
+            )
+
+def rollup_totals(session, user_id: int):
+    rows = session.execute(
+        select(MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.kind, MonthlyRollup.category,
+               MonthlyRollup.total, MonthlyRollup.count)
+        .where(MonthlyRollup.user_id == user_id)
+    )
+    return sorted((*row[:4], round(row.total, 2), row.count) for row in rows)
+
+def main(rows: int) -> int:
+    workdir = Path(tempfile.mkdtemp())
+    engine = create_engine(f"sqlite:///{workdir / 'benchmark.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    user = User(email="import@example.com", username="import", hashed_password="x")
+    session.add(user)
+    session.commit()
+
+    statement = workdir / "extracto.csv"
+    print(f"\n📦 Generando extracto de {rows:,} filas...")
+    write_statement(statement, rows)
+
+    start = time.perf_counter()
+    result = import_statement(session, user.id, statement, "csv")
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed
+
+    print(f"\n⏱️  Importación: {elapsed:.2f} s ({rate:,.0f} filas/s)")
+    print(f"   ingresos: {result['imported_incomes']:,} | gastos: {result['imported_expenses']:,} "
+          f"| filas con error: {result['error_count']:,}")
+
+    before = rollup_totals(session, user.id)
+    rebuild_rollups(session, user.id)
+    session.commit()
+    consistent = before == rollup_totals(session, user.id)
+
+    print(f"{'✅' if consistent else '❌'} Totales mensuales {'cuadrados' if consistent else 'descuadrados'}")
+    print(f"{'✅' if rate >= TARGET_ROWS_PER_SECOND else '⚠️ '} Objetivo: {TARGET_ROWS_PER_SECOND:,} filas/s")
+
+    session.close()
+    engine.dispose()
+    return 0 if consistent else 1
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS))
@@ -0,0 +1,127 @@
+"""
+Script para medir el coste de construir la respuesta de GET /investments/
+con 1.000 inversiones: consultas de cotización, consultas SQL, latencia y
+memoria reservada durante la serialización
+
+Las cotizaciones se precargan en la caché, así que no se llama a la API.
+
+Uso:
+    python benchmark_investments.py         # 1.000 inversiones
+    python benchmark_investments.py 5000    # tamaño personalizado
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from random import choice, uniform, randint
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User, Investment, InvestmentType, InvestmentStatus
+from app.routers.investments import _investments_page, _market_quotes, _with_quotes, _with_market_data
+from app.schemas.investment import InvestmentWithMarketData
+from app.utils.cache import quote_cache
+
+DEFAULT_ROWS = 1_000
+SYMBOLS = 200
+RUNS = 5
+
+def list_investments(session, user: User, rows: int, update_prices: bool):
+    """Lo mismo que GET /investments/ con el cliente de mercado síncrono"""
+    investments, _ = _investments_page(session, user.id, 0, rows, None, None, None, None)
+    result = _with_quotes(investments, _market_quotes(investments, update_prices))
+    if update_prices:
+        session.commit()
+    return result
+
+def seed_user(session, rows: int) -> User:
+    """Crea un usuario con `rows` inversiones activas sobre SYMBOLS símbolos"""
+    user = User(email="bench@example.com", username="bench", hashed_password="x")
+    session.add(user)
+    session.commit()
+
+    now = datetime.now()
+    session.execute(insert(Investment), [
+        {"user_id": user.id, "symbol": f"SYM{i % SYMBOLS}", "name": f"Symbol {i % SYMBOLS}",
+         "investment_type": choice(list(InvestmentType)), "quantity": uniform(1, 50),
+         "purchase_price": uniform(10, 500), "purchase_date": now - timedelta(days=randint(0, 2000)),
+         "purchase_fees": 1.0, "current_price": uniform(10, 500), "last_price_update": now,
+         "status": InvestmentStatus.ACTIVE}
+        for i in range(rows)
+    ])
+    session.commit()
+
+    for i in range(SYMBOLS):
+        quote_cache.set(('alpha_vantage', f"SYM{i}"), {
+            "symbol": f"SYM{i}", "price": uniform(10, 500), "change": 1.0, "change_percent": "0.5",
+            "volume": 1000, "previous_close": 100.0, "timestamp": now.isoformat()
+        })
+    return user
+
+def legacy_row(inv, quote_data) -> InvestmentWithMarketData:
+    """Conversión anterior: dict por fila sobre __table__.columns y validación completa"""
+    inv_dict = {column.name: getattr(inv, column.name) for column in inv.__table__.columns}
+    if quote_data:
+        inv_dict['real_time_price'] = quote_data.get('price', inv.current_price)
+        inv_dict['day_change'] = quote_data.get('change')
+        inv_dict['day_change_percentage'] = quote_data.get('change_percent')
+        inv_dict['market_status'] = 'open'
+    return InvestmentWithMarketData(**inv_dict)
+
+def measure(label: str, convert, investments, quotes):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        [convert(inv, quotes.get(inv.symbol)) for inv in investments]
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    [convert(inv, quotes.get(inv.symbol)) for inv in investments]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    print(f"   {label}: mediana {timings[len(timings) // 2]:.1f} ms | pico de memoria {peak / 1024:.0f} KiB")
+
+def main(rows: int):
+    workdir = Path(tempfile.mkdtemp())
+    engine = create_engine(f"sqlite:///{workdir / 'benchmark.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    print(f"\n📦 Generando {rows:,} inversiones...")
+    user = seed_user(session, rows)
+
+    for update_prices in (False, True):
+        timings = []
+        for _ in range(RUNS):
+            statements.clear()
+            lookups_before = quote_cache.stats()
+            start = time.perf_counter()
+            list_investments(session, user, rows, update_prices)
+            timings.append((time.perf_counter() - start) * 1000)
+            lookups_after = quote_cache.stats()
+            lookups = (lookups_after['hits'] + lookups_after['misses']
+                       - lookups_before['hits'] - lookups_before['misses'])
+
+        timings.sort()
+        print(f"\n⏱️  GET /investments/?update_prices={update_prices}")
+        print(f"   Consultas SQL: {len(statements)} | búsquedas de cotización: {lookups}")
+        print(f"   Latencia: min {timings[0]:.1f} ms | mediana {timings[len(timings) // 2]:.1f} ms | max {timings[-1]:.1f} ms")
+
+    investments = session.query(Investment).filter(Investment.user_id == user.id).all()
+    quotes = {inv.symbol: quote_cache.get(('alpha_vantage', inv.symbol)) for inv in investments}
+    print(f"\n🧱 Serialización de {len(investments):,} filas")
+    measure("anterior  ", legacy_row, investments, quotes)
+    measure("precompilada", _with_market_data, investments, quotes)
+
+    session.close()
+    engine.dispose()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS)
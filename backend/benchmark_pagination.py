@@ -0,0 +1,84 @@
+"""
+Script para comparar la latencia de GET /expenses/ en la página 1 y en la
+página 1000, con paginación por offset (skip) y por cursor
+
+Uso:
+    python benchmark_pagination.py            # 200k gastos, páginas de 100
+    python benchmark_pagination.py 500000     # número de gastos personalizado
+"""
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from random import choice, uniform, randint
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User, Expense, ExpenseCategory
+from app.routers.expenses import _expenses_page, EXPENSE_ORDER
+from app.utils.pagination import encode_cursor
+
+DEFAULT_ROWS = 200_000
+PAGE_SIZE = 100
+DEEP_PAGE = 1000
+RUNS = 5
+CHUNK_SIZE = 50_000
+
+def seed_user(session, rows: int) -> User:
+    """Crea un usuario con `rows` gastos repartidos en 10 años"""
+    user = User(email="pages@example.com", username="pages", hashed_password="x")
+    session.add(user)
+    session.commit()
+
+    now = datetime.now()
+    categories = list(ExpenseCategory)
+    for start in range(0, rows, CHUNK_SIZE):
+        session.execute(insert(Expense), [
+            {"user_id": user.id, "amount": uniform(5, 200), "category": choice(categories),
+             "vendor": f"Vendor {randint(1, 200)}", "date": now - timedelta(days=randint(0, 3650), minutes=randint(0, 1440))}
+            for _ in range(start, min(start + CHUNK_SIZE, rows))
+        ])
+        session.commit()
+    session.execute(text("ANALYZE"))
+    return user
+
+def measure(call) -> float:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+def main(rows: int):
+    workdir = Path(tempfile.mkdtemp())
+    engine = create_engine(f"sqlite:///{workdir / 'benchmark.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    print(f"\n📦 Generando {rows:,} gastos...")
+    user = seed_user(session, rows)
+
+    def page(skip: int = 0, cursor: str = None):
+        expenses, _ = _expenses_page(session, user.id, skip, PAGE_SIZE, cursor, None, None, None, None, None, None)
+        return expenses
+
+    # Cursor de la página profunda (DEEP_PAGE o la última completa si hay
+    # menos filas): el de la última fila de la página anterior
+    deep_page = max(2, min(DEEP_PAGE, rows // PAGE_SIZE))
+    deep_skip = (deep_page - 1) * PAGE_SIZE
+    previous_row = page(skip=deep_skip - 1)[0]
+    deep_cursor = encode_cursor(previous_row, EXPENSE_ORDER)
+    assert [e.id for e in page(skip=deep_skip)] == [e.id for e in page(cursor=deep_cursor)]
+
+    print(f"\n⏱️  GET /expenses/ (páginas de {PAGE_SIZE}, mediana de {RUNS} ejecuciones)")
+    print(f"   offset  página 1: {measure(lambda: page()):7.2f} ms | página {deep_page}: {measure(lambda: page(skip=deep_skip)):7.2f} ms")
+    print(f"   cursor  página 1: {measure(lambda: page()):7.2f} ms | página {deep_page}: {measure(lambda: page(cursor=deep_cursor)):7.2f} ms")
+
+    session.close()
+    engine.dispose()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS)
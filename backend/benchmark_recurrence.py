@@ -0,0 +1,105 @@
+"""
+Script para medir el procesamiento nocturno de ingresos recurrentes
+
+Crea plantillas mensuales con varias ocurrencias atrasadas en una base de
+datos temporal, ejecuta el procesamiento y comprueba que no queda nada
+pendiente, que una segunda ejecución no genera nada y que los totales
+mensuales cuadran.
+
+Uso:
+    python benchmark_recurrence.py              # 200k plantillas
+    python benchmark_recurrence.py 1000000      # número de plantillas personalizado
+"""
+import sys
+import tempfile
+import time
+from datetime import datetime, date
+from pathlib import Path
+from random import choice, randint, uniform
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import create_engine, insert, select, func
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User, Income, IncomeType, MonthlyRollup
+from app.services.recurrence_processor import RecurrenceProcessor, due_before
+from app.services.rollups import rebuild_rollups
+
+DEFAULT_TEMPLATES = 200_000
+TEMPLATES_PER_USER = 4
+CHUNK_SIZE = 50_000
+
+def seed(session, templates: int, today: date):
+    """Plantillas mensuales con entre 0 y 3 meses de retraso"""
+    users = templates // TEMPLATES_PER_USER
+    session.execute(insert(User), [
+        {"email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": "x"}
+        for i in range(users)
+    ])
+    user_ids = session.scalars(select(User.id)).all()
+
+    start = datetime.combine(today, datetime.min.time())
+    for offset in range(0, templates, CHUNK_SIZE):
+        session.execute(insert(Income), [
+            {"user_id": user_ids[i // TEMPLATES_PER_USER], "amount": round(uniform(100, 3000), 2),
+             "source": f"Empresa {i}", "income_type": choice(list(IncomeType)), "date": start - relativedelta(months=4),
+             "is_recurring": True, "recurrence_type": "monthly",
+             "recurrence_day_option": choice(["first_day", "last_day", "custom", "salary_day"]),
+             "recurrence_custom_day": randint(1, 31),
+             "next_occurrence": start - relativedelta(months=randint(0, 3), days=randint(0, 27))}
+            for i in range(offset, min(offset + CHUNK_SIZE, templates))
+        ])
+        session.commit()
+
+def rollup_totals(session):
+    rows = session.execute(select(
+        MonthlyRollup.user_id, MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.kind,
+        MonthlyRollup.category, MonthlyRollup.total, MonthlyRollup.count
+    ))
+    return sorted((*row[:5], round(row.total, 2), row.count) for row in rows)
+
+def main(templates: int) -> int:
+    workdir = Path(tempfile.mkdtemp())
+    engine = create_engine(f"sqlite:///{workdir / 'benchmark.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    today = date.today()
+
+    print(f"\n📦 Generando {templates:,} plantillas recurrentes...")
+    seed(session, templates, today)
+    rebuild_rollups(session)
+    session.commit()
+
+    start = time.perf_counter()
+    stats = RecurrenceProcessor.process_recurring_incomes(session, today)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n⏱️  Procesamiento: {elapsed:.1f} s ({stats['templates'] / elapsed:,.0f} plantillas/s)")
+    print(f"   plantillas: {stats['templates']:,} | ingresos generados: {stats['generated']:,} "
+          f"| plantillas con error: {stats['failed_templates']:,}")
+    print(f"   estimación para 1M plantillas: {1_000_000 / stats['templates'] * elapsed / 60:.1f} min")
+
+    pending = session.scalar(
+        select(func.count()).select_from(Income)
+        .where(Income.is_recurring == True, Income.next_occurrence < due_before(today))
+    )
+    again = RecurrenceProcessor.process_recurring_incomes(session, today)
+
+    before = rollup_totals(session)
+    rebuild_rollups(session)
+    session.commit()
+    consistent = before == rollup_totals(session)
+
+    checks = [
+        (pending == 0, f"Plantillas pendientes tras el procesamiento: {pending}"),
+        (again['generated'] == 0, f"Ingresos generados en la segunda ejecución: {again['generated']}"),
+        (consistent, f"Totales mensuales {'cuadrados' if consistent else 'descuadrados'}"),
+    ]
+    for ok, message in checks:
+        print(f"{'✅' if ok else '❌'} {message}")
+
+    session.close()
+    engine.dispose()
+    return 0 if all(ok for ok, _ in checks) else 1
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TEMPLATES))
@@ -0,0 +1,168 @@
+"""
+Script para comprobar el procesamiento nocturno por shards en paralelo
+
+Crea ingresos y gastos recurrentes con ocurrencias atrasadas en una base de
+datos temporal y simula una ejecución interrumpida: solo terminan los dos
+primeros shards. Después relanza el procesamiento completo y comprueba que
+solo se procesan los shards pendientes, que una nueva ejecución (con y sin
+checkpoints) no genera nada, que un scheduler duplicado que leyó las
+plantillas antes de que avanzaran tampoco, que no hay copias duplicadas y
+que los totales mensuales cuadran.
+
+Uso:
+    python benchmark_recurrence_shards.py             # 200k plantillas
+    python benchmark_recurrence_shards.py 1000000     # número de plantillas personalizado
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Los procesos del pool abren su propia conexión a partir de DATABASE_URL y
+# vuelven a importar este script: heredan la base de datos del proceso principal
+if "BENCHMARK_DATABASE_URL" not in os.environ:
+    os.environ["BENCHMARK_DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'benchmark.db'}"
+os.environ["DATABASE_URL"] = os.environ["BENCHMARK_DATABASE_URL"]
+
+import logging
+import time
+from datetime import datetime, date
+from random import choice, randint, uniform
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import insert, select, update, delete, func
+from app.config import settings
+from app.database import Base, engine, SessionLocal
+from app.models import (
+    User, Income, IncomeType, Expense, ExpenseCategory, ExpenseFrequency, MonthlyRollup, RecurrenceCheckpoint
+)
+from app.services.recurrence_processor import plan_shards, process_shard, run_daily_processing, due_before
+from app.services.rollups import rebuild_rollups
+
+DEFAULT_TEMPLATES = 200_000
+TEMPLATES_PER_USER = 4
+CHUNK_SIZE = 50_000
+INTERRUPTED_SHARDS = 2
+
+def seed(session, templates: int, today: date):
+    """Mitad ingresos y mitad gastos mensuales, con entre 0 y 3 meses de retraso"""
+    users = templates // TEMPLATES_PER_USER
+    session.execute(insert(User), [
+        {"email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": "x"}
+        for i in range(users)
+    ])
+    user_ids = session.scalars(select(User.id)).all()
+
+    start = datetime.combine(today, datetime.min.time())
+    def schedule():
+        return {"date": start - relativedelta(months=4), "is_recurring": True, "recurrence_type": "monthly",
+                "next_occurrence": start - relativedelta(months=randint(0, 3), days=randint(0, 27))}
+
+    for offset in range(0, templates, CHUNK_SIZE):
+        rows = range(offset, min(offset + CHUNK_SIZE, templates))
+        session.execute(insert(Income), [
+            {"user_id": user_ids[i // TEMPLATES_PER_USER], "amount": round(uniform(100, 3000), 2),
+             "source": f"Plantilla {i}", "income_type": choice(list(IncomeType)), **schedule()}
+            for i in rows if i % 2 == 0
+        ])
+        session.execute(insert(Expense), [
+            {"user_id": user_ids[i // TEMPLATES_PER_USER], "amount": round(uniform(5, 500), 2),
+             "category": choice(list(ExpenseCategory)), "description": f"Plantilla {i}",
+             "frequency": ExpenseFrequency.MONTHLY, **schedule()}
+            for i in rows if i % 2 == 1
+        ])
+        session.commit()
+
+def rollup_totals(session):
+    rows = session.execute(select(
+        MonthlyRollup.user_id, MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.kind,
+        MonthlyRollup.category, MonthlyRollup.total, MonthlyRollup.count
+    ))
+    return sorted((*row[:5], round(row.total, 2), row.count) for row in rows)
+
+def duplicates(session) -> int:
+    """Copias generadas dos veces para la misma plantilla y fecha"""
+    total = 0
+    for model, key in ((Income, Income.source), (Expense, Expense.description)):
+        repeated = select(key, model.date).where(model.is_recurring == False).group_by(key, model.date)
+        total += session.scalar(
+            select(func.count()).select_from(repeated.having(func.count() > 1).subquery())
+        )
+    return total
+
+def timed_run(today: date, label: str):
+    start = time.perf_counter()
+    totals = run_daily_processing(today)
+    elapsed = time.perf_counter() - start
+    print(f"   {label}: {totals['shards']} shards ({totals['failed_shards']} con error) | {totals['templates']:,} plantillas "
+          f"| {totals['generated']:,} generadas | {elapsed:.1f} s")
+    return totals
+
+def main(templates: int) -> int:
+    logging.basicConfig(level=logging.WARNING)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    today = date.today()
+
+    print(f"\n📦 Generando {templates:,} plantillas recurrentes...")
+    seed(session, templates, today)
+    rebuild_rollups(session)
+    session.commit()
+    # Lo que leería un segundo scheduler que arrancase a la vez
+    snapshot = {
+        model: [{"id": row.id, "next_occurrence": row.next_occurrence}
+                for row in session.execute(select(model.id, model.next_occurrence).where(model.is_recurring == True))]
+        for model in (Income, Expense)
+    }
+
+    print(f"\n⏱️  {settings.RECURRENCE_SHARDS} shards, {settings.RECURRENCE_WORKERS} procesos:")
+    shards = plan_shards(session, today, settings.RECURRENCE_SHARDS)
+    start = time.perf_counter()
+    for shard in shards[:INTERRUPTED_SHARDS]:
+        process_shard(today, *shard)
+    print(f"   ejecución interrumpida: {INTERRUPTED_SHARDS} shards | {time.perf_counter() - start:.1f} s")
+
+    resumed = timed_run(today, "reanudación")
+    again = timed_run(today, "repetición")
+    session.execute(delete(RecurrenceCheckpoint))
+    session.commit()
+    fresh = timed_run(today, "sin checkpoints")
+
+    for model, rows in snapshot.items():
+        session.execute(update(model), rows)
+    session.execute(delete(RecurrenceCheckpoint))
+    session.commit()
+    stale = timed_run(today, "scheduler duplicado")
+
+    pending = sum(
+        session.scalar(
+            select(func.count()).select_from(model)
+            .where(model.is_recurring == True, model.next_occurrence < due_before(today))
+        )
+        for model in (Income, Expense)
+    )
+    repeated = duplicates(session)
+    before = rollup_totals(session)
+    rebuild_rollups(session)
+    session.commit()
+    consistent = before == rollup_totals(session)
+
+    checks = [
+        (resumed['shards'] == len(shards) - INTERRUPTED_SHARDS, f"Shards procesados al reanudar: {resumed['shards']}"),
+        (again['shards'] == 0, f"Shards procesados al repetir: {again['shards']}"),
+        (resumed['failed_shards'] == 0, f"Shards con error al reanudar: {resumed['failed_shards']}"),
+        (fresh['generated'] == 0, f"Copias generadas sin checkpoints: {fresh['generated']}"),
+        (stale['generated'] == 0, f"Copias generadas por el scheduler duplicado: {stale['generated']}"),
+        (pending == 0, f"Plantillas pendientes tras el procesamiento: {pending}"),
+        (repeated == 0, f"Copias duplicadas: {repeated}"),
+        (consistent, f"Totales mensuales {'cuadrados' if consistent else 'descuadrados'}"),
+    ]
+    print()
+    for ok, message in checks:
+        print(f"{'✅' if ok else '❌'} {message}")
+
+    session.close()
+    engine.dispose()
+    return 0 if all(ok for ok, _ in checks) else 1
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TEMPLATES))
@@ -0,0 +1,135 @@
+"""
+Script para comprobar que el procesamiento nocturno de gastos recurrentes
+depende de los gastos pendientes y no del tamaño de la tabla
+
+Llena una base de datos temporal con un histórico de gastos (con un 10% de
+plantillas recurrentes programadas para más adelante) y mide el
+procesamiento con el mismo número de plantillas pendientes a medida que la
+tabla crece hasta 1M de filas, y después con diez veces más pendientes.
+
+Uso:
+    python benchmark_recurring_expenses.py            # 1M de gastos, 1.000 pendientes
+    python benchmark_recurring_expenses.py 2000000    # tamaño final personalizado
+"""
+import sys
+import tempfile
+import time
+from datetime import datetime, date
+from pathlib import Path
+from random import choice, randint, uniform
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import create_engine, insert, select, func, text
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User, Expense, ExpenseCategory, ExpenseFrequency
+from app.services.recurrence_processor import RecurrenceProcessor, due_before
+
+DEFAULT_ROWS = 1_000_000
+DUE_TEMPLATES = 1_000
+USERS = 1_000
+CHUNK_SIZE = 50_000
+# El tiempo con la tabla completa no debería pasar de este múltiplo del inicial
+MAX_GROWTH = 3
+
+def add_history(session, user_ids, rows: int, today: date):
+    """Gastos de los últimos años; uno de cada diez es una plantilla programada para el futuro"""
+    start = datetime.combine(today, datetime.min.time())
+    for offset in range(0, rows, CHUNK_SIZE):
+        batch = []
+        for i in range(offset, min(offset + CHUNK_SIZE, rows)):
+            recurring = i % 10 == 0
+            batch.append({
+                "user_id": choice(user_ids), "amount": round(uniform(1, 500), 2),
+                "category": choice(list(ExpenseCategory)), "description": f"Gasto {i}",
+                "frequency": ExpenseFrequency.MONTHLY if recurring else ExpenseFrequency.ONE_TIME,
+                "date": start - relativedelta(days=randint(1, 2000)),
+                "is_recurring": recurring,
+                "recurrence_type": "monthly" if recurring else None,
+                "next_occurrence": start + relativedelta(days=randint(1, 28)) if recurring else None,
+            })
+        session.execute(insert(Expense), batch)
+        session.commit()
+
+def add_due(session, user_ids, templates: int, today: date):
+    """Plantillas mensuales que vencen hoy"""
+    start = datetime.combine(today, datetime.min.time())
+    session.execute(insert(Expense), [
+        {"user_id": choice(user_ids), "amount": round(uniform(5, 200), 2),
+         "category": choice(list(ExpenseCategory)), "description": f"Suscripción {i}",
+         "frequency": ExpenseFrequency.MONTHLY, "date": start - relativedelta(months=1),
+         "is_recurring": True, "recurrence_type": "monthly", "next_occurrence": start}
+        for i in range(templates)
+    ])
+    session.commit()
+
+def measure(session, user_ids, due: int, today: date):
+    add_due(session, user_ids, due, today)
+    rows = session.scalar(select(func.count()).select_from(Expense))
+    start = time.perf_counter()
+    stats = RecurrenceProcessor.process_recurring_expenses(session, today)
+    elapsed = time.perf_counter() - start
+    print(f"   {rows:>10,} gastos | {due:>6,} pendientes | {elapsed * 1000:8.1f} ms "
+          f"| generados: {stats['generated']:,}")
+    return elapsed, stats
+
+def main(total_rows: int) -> int:
+    workdir = Path(tempfile.mkdtemp())
+    engine = create_engine(f"sqlite:///{workdir / 'benchmark.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    today = date.today()
+
+    session.execute(insert(User), [
+        {"email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": "x"}
+        for i in range(USERS)
+    ])
+    user_ids = session.scalars(select(User.id)).all()
+
+    first = total_rows // 10
+    print(f"\n📦 Generando {first:,} gastos...")
+    add_history(session, user_ids, first, today)
+    session.execute(text("ANALYZE"))
+
+    print(f"\n⏱️  Procesamiento nocturno:")
+    small, small_stats = measure(session, user_ids, DUE_TEMPLATES, today)
+
+    print(f"\n📦 Ampliando hasta {total_rows:,} gastos...")
+    add_history(session, user_ids, total_rows - first, today)
+    session.execute(text("ANALYZE"))
+
+    print(f"\n⏱️  Procesamiento nocturno:")
+    large, large_stats = measure(session, user_ids, DUE_TEMPLATES, today)
+    more, more_stats = measure(session, user_ids, DUE_TEMPLATES * 10, today)
+
+    plan = " ".join(row[-1] for row in session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT user_id, id FROM expenses "
+        "WHERE is_recurring = 1 AND next_occurrence < :horizon ORDER BY user_id, id"
+    ), {"horizon": due_before(today)}))
+    pending = session.scalar(
+        select(func.count()).select_from(Expense)
+        .where(Expense.is_recurring == True, Expense.next_occurrence < due_before(today))
+    )
+
+    print(f"\n🔍 Plan de la consulta de pendientes: {plan}")
+    print(f"   tabla x{total_rows // first} → tiempo x{large / small:.1f} | "
+          f"pendientes x10 → tiempo x{more / large:.1f}")
+
+    checks = [
+        ("ix_expenses_is_recurring_next_occurrence" in plan, "La consulta de pendientes usa el índice"),
+        (pending == 0, f"Plantillas pendientes tras el procesamiento: {pending}"),
+        (
+            (small_stats['generated'], large_stats['generated'], more_stats['generated'])
+            == (DUE_TEMPLATES, DUE_TEMPLATES, DUE_TEMPLATES * 10),
+            "Una copia por plantilla pendiente"
+        ),
+        (large <= small * MAX_GROWTH, f"El tiempo no crece con la tabla (máximo x{MAX_GROWTH})"),
+    ]
+    for ok, message in checks:
+        print(f"{'✅' if ok else '❌'} {message}")
+
+    session.close()
+    engine.dispose()
+    return 0 if all(ok for ok, _ in checks) else 1
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS))
@@ -0,0 +1,118 @@
+"""
+Script para comprobar con EXPLAIN QUERY PLAN que los listados y estadísticas
+de ingresos/gastos y presupuestos usan los índices (user_id, date) en lugar de
+recorrer la tabla
+
+Devuelve código de salida 1 si alguna consulta hace un SCAN completo de
+incomes o expenses, para poder usarlo en CI.
+"""
+import re
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from random import choice, uniform, randint
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User, Income, Expense, IncomeType, ExpenseCategory, Budget, BudgetCategory, BudgetPeriod
+from app.routers import incomes, expenses, dashboard, budgets
+from app.services.rollups import rebuild_rollups
+
+FULL_SCAN = re.compile(r"\bSCAN (incomes|expenses)\b")
+
+def seed(session) -> User:
+    """Dos usuarios con datos para que el planificador tenga estadísticas reales"""
+    users = [User(email=f"plan{i}@example.com", username=f"plan{i}", hashed_password="x") for i in range(2)]
+    session.add_all(users)
+    session.commit()
+
+    now = datetime.now()
+    for user in users:
+        user_budgets = [
+            Budget(user_id=user.id, category=choice(list(BudgetCategory)), name=f"Presupuesto {period.value}",
+                   amount=500, period=period)
+            for period in BudgetPeriod
+        ]
+        session.add_all(user_budgets)
+        session.flush()
+        session.execute(insert(Income), [
+            {"user_id": user.id, "amount": uniform(500, 3000), "source": "Plan",
+             "income_type": choice(list(IncomeType)), "date": now - timedelta(days=randint(0, 1000))}
+            for _ in range(2000)
+        ])
+        session.execute(insert(Expense), [
+            {"user_id": user.id, "amount": uniform(5, 200), "category": choice(list(ExpenseCategory)),
+             "vendor": f"Vendor {randint(1, 50)}", "is_recurring": randint(0, 9) == 0,
+             "budget_id": choice(user_budgets).id if randint(0, 1) else None,
+             "date": now - timedelta(days=randint(0, 1000))}
+            for _ in range(8000)
+        ])
+    rebuild_rollups(session)
+    session.commit()
+    session.execute(text("ANALYZE"))
+    return users[0]
+
+def main() -> int:
+    workdir = Path(tempfile.mkdtemp())
+    engine = create_engine(f"sqlite:///{workdir / 'plans.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    user = seed(session)
+
+    captured = []
+    event.listen(
+        engine, "before_cursor_execute",
+        lambda conn, cursor, statement, parameters, context, executemany: captured.append((statement, parameters))
+    )
+
+    today = date.today()
+    _, next_cursor = expenses._expenses_page(session, user.id, 0, 100, None, None, None, None, None, None, None)
+
+    calls = {
+        "GET /expenses/": lambda: expenses._expenses_page(
+            session, user.id, 0, 100, None, None, None, None, today - timedelta(days=90), today, None),
+        "GET /expenses/?cursor": lambda: expenses._expenses_page(
+            session, user.id, 0, 100, next_cursor, None, None, None, None, None, None),
+        "GET /expenses/?category": lambda: expenses._expenses_page(
+            session, user.id, 0, 100, None, ExpenseCategory.FOOD, None, None, None, None, None),
+        "GET /expenses/stats": lambda: expenses.get_expense_stats(
+            year=today.year, month=today.month, db=session, current_user=user),
+        "GET /expenses/categories/summary": lambda: expenses.get_categories_summary(
+            year=today.year, month=None, db=session, current_user=user),
+        "GET /incomes/": lambda: incomes._incomes_page(
+            session, user.id, 0, 100, None, None, today - timedelta(days=90), today),
+        "GET /incomes/stats": lambda: incomes.get_income_stats(
+            year=today.year, month=today.month, db=session, current_user=user),
+        "GET /dashboard/": lambda: dashboard._dashboard_data(session, user.id, None, None),
+        "GET /dashboard/quick-stats": lambda: dashboard._quick_stats(session, user.id),
+        "GET /budgets/": lambda: budgets.get_budgets(db=session, current_user=user),
+    }
+
+    failures = 0
+    for name, call in calls.items():
+        captured.clear()
+        call()
+        statements = list(captured)
+        print(f"\n🔎 {name}")
+        for statement, parameters in statements:
+            if not re.search(r"\b(FROM|JOIN) (incomes|expenses)\b", statement):
+                continue
+            plan = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            for row in plan:
+                detail = row[-1]
+                marker = "❌" if FULL_SCAN.search(detail) else "  "
+                failures += marker == "❌"
+                print(f"   {marker} {detail}")
+
+    session.close()
+    engine.dispose()
+
+    if failures:
+        print(f"\n❌ {failures} consultas recorren la tabla completa")
+        return 1
+    print("\n✅ Todas las consultas usan búsquedas por índice")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
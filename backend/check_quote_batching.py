@@ -0,0 +1,143 @@
+"""
+Script para comprobar la actualización de precios por lotes contra un
+servidor falso de Alpha Vantage en local
+
+Crea varias inversiones activas que repiten símbolo (y una vendida) en una
+base de datos temporal, actualiza sus precios con update_investment_prices
+y comprueba que:
+  - se hace una sola llamada por símbolo distinto de las inversiones activas,
+  - las llamadas nunca están más juntas que MARKET_DATA_RATE_LIMIT_SECONDS
+    (medido cuando el limitador deja salir cada llamada, no al llegar al
+    servidor, para que abrir la conexión no acorte la primera separación),
+  - el precio de cada símbolo llega a todas las inversiones que lo tienen.
+
+No toca finance_tracker.db ni consume cuota de la API. Devuelve código de
+salida 1 si alguna comprobación falla.
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+RATE_LIMIT_SECONDS = 1
+# Margen para el retraso con que el bucle de eventos despierta cada llamada
+TOLERANCE = 0.05
+PRICES = {"AAPL": 190.0, "MSFT": 410.0, "VWCE.DE": 120.0, "SAN.MC": 4.5}
+HOLDINGS_PER_SYMBOL = 3
+SOLD_SYMBOL = "TSLA"
+
+requests = []
+requests_lock = threading.Lock()
+released = []
+
+class FakeAlphaVantage(BaseHTTPRequestHandler):
+    """Responde GLOBAL_QUOTE al momento con el precio de PRICES"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        symbol = parse_qs(urlparse(self.path).query).get("symbol", [""])[0]
+        with requests_lock:
+            requests.append((symbol, time.monotonic()))
+
+        body = json.dumps({"Global Quote": {
+            "01. symbol": symbol,
+            "05. price": str(PRICES.get(symbol, 1.0)),
+            "09. change": "0",
+            "10. change percent": "0%"
+        }}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_upstream() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAlphaVantage)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/query"
+
+def main() -> int:
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'quotes.db'}"
+    os.environ["ALPHA_VANTAGE_API_KEY"] = "demo"
+    os.environ["ALPHA_VANTAGE_BASE_URL"] = start_upstream()
+    os.environ["MARKET_DATA_RATE_LIMIT_SECONDS"] = str(RATE_LIMIT_SECONDS)
+    # Sin ráfaga inicial: todas las llamadas deben respetar la separación
+    os.environ["MARKET_DATA_BURST"] = "1"
+    os.environ["MARKET_DATA_MAX_WAIT_SECONDS"] = "30"
+
+    from app.database import Base, engine, SessionLocal
+    from app.models import User, Investment, InvestmentType, InvestmentStatus
+    from app.services import market_data
+    Base.metadata.create_all(bind=engine)
+
+    acquire_async = market_data.rate_limiter.acquire_async
+
+    async def timed_acquire(timeout=None):
+        # Instante en que el limitador deja salir la llamada
+        granted = await acquire_async(timeout)
+        released.append(time.monotonic())
+        return granted
+
+    market_data.rate_limiter.acquire_async = timed_acquire
+
+    with SessionLocal() as db:
+        user = User(email="quotes@example.com", username="quotes", hashed_password="x")
+        db.add(user)
+        db.commit()
+
+        def holding(symbol: str, status: InvestmentStatus) -> Investment:
+            return Investment(
+                user_id=user.id, symbol=symbol, name=symbol, investment_type=InvestmentType.STOCK,
+                quantity=2, purchase_price=100, purchase_date=datetime.now(), status=status
+            )
+
+        db.add_all([
+            holding(symbol, InvestmentStatus.ACTIVE)
+            for symbol in PRICES for _ in range(HOLDINGS_PER_SYMBOL)
+        ] + [holding(SOLD_SYMBOL, InvestmentStatus.SOLD)])
+        db.commit()
+
+        investments = db.query(Investment).all()
+        print(f"\n🚀 {len(investments)} inversiones, {len(PRICES)} símbolos activos, "
+              f"una llamada cada {RATE_LIMIT_SECONDS} s como mucho")
+        start = time.perf_counter()
+        market_data.update_investment_prices(investments)
+        db.commit()
+        elapsed = time.perf_counter() - start
+
+        prices = {(inv.symbol, inv.current_price) for inv in db.query(Investment).filter(Investment.status == InvestmentStatus.ACTIVE)}
+        sold_price = db.query(Investment.current_price).filter(Investment.symbol == SOLD_SYMBOL).scalar()
+
+    market_data.market_client.close()
+
+    calls = Counter(symbol for symbol, _ in requests)
+    times = sorted(released)
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    min_gap = min(gaps) if gaps else None
+
+    print(f"   {len(requests)} llamadas en {elapsed:.2f} s: {dict(calls)}")
+    checks = [
+        (set(calls) == set(PRICES) and all(count == 1 for count in calls.values()),
+         f"Una llamada por símbolo distinto ({len(calls)} símbolos, {len(requests)} llamadas)"),
+        (SOLD_SYMBOL not in calls and sold_price is None, "Las inversiones vendidas no se actualizan"),
+        (min_gap is not None and min_gap >= RATE_LIMIT_SECONDS - TOLERANCE,
+         f"Separación mínima entre llamadas: {min_gap if min_gap is None else round(min_gap, 3)} s"),
+        (prices == set(PRICES.items()),
+         f"Precio aplicado a las {len(PRICES) * HOLDINGS_PER_SYMBOL} inversiones activas"),
+    ]
+    print()
+    for ok, message in checks:
+        print(f"{'✅' if ok else '❌'} {message}")
+    return 0 if all(ok for ok, _ in checks) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Script para comprobar que con varios workers solo uno ejecuta las tareas
+programadas (lease del scheduler)
+
+Arranca varios procesos, cada uno con su scheduler y una tarea que apunta
+su pid en un fichero cada TICK segundos, todos contra la misma base de
+datos temporal. Después mata al líder sin avisar (como si se cayera), para
+de forma ordenada al siguiente y comprueba que:
+  - nunca hay dos procesos ejecutando tareas a la vez,
+  - otro worker toma el relevo cuando caduca la lease del líder caído,
+  - al pararse de forma ordenada el relevo es inmediato.
+
+Devuelve código de salida 1 si alguna comprobación falla.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Los procesos hijos vuelven a importar este script: heredan la base de datos del principal
+if "CHECK_DATABASE_URL" not in os.environ:
+    os.environ["CHECK_DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'scheduler.db'}"
+os.environ["DATABASE_URL"] = os.environ["CHECK_DATABASE_URL"]
+
+import signal
+import threading
+import time
+from multiprocessing import get_context
+
+WORKERS = 4
+LEASE_SECONDS = 3
+HEARTBEAT_SECONDS = 0.5
+TICK = 0.1
+
+def write_tick(log_path: str):
+    with open(log_path, "a") as f:
+        f.write(f"{os.getpid()} {time.time()}\n")
+
+def worker(log_path: str):
+    """Un worker de uvicorn: scheduler pausado hasta conseguir la lease"""
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from app.services.scheduler import SchedulerCoordinator
+
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(write_tick, "interval", seconds=TICK, args=[log_path])
+    coordinator = SchedulerCoordinator(scheduler, "check", LEASE_SECONDS, HEARTBEAT_SECONDS)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    coordinator.start()
+    stop.wait()
+    coordinator.stop()
+
+def read_ticks(log_path: Path):
+    if not log_path.exists():
+        return []
+    ticks = []
+    for line in log_path.read_text().splitlines():
+        pid, when = line.split()
+        ticks.append((int(pid), float(when)))
+    return ticks
+
+def leader_segments(ticks):
+    """[(pid, primera, última)] de cada tramo seguido del mismo proceso"""
+    segments = []
+    for pid, when in sorted(ticks, key=lambda tick: tick[1]):
+        if segments and segments[-1][0] == pid:
+            segments[-1][2] = when
+        else:
+            segments.append([pid, when, when])
+    return segments
+
+def next_leader(log_path: Path, since: float, timeout: float) -> int:
+    """Primer proceso que ejecuta tareas después de `since`"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        ticks = [pid for pid, when in read_ticks(log_path) if when > since]
+        if ticks:
+            return ticks[0]
+        time.sleep(TICK)
+    return 0
+
+def main() -> int:
+    from app.database import Base, engine
+    import app.models  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    log_path = Path(tempfile.mkdtemp()) / "ticks.log"
+
+    context = get_context("spawn")
+    processes = {}
+    for _ in range(WORKERS):
+        process = context.Process(target=worker, args=(str(log_path),))
+        process.start()
+        processes[process.pid] = process
+
+    print(f"\n🚀 {WORKERS} workers, lease de {LEASE_SECONDS} s, heartbeat de {HEARTBEAT_SECONDS} s")
+    first = next_leader(log_path, 0, timeout=15)
+    time.sleep(1)
+    if not first:
+        print("❌ Ningún worker ha conseguido la lease")
+        return 1
+
+    print(f"💥 Matando al líder {first} sin liberar la lease...")
+    killed_at = time.time()
+    os.kill(first, signal.SIGKILL)
+    processes.pop(first).join()
+    second = next_leader(log_path, killed_at, timeout=LEASE_SECONDS + 5)
+    time.sleep(1)
+    if second not in processes:
+        print("❌ Ningún worker ha tomado el relevo")
+        return 1
+
+    print(f"🛑 Parando de forma ordenada al líder {second}...")
+    stopped_at = time.time()
+    processes[second].terminate()
+    processes.pop(second).join()
+    third = next_leader(log_path, stopped_at, timeout=5)
+    time.sleep(1)
+
+    for process in processes.values():
+        process.terminate()
+    for process in processes.values():
+        process.join()
+
+    segments = leader_segments(read_ticks(log_path))
+    overlaps = sum(1 for a, b in zip(segments, segments[1:]) if b[1] < a[2])
+    takeover = next((start - killed_at for pid, start, _ in segments if pid == second), None)
+    handover = next((start - stopped_at for pid, start, _ in segments if pid == third), None)
+
+    print("\n📋 Tramos de ejecución:")
+    for pid, start, end in segments:
+        print(f"   pid {pid}: {end - start:5.1f} s")
+
+    checks = [
+        (len(segments) == 3 and len({pid for pid, _, _ in segments}) == 3,
+         f"Un solo proceso ejecuta las tareas en cada momento ({len(segments)} tramos)"),
+        (overlaps == 0, f"Tramos solapados: {overlaps}"),
+        (takeover is not None and takeover <= LEASE_SECONDS + 2 * HEARTBEAT_SECONDS + 1,
+         f"Relevo tras la caída: {takeover if takeover is None else round(takeover, 1)} s"),
+        (handover is not None and handover <= 2 * HEARTBEAT_SECONDS + 1,
+         f"Relevo tras la parada ordenada: {handover if handover is None else round(handover, 1)} s"),
+    ]
+    print()
+    for ok, message in checks:
+        print(f"{'✅' if ok else '❌'} {message}")
+    return 0 if all(ok for ok, _ in checks) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Script para comprobar que las peticiones simultáneas de la misma cotización
+comparten una sola llamada al proveedor (single-flight)
+
+Levanta un servidor falso y lento de Alpha Vantage en local, lanza muchas
+consultas a la vez desde hilos y desde corrutinas, y cuenta las llamadas
+que llegan al servidor. Usa una base de datos temporal, así que no toca
+finance_tracker.db ni consume cuota de la API.
+
+Devuelve código de salida 1 si algún símbolo se pide más de una vez.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+UPSTREAM_DELAY = 0.5
+THREADS = 50
+COROUTINES = 50
+SYMBOLS = ["AAPL", "MSFT", "VWCE.DE"]
+
+calls = Counter()
+calls_lock = threading.Lock()
+
+class SlowAlphaVantage(BaseHTTPRequestHandler):
+    """Responde GLOBAL_QUOTE tras UPSTREAM_DELAY segundos"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        symbol = parse_qs(urlparse(self.path).query).get("symbol", [""])[0]
+        with calls_lock:
+            calls[symbol] += 1
+        time.sleep(UPSTREAM_DELAY)
+
+        body = json.dumps({"Global Quote": {"01. symbol": symbol, "05. price": "100.0"}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_upstream() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowAlphaVantage)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/query"
+
+def main() -> int:
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'flights.db'}"
+    os.environ["ALPHA_VANTAGE_API_KEY"] = "demo"
+    os.environ["ALPHA_VANTAGE_BASE_URL"] = start_upstream()
+    os.environ["MARKET_DATA_RATE_LIMIT_SECONDS"] = "0"
+
+    from app.database import Base, engine
+    from app.services import market_data
+    import app.models  # noqa: F401
+    Base.metadata.create_all(bind=engine)
+
+    failures = 0
+
+    def check(label: str, results):
+        nonlocal failures
+        wrong = [quote for quote in results if not quote or quote["price"] != 100.0]
+        repeated = {symbol: count for symbol, count in calls.items() if count > 1}
+        ok = not wrong and not repeated and len(calls) == len(SYMBOLS)
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {label}: {len(results)} consultas, llamadas al proveedor {dict(calls)}")
+
+    # Hilos, como los endpoints síncronos del threadpool de FastAPI
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = list(pool.map(lambda i: market_data.get_quote(SYMBOLS[i % len(SYMBOLS)]), range(THREADS)))
+    check("hilos", results)
+
+    # Corrutinas en un event loop, como los endpoints async (sin caché ni
+    # cotizaciones guardadas reutilizables, para forzar otra ronda de llamadas)
+    calls.clear()
+    market_data.quote_cache.clear()
+    market_data.settings.MARKET_DATA_CACHE_MINUTES = 0
+
+    async def burst():
+        return await asyncio.gather(*(
+            market_data.get_quote_async(SYMBOLS[i % len(SYMBOLS)]) for i in range(COROUTINES)
+        ))
+    check("corrutinas", asyncio.run(burst()))
+
+    # Hilos y corrutinas mezclados sobre el mismo vuelo
+    calls.clear()
+    market_data.quote_cache.clear()
+
+    async def mixed():
+        loop = asyncio.get_running_loop()
+        threaded = [loop.run_in_executor(None, market_data.get_quote, SYMBOLS[i % len(SYMBOLS)]) for i in range(THREADS)]
+        awaited = [market_data.get_quote_async(SYMBOLS[i % len(SYMBOLS)]) for i in range(COROUTINES)]
+        return await asyncio.gather(*threaded, *awaited)
+    check("mixto", asyncio.run(mixed()))
+
+    if len(market_data.quote_flights):
+        print(f"❌ Quedan {len(market_data.quote_flights)} vuelos sin resolver")
+        failures += 1
+
+    market_data.market_client.close()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
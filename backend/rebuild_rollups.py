@@ -0,0 +1,26 @@
+"""
+Script para reconstruir la tabla monthly_rollups desde los ingresos y gastos
+"""
+import sys
+from app.database import Base, SessionLocal, engine
+from app.models import *  # Importa todos los modelos
+from app.services.rollups import rebuild_rollups
+
+def main(user_id=None):
+    """Borra y recalcula los totales mensuales (de todos los usuarios o de uno)"""
+    Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db, user_id)
+        db.commit()
+        rows = db.query(MonthlyRollup).count()
+    finally:
+        db.close()
+    
+    print(f"✅ Rollups reconstruidos: {rows} filas")
+
+if __name__ == "__main__":
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    print("🔨 Reconstruyendo totales mensuales...")
+    main(target)